@@ -0,0 +1,358 @@
+"""
+Suite de benchmarks de los caminos críticos de la simulación
+
+Mide Simulation.run_iteration, Simulation.run completo (ambos motores),
+decide() de cada agente, Market.apply_buy/apply_sell y el libro de
+órdenes (OrderBookEngine). Reporta
+iteraciones/s, decisiones/s (u operaciones/s) y memoria pico, y guarda
+los resultados en JSON para compararlos entre commits.
+
+Ejecutar con: python benchmarks/run_benchmarks.py
+Comparar con: python benchmarks/run_benchmarks.py --compare anterior.json
+"""
+
+import sys
+import os
+# Agregar el directorio raíz al path para importar src
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import argparse
+import json
+import platform
+import subprocess
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from functools import partial
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src import (
+    Config, Market, MarketState, Simulation, VectorizedSimulation, OrderBookEngine,
+    RandomAgent, TrendAgent, AntiTrendAgent, SmartAgent
+)
+from src.ledger import BUY, SELL
+
+
+ENGINES = {
+    'objects': Simulation,
+    'objects_batch': partial(Simulation, batch_decisions=True),
+    'vectorized': VectorizedSimulation,
+    'vectorized_batch': partial(VectorizedSimulation, batch_random=True),
+}
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Resultado de un benchmark.
+
+    name: Nombre del benchmark (ej: 'simulation.run_iteration')
+    params: Parámetros de la ejecución (motor, agentes, iteraciones...)
+    seconds: Mejor tiempo entre las repeticiones
+    rates: Throughput derivado (iterations_per_s, decisions_per_s, ops_per_s)
+    peak_memory_kb: Memoria pico medida con tracemalloc en una pasada aparte
+    skipped: Motivo por el que no se ejecutó, si aplica
+    """
+    name: str
+    params: Dict[str, object]
+    seconds: float = 0.0
+    rates: Dict[str, float] = field(default_factory=dict)
+    peak_memory_kb: float = 0.0
+    skipped: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """Identificador estable para comparar entre ejecuciones"""
+        params = ','.join(f"{k}={v}" for k, v in sorted(self.params.items()))
+        return f"{self.name}[{params}]"
+
+
+def agent_mix(num_agents: int) -> Dict[str, int]:
+    """
+    Reparte num_agents con las proporciones de Config y un SmartAgent.
+    """
+    rule_based = num_agents - Config.NUM_SMART
+    base = Config.NUM_RANDOM + Config.NUM_TREND + Config.NUM_ANTI_TREND
+    num_random = round(rule_based * Config.NUM_RANDOM / base)
+    num_trend = round(rule_based * Config.NUM_TREND / base)
+    return {
+        'num_random': num_random,
+        'num_trend': num_trend,
+        'num_anti_trend': rule_based - num_random - num_trend,
+        'num_smart': Config.NUM_SMART,
+    }
+
+
+def _measure(
+    setup: Callable[[], object],
+    body: Callable[[object], None],
+    repeat: int
+) -> Tuple[float, float]:
+    """
+    Ejecuta body(setup()) `repeat` veces y una vez más bajo tracemalloc.
+
+    Returns: (mejor tiempo en segundos, memoria pico en KB)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        subject = setup()
+        start = time.perf_counter()
+        body(subject)
+        best = min(best, time.perf_counter() - start)
+
+    # tracemalloc ralentiza la ejecución: se mide en una pasada separada
+    tracemalloc.start()
+    body(setup())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak / 1024
+
+
+def bench_simulation(
+    engine: str,
+    num_agents: int,
+    iterations: int,
+    repeat: int,
+    full_run: bool
+) -> BenchmarkResult:
+    """
+    Benchmark de run_iteration (iterando a mano) o de run() completo.
+    """
+    name = 'simulation.run' if full_run else 'simulation.run_iteration'
+    result = BenchmarkResult(
+        name, {'engine': engine, 'agents': num_agents, 'iterations': iterations}
+    )
+    simulation_class = ENGINES[engine]
+    mix = agent_mix(num_agents)
+
+    def setup():
+        return simulation_class(total_iterations=iterations, seed=0, **mix)
+
+    def body(sim):
+        if full_run:
+            sim.run(verbose=False)
+        else:
+            for iteration in range(iterations):
+                sim.run_iteration(iteration)
+
+    try:
+        setup()
+    except ValueError as e:
+        result.skipped = str(e)
+        return result
+
+    result.seconds, result.peak_memory_kb = _measure(setup, body, repeat)
+    result.rates = {
+        'iterations_per_s': iterations / result.seconds,
+        'decisions_per_s': iterations * num_agents / result.seconds,
+    }
+    return result
+
+
+def bench_agent_decide(agent_class: type, calls: int, repeat: int) -> BenchmarkResult:
+    """
+    Benchmark de decide() de un tipo de agente sobre estados variados.
+    """
+    result = BenchmarkResult('agent.decide', {'agent': agent_class.__name__, 'calls': calls})
+    total = Config.TOTAL_ITERATIONS
+    # Precios que alternan subidas y bajadas de ±2% para recorrer todas las ramas
+    states = [
+        MarketState(
+            Config.INITIAL_PRICE * (1.02 if i % 2 else 0.98), Config.INITIAL_PRICE,
+            Config.INITIAL_STOCK, i % total, total
+        )
+        for i in range(total)
+    ]
+
+    def setup():
+        return agent_class(0)
+
+    def body(agent):
+        decide = agent.decide
+        for i in range(calls):
+            decide(states[i % total], 0)
+
+    result.seconds, result.peak_memory_kb = _measure(setup, body, repeat)
+    result.rates = {'decisions_per_s': calls / result.seconds}
+    return result
+
+
+def bench_market(operation: str, calls: int, repeat: int) -> BenchmarkResult:
+    """
+    Benchmark de Market.apply_buy o Market.apply_sell.
+    """
+    result = BenchmarkResult(f"market.{operation}", {'calls': calls})
+
+    def setup():
+        return Market(initial_stock=calls)
+
+    def body(market):
+        apply = getattr(market, operation)
+        for _ in range(calls):
+            apply()
+
+    result.seconds, result.peak_memory_kb = _measure(setup, body, repeat)
+    result.rates = {'ops_per_s': calls / result.seconds}
+    return result
+
+
+def bench_order_book(orders: int, orders_per_iteration: int, repeat: int) -> BenchmarkResult:
+    """
+    Benchmark de OrderBookEngine: envío de órdenes y subasta por iteración.
+    """
+    result = BenchmarkResult(
+        'engine.order_book', {'orders': orders, 'per_iteration': orders_per_iteration}
+    )
+    # Lados alternados con una semilla fija para que el libro tenga contrapartes
+    sides = [BUY if (i * 7919) % 13 < 6 else SELL for i in range(orders_per_iteration)]
+
+    def setup():
+        engine = OrderBookEngine()
+        engine.bind(Market(initial_stock=orders))
+        return engine
+
+    def body(engine):
+        submit = engine.submit
+        for iteration in range(orders // orders_per_iteration):
+            for owner, side in enumerate(sides):
+                submit(side, owner)
+            engine.clear(iteration)
+
+    result.seconds, result.peak_memory_kb = _measure(setup, body, repeat)
+    result.rates = {'orders_per_s': orders / result.seconds}
+    return result
+
+
+def run_suite(
+    agent_counts: List[int],
+    iteration_counts: List[int],
+    calls: int = 100_000,
+    repeat: int = 3
+) -> List[BenchmarkResult]:
+    """
+    Ejecuta la suite completa.
+
+    agent_counts: Tamaños de población a medir
+    iteration_counts: Iteraciones por simulación a medir
+    calls: Llamadas por benchmark de decide()/apply_*
+    repeat: Repeticiones por benchmark (se reporta el mejor tiempo)
+    """
+    results = []
+    for engine in ENGINES:
+        for num_agents in agent_counts:
+            for iterations in iteration_counts:
+                for full_run in (False, True):
+                    results.append(
+                        bench_simulation(engine, num_agents, iterations, repeat, full_run)
+                    )
+
+    for agent_class in (RandomAgent, TrendAgent, AntiTrendAgent, SmartAgent):
+        results.append(bench_agent_decide(agent_class, calls, repeat))
+
+    for operation in ('apply_buy', 'apply_sell'):
+        results.append(bench_market(operation, calls, repeat))
+
+    results.append(bench_order_book(calls, min(calls, 1000), repeat))
+
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    """Commit actual, si el directorio es un repositorio git"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def to_json(results: List[BenchmarkResult]) -> dict:
+    """Documento JSON con metadatos del entorno y resultados"""
+    return {
+        'commit': _git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [dict(asdict(r), key=r.key) for r in results],
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Compara dos documentos JSON de resultados.
+
+    tolerance: Caída relativa de throughput tolerada (0.10 = 10%)
+    Returns: Descripción de cada regresión encontrada
+    """
+    previous = {r['key']: r for r in baseline['results']}
+    regressions = []
+
+    for entry in current['results']:
+        old = previous.get(entry['key'])
+        if old is None or entry['skipped'] or old['skipped']:
+            continue
+        for rate, value in entry['rates'].items():
+            old_value = old['rates'].get(rate)
+            if old_value and value < old_value * (1 - tolerance):
+                regressions.append(
+                    f"{entry['key']} {rate}: {old_value:,.0f} -> {value:,.0f} "
+                    f"({(value / old_value - 1) * 100:+.1f}%)"
+                )
+    return regressions
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de la simulación")
+    parser.add_argument('--agents', type=_int_list, default=[100, 1000],
+                        help="Tamaños de población separados por comas (por defecto 100,1000)")
+    parser.add_argument('--iterations', type=_int_list, default=[100, 1000],
+                        help="Iteraciones separadas por comas (por defecto 100,1000)")
+    parser.add_argument('--calls', type=int, default=100_000,
+                        help="Llamadas por benchmark de decide()/apply_*")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Repeticiones por benchmark (mejor tiempo)")
+    parser.add_argument('-o', '--output', default='benchmarks/results.json',
+                        help="Ruta del JSON de resultados")
+    parser.add_argument('--compare', default=None,
+                        help="JSON anterior con el que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Caída de throughput tolerada al comparar (por defecto 0.10)")
+    args = parser.parse_args()
+
+    results = run_suite(args.agents, args.iterations, args.calls, args.repeat)
+
+    print(f"{'Benchmark':<70} {'Tiempo (s)':>10} {'Memoria (KB)':>13}  Throughput")
+    for r in results:
+        if r.skipped:
+            print(f"{r.key:<70} {'omitido':>10} {'':>13}  {r.skipped}")
+            continue
+        rates = ', '.join(f"{k}={v:,.0f}" for k, v in r.rates.items())
+        print(f"{r.key:<70} {r.seconds:>10.4f} {r.peak_memory_kb:>13,.1f}  {rates}")
+
+    document = to_json(results)
+    with open(args.output, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"\nResultados guardados en: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(document, baseline, args.tolerance)
+        if regressions:
+            print(f"\nRegresiones respecto a {baseline.get('commit') or args.compare}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nSin regresiones respecto a {baseline.get('commit') or args.compare}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Comparación de estrategias del SmartAgent con números aleatorios comunes
+"""
+#imports
+
+import argparse
+from typing import Tuple
+
+from src import Config, SmartAgentParams, StrategyComparison
+
+
+def _variant(text: str) -> Tuple[str, SmartAgentParams]:
+    """NOMBRE=fichero.json -> (nombre, parámetros)"""
+    name, _, path = text.partition('=')
+    return name, SmartAgentParams.load(path)
+
+
+def main():
+    """
+    Compara cada variante con la estrategia por defecto sobre las mismas semillas.
+    """
+    parser = argparse.ArgumentParser(description="Comparación emparejada de estrategias del SmartAgent")
+    parser.add_argument('-v', '--variant', type=_variant, action='append', default=[],
+                        help="Variante a comparar: NOMBRE=parametros.json (repetible)")
+    parser.add_argument('-n', '--runs', type=int, default=200,
+                        help="Semillas por variante (por defecto 200)")
+    parser.add_argument('--antithetic', action='store_true',
+                        help="Ejecutar también la versión antitética de cada semilla")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Procesos en paralelo (por defecto, número de CPUs)")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="Semilla base")
+    parser.add_argument('-i', '--iterations', type=int, default=None,
+                        help="Iteraciones por simulación (por defecto Config.TOTAL_ITERATIONS)")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Usar el motor vectorizado")
+    args = parser.parse_args()
+
+    if not args.variant:
+        parser.error("Indica al menos una variante con --variant")
+    Config.validate()
+
+    comparison = StrategyComparison(
+        {'default': SmartAgentParams(), **dict(args.variant)},
+        runs=args.runs,
+        workers=args.workers,
+        seed=args.seed,
+        antithetic=args.antithetic,
+        vectorized=args.vectorized,
+        total_iterations=args.iterations
+    )
+    result = comparison.run()
+
+    print("=" * 60)
+    print(f"COMPARACIÓN DE ESTRATEGIAS (semilla {comparison.seed}, {args.runs} semillas"
+          f"{', antitéticas' if args.antithetic else ''})")
+    print("=" * 60)
+    for v in result.variants:
+        print(f"{v.name:<16} retorno {v.mean_return_pct:+8.2f}% ± {v.return_ci95:.2f}"
+              f"   ranking medio {v.mean_rank:.1f}")
+    print("-" * 60)
+    for d in result.differences:
+        verdict = "significativa" if d.significant else "no significativa"
+        print(f"{d.variant} - {d.baseline}: {d.mean_diff_pct:+.2f} ± {d.diff_ci95:.2f} puntos "
+              f"({verdict}), gana en {d.win_rate * 100:.0f}% de las semillas, "
+              f"reducción de varianza x{d.variance_reduction:.1f}")
+
+
+if __name__ == "__main__":
+    main()
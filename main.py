@@ -3,18 +3,45 @@ Punto de entrada para la simulación del mercado
 """
 #imports
 
-from src import Config, Simulation
+import argparse
+
+from src import (
+    Config, Simulation, Profiler, OrderBookEngine, SmartAgentParams, ReplaySimulation,
+    load_price_path
+)
 
 def main():
     """
     Función principal de ejecución.
     """
+    parser = argparse.ArgumentParser(description="Simulación del mercado de tarjetas gráficas")
+    parser.add_argument('--profile', nargs='?', const='results/profile.json', default=None,
+                        help="Medir tiempos por fase y guardar el perfil en JSON "
+                             "(por defecto results/profile.json)")
+    parser.add_argument('--order-book', action='store_true',
+                        help="Formar el precio con el libro de órdenes (OrderBookEngine)")
+    parser.add_argument('--smart-params', default=None,
+                        help="Fichero JSON con los parámetros del SmartAgent "
+                             "(ej: el generado por run_optimizer.py)")
+    parser.add_argument('--replay', default=None,
+                        help="Reproducir una trayectoria de precios grabada (fichero de un "
+                             "IterationSink o CSV con columna 'price') solo con el SmartAgent")
+    args = parser.parse_args()
+    
     # Validar configuración
     Config.validate()
     
     # Crear y ejecutar simulación
-    simulation = Simulation()
-    simulation.run(verbose=True)
+    smart_params = SmartAgentParams.load(args.smart_params) if args.smart_params else None
+    if args.replay:
+        simulation = ReplaySimulation(load_price_path(args.replay), smart_params=smart_params)
+    else:
+        simulation = Simulation(
+            smart_params=smart_params,
+            engine=OrderBookEngine() if args.order_book else None
+        )
+    profiler = Profiler(args.profile) if args.profile else None
+    simulation.run(verbose=True, profiler=profiler)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,131 @@
+"""
+Análisis estadístico: ejecuta múltiples simulaciones en paralelo
+"""
+#imports
+
+import argparse
+import csv
+import os
+
+from src import Config, MonteCarloRunner, SmartAgentParams, StoppingRule, archive_runs
+
+
+def main():
+    """
+    Ejecuta un lote de simulaciones y guarda un resumen por simulación.
+    """
+    parser = argparse.ArgumentParser(description="Simulaciones Monte Carlo del mercado")
+    parser.add_argument('-n', '--runs', type=int, default=100,
+                        help="Número de simulaciones (por defecto 100)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Procesos en paralelo (por defecto, número de CPUs)")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="Semilla base del lote")
+    parser.add_argument('-i', '--iterations', type=int, default=Config.TOTAL_ITERATIONS,
+                        help="Iteraciones por simulación")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Usar el motor vectorizado")
+    parser.add_argument('--cache', default=None,
+                        help="Directorio de la caché de resultados (ej: results/cache)")
+    parser.add_argument('--bands', default=None,
+                        help="CSV con el precio medio y las bandas 5%%-50%%-95%% por iteración "
+                             "(ej: results/price_bands.csv); los procesos escriben los "
+                             "historiales en memoria compartida")
+    parser.add_argument('--archive', default=None,
+                        help="Añadir las simulaciones (historiales de precio y volumen y estado "
+                             "final de los agentes) a un archivo binario (ej: results/runs.bin)")
+    parser.add_argument('--smart-params', default=None,
+                        help="Fichero JSON con los parámetros del SmartAgent a evaluar")
+    parser.add_argument('--target-ci', type=float, default=None,
+                        help="Detener al alcanzar este semiancho del IC 95%% del retorno "
+                             "medio (-n pasa a ser el máximo de simulaciones)")
+    parser.add_argument('--target-top10-ci', type=float, default=None,
+                        help="Detener al alcanzar este semiancho del IC 95%% de la tasa de top 10")
+    parser.add_argument('--baseline', type=float, default=None,
+                        help="Retorno de referencia (%%) para el test secuencial SPRT")
+    parser.add_argument('--min-effect', type=float, default=1.0,
+                        help="Mejora mínima a detectar frente a --baseline (por defecto 1 punto)")
+    parser.add_argument('-o', '--output', default='results/simulation_results.csv',
+                        help="Ruta del CSV de resultados")
+    args = parser.parse_args()
+    
+    sequential = (args.target_ci, args.target_top10_ci, args.baseline) != (None, None, None)
+    if sequential and args.bands:
+        parser.error("--bands no se puede combinar con la parada temprana")
+    if args.archive and (sequential or args.bands):
+        parser.error("--archive no se puede combinar con --bands ni con la parada temprana")
+    Config.validate()
+    
+    runner = MonteCarloRunner(
+        num_runs=args.runs,
+        workers=args.workers,
+        seed=args.seed,
+        total_iterations=args.iterations,
+        vectorized=args.vectorized,
+        cache_dir=args.cache,
+        smart_params=SmartAgentParams.load(args.smart_params) if args.smart_params else None
+    )
+    stopped = None
+    if sequential:
+        stopped = runner.run_sequential(StoppingRule(
+            return_ci95=args.target_ci,
+            top10_ci95=args.target_top10_ci,
+            baseline_return=args.baseline,
+            min_effect=args.min_effect
+        ))
+        results = stopped.results
+    elif args.bands:
+        results, shared = runner.run_shared()
+        with shared:
+            write_bands(shared, args.bands)
+    elif args.archive:
+        results = archive_runs(runner, args.archive)
+    else:
+        results = runner.run()
+    MonteCarloRunner.write_csv(results, args.output)
+    
+    summary = MonteCarloRunner.summarize(results)
+    print("=" * 60)
+    print(f"RESULTADOS DE {summary['runs']} SIMULACIONES (semilla {runner.seed})")
+    print("=" * 60)
+    print(f"Retorno promedio: {summary['avg_return_pct']:+.2f}%")
+    print(f"Retorno mínimo: {summary['min_return_pct']:+.2f}%")
+    print(f"Retorno máximo: {summary['max_return_pct']:+.2f}%")
+    print(f"Ranking promedio: {summary['avg_rank']:.1f}")
+    print(f"Top 10: {summary['top10_rate'] * 100:.1f}% de las simulaciones")
+    print(f"Terminó con 0 tarjetas: {summary['zero_cards_rate'] * 100:.1f}%")
+    if stopped is not None:
+        print(f"Retorno medio: {stopped.mean_return_pct:+.2f}% ± {stopped.return_ci95:.2f} (IC 95%)")
+        print(f"Tasa de top 10: {stopped.top10_rate * 100:.1f}% ± {stopped.top10_ci95 * 100:.1f}")
+        if stopped.reason is None:
+            print(f"Criterio de parada no alcanzado en {args.runs} simulaciones")
+        else:
+            print(f"Parada temprana ({stopped.reason}) tras {len(results)} de {args.runs} simulaciones")
+        if stopped.decision is not None:
+            print(f"Test secuencial frente a {args.baseline:+.2f}%: {stopped.decision}")
+    print(f"Resultados guardados en: {args.output}")
+    if args.bands:
+        print(f"Bandas de precio guardadas en: {args.bands}")
+    if args.archive:
+        print(f"Simulaciones añadidas al archivo: {args.archive}")
+
+
+def write_bands(shared, path: str):
+    """
+    Guarda el precio medio y los cuantiles 5%, 50% y 95% de cada iteración
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    mean = shared.mean_path()
+    bands = shared.quantile_bands((0.05, 0.5, 0.95))
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Iteracion', 'Precio_Medio', 'P05', 'P50', 'P95'])
+        for t, value in enumerate(mean):
+            writer.writerow([t, f"{value:.4f}", *(f"{band[t]:.4f}" for band in bands.values())])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Optimización de los parámetros del SmartAgent con un algoritmo genético
+"""
+#imports
+
+import argparse
+
+from src import Config, StrategyOptimizer
+
+
+def main():
+    """
+    Ejecuta la optimización y guarda los mejores parámetros en JSON.
+    """
+    parser = argparse.ArgumentParser(description="Optimización de la estrategia del SmartAgent")
+    parser.add_argument('-p', '--population', type=int, default=16,
+                        help="Candidatos por generación (por defecto 16)")
+    parser.add_argument('-g', '--generations', type=int, default=10,
+                        help="Generaciones (por defecto 10)")
+    parser.add_argument('-e', '--evaluations', type=int, default=32,
+                        help="Simulaciones por candidato y generación (por defecto 32)")
+    parser.add_argument('--stage', type=int, default=8,
+                        help="Simulaciones por etapa antes de descartar perdedores (por defecto 8)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Procesos en paralelo (por defecto, número de CPUs)")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="Semilla del optimizador")
+    parser.add_argument('-i', '--iterations', type=int, default=None,
+                        help="Iteraciones por simulación (por defecto Config.TOTAL_ITERATIONS)")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Usar el motor vectorizado")
+    parser.add_argument('-o', '--output', default='results/smart_params.json',
+                        help="Fichero JSON con los parámetros optimizados")
+    args = parser.parse_args()
+
+    Config.validate()
+
+    optimizer = StrategyOptimizer(
+        population=args.population,
+        generations=args.generations,
+        evaluations=args.evaluations,
+        stage_size=args.stage,
+        workers=args.workers,
+        seed=args.seed,
+        vectorized=args.vectorized,
+        total_iterations=args.iterations
+    )
+    params = optimizer.run(verbose=True)
+    params.save(args.output)
+
+    best = optimizer.history[-1]
+    print("=" * 60)
+    print(f"OPTIMIZACIÓN TERMINADA (semilla {optimizer.seed})")
+    print("=" * 60)
+    print(f"Mejor retorno medio (última generación): {best.best_return_pct:+.2f}%")
+    print(f"Simulaciones: {sum(g.evaluations for g in optimizer.history):,}")
+    print(f"Parámetros guardados en: {args.output}")
+    print(f"Usar con: python3 main.py --smart-params {args.output}")
+
+
+if __name__ == "__main__":
+    main()
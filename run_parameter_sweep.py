@@ -0,0 +1,103 @@
+"""
+Barrido de parámetros: réplicas en paralelo por cada combinación de parámetros
+"""
+#imports
+
+import argparse
+from typing import Dict, List, Tuple, Union
+
+from src import Config, ParameterSweep, grid, latin_hypercube, random_samples
+
+
+def _number(text: str) -> Union[int, float]:
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _grid_values(text: str) -> Tuple[str, List[Union[int, float]]]:
+    """NOMBRE=v1,v2,... -> (nombre, valores)"""
+    name, _, values = text.partition('=')
+    return name, [_number(value) for value in values.split(',')]
+
+
+def _range(text: str) -> Tuple[str, Tuple[Union[int, float], Union[int, float]]]:
+    """NOMBRE=min:max -> (nombre, (min, max))"""
+    name, _, bounds = text.partition('=')
+    low, _, high = bounds.partition(':')
+    return name, (_number(low), _number(high))
+
+
+def main():
+    """
+    Ejecuta el barrido y guarda un resumen por celda.
+    """
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de la simulación")
+    parser.add_argument('-g', '--grid', type=_grid_values, action='append', default=[],
+                        help="Valores de un parámetro: NOMBRE=v1,v2,... (repetible)")
+    parser.add_argument('--range', type=_range, action='append', default=[],
+                        help="Rango de un parámetro para muestreo: NOMBRE=min:max (repetible)")
+    parser.add_argument('--sample', choices=['random', 'lhs'], default='lhs',
+                        help="Muestreo de los rangos: aleatorio o hipercubo latino (por defecto)")
+    parser.add_argument('--samples', type=int, default=20,
+                        help="Celdas a muestrear de los rangos (por defecto 20)")
+    parser.add_argument('-r', '--replicates', type=int, default=30,
+                        help="Simulaciones por celda (por defecto 30)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Procesos en paralelo (por defecto, número de CPUs)")
+    parser.add_argument('-s', '--seed', type=int, default=None,
+                        help="Semilla base del barrido")
+    parser.add_argument('-i', '--iterations', type=int, default=None,
+                        help="Iteraciones por simulación (atajo de --grid TOTAL_ITERATIONS=N)")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="Usar el motor vectorizado")
+    parser.add_argument('--cache', default=None,
+                        help="Directorio de la caché de resultados (ej: results/cache)")
+    parser.add_argument('--results', default='results/sweep_runs.jsonl',
+                        help="Resultados por réplica; permite reanudar el barrido")
+    parser.add_argument('-o', '--output', default='results/sweep_summary.csv',
+                        help="Ruta del CSV de resumen por celda")
+    args = parser.parse_args()
+
+    Config.validate()
+
+    space: Dict[str, list] = dict(args.grid)
+    if args.iterations is not None:
+        space.setdefault('TOTAL_ITERATIONS', [args.iterations])
+    ranges = dict(args.range)
+    if not space and not ranges:
+        parser.error("Indica al menos un parámetro con --grid o --range")
+
+    cells = grid(space) if space else [{}]
+    if ranges:
+        sampler = latin_hypercube if args.sample == 'lhs' else random_samples
+        samples = sampler(ranges, args.samples, args.seed)
+        cells = [{**cell, **sample} for cell in cells for sample in samples]
+
+    sweep = ParameterSweep(
+        cells,
+        replicates=args.replicates,
+        workers=args.workers,
+        seed=args.seed,
+        vectorized=args.vectorized,
+        results_path=args.results,
+        cache_dir=args.cache
+    )
+    summaries = sweep.run()
+    ParameterSweep.write_summary(summaries, args.output)
+
+    print("=" * 60)
+    print(f"BARRIDO DE {len(cells)} CELDAS x {args.replicates} RÉPLICAS (semilla {sweep.seed})")
+    print("=" * 60)
+    best = sorted(summaries, key=lambda s: s.mean_return_pct, reverse=True)
+    for s in best[:10]:
+        params = ', '.join(f"{k}={v:.4g}" if isinstance(v, float) else f"{k}={v}"
+                           for k, v in s.params.items())
+        print(f"{s.mean_return_pct:+7.2f}% ± {s.return_ci95:5.2f}  "
+              f"ranking {s.mean_rank:5.1f} ± {s.rank_ci95:4.1f}  {params}")
+    print(f"Resumen guardado en: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
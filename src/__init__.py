@@ -4,14 +4,38 @@ Paquete principal del sistema de simulación de mercado
 
 from .config import Config
 from .models import MarketState, Decision
-from .market import Market
+from .market import Market, BatchFill
+from .ledger import TransactionLedger, AgentTransactions
+from .engines import MarketEngine, MultiplicativeEngine, OrderBookEngine, Fill
+from .rng import RandomStreams, AntitheticRandom
+from .checkpoint import save_checkpoint, load_checkpoint
+from .sinks import (
+    IterationRecord, IterationSink, CsvSink, JsonLinesSink, BinarySink,
+    open_sink, read_binary
+)
+from .indicators import RollingWindow, RunningStatistics
+from .profiling import Profiler
 from .simulation import Simulation
+from .population import AgentPopulation
+from .vectorized_simulation import VectorizedSimulation
+from .cache import ResultCache, CacheEntry, cache_key
+from .shared_results import SharedRunResults
+from .archive import RunArchive, ArchiveWriter, archive_runs
+from .replay import ReplayMarket, ReplaySimulation, load_price_path, replay_many
+from .sequential import StoppingRule, SequentialResult
+from .pool import run_pool, stream_pool
+from .monte_carlo import MonteCarloRunner, RunResult
+from .sweep import ParameterSweep, CellSummary, grid, random_samples, latin_hypercube
+from .comparison import StrategyComparison, VariantSummary, PairedDifference, ComparisonResult
+from .optimizer import StrategyOptimizer, GenerationSummary
+from .sharding import ShardedSimulation, MarketSpec, MarketSummary, ShardedResult
 from .agents import (
     Agent,
     RandomAgent,
     TrendAgent,
     AntiTrendAgent,
-    SmartAgent
+    SmartAgent,
+    SmartAgentParams
 )
 __version__ = '1.0.0'
 
@@ -20,10 +44,66 @@ __all__ = [
     'MarketState',
     'Decision',
     'Market',
+    'BatchFill',
+    'MarketEngine',
+    'MultiplicativeEngine',
+    'OrderBookEngine',
+    'Fill',
+    'TransactionLedger',
+    'AgentTransactions',
+    'RandomStreams',
+    'AntitheticRandom',
+    'save_checkpoint',
+    'load_checkpoint',
+    'IterationRecord',
+    'IterationSink',
+    'CsvSink',
+    'JsonLinesSink',
+    'BinarySink',
+    'open_sink',
+    'read_binary',
+    'RollingWindow',
+    'RunningStatistics',
+    'Profiler',
     'Simulation',
+    'AgentPopulation',
+    'VectorizedSimulation',
+    'ResultCache',
+    'CacheEntry',
+    'cache_key',
+    'SharedRunResults',
+    'MonteCarloRunner',
+    'RunResult',
+    'RunArchive',
+    'ArchiveWriter',
+    'archive_runs',
+    'ReplayMarket',
+    'ReplaySimulation',
+    'load_price_path',
+    'replay_many',
+    'StoppingRule',
+    'SequentialResult',
+    'run_pool',
+    'stream_pool',
+    'ParameterSweep',
+    'CellSummary',
+    'grid',
+    'random_samples',
+    'latin_hypercube',
+    'StrategyComparison',
+    'VariantSummary',
+    'PairedDifference',
+    'ComparisonResult',
+    'StrategyOptimizer',
+    'GenerationSummary',
+    'ShardedSimulation',
+    'MarketSpec',
+    'MarketSummary',
+    'ShardedResult',
     'Agent',
     'RandomAgent',
     'TrendAgent',
     'AntiTrendAgent',
     'SmartAgent',
+    'SmartAgentParams',
 ]
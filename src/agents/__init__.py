@@ -3,7 +3,7 @@ from .base import Agent
 from .random_agent import RandomAgent
 from .trend_agent import TrendAgent
 from .anti_trend_agent import AntiTrendAgent
-from .smart_agent import SmartAgent
+from .smart_agent import SmartAgent, SmartAgentParams
 
 __all__ = [
     'Agent',
@@ -11,4 +11,5 @@ __all__ = [
     'TrendAgent',
     'AntiTrendAgent',
     'SmartAgent',
+    'SmartAgentParams',
 ]
@@ -4,6 +4,8 @@ Agente que va contra la tendencia del precio
 # Importaciones
 
 import random
+from typing import List
+
 from .base import Agent
 from ..models import MarketState, Decision
 
@@ -33,6 +35,19 @@ class AntiTrendAgent(Agent):
         price_change = market_state.price_change_percentage()
         
         if price_change <= -0.01:  # Precio bajó 1% o más
-            return 'buy' if random.random() < 0.75 else 'hold'
+            return 'buy' if self.rng.random() < 0.75 else 'hold'
         else:
-            return 'sell' if random.random() < 0.20 else 'hold'
+            return 'sell' if self.rng.random() < 0.20 else 'hold'
+    
+    @classmethod
+    def decide_batch(cls, state: MarketState, n: int, rng: random.Random) -> List[Decision]:
+        """
+        Decisiones de n agentes con el cambio de precio del estado común
+        (el de inicio de iteración, no el de cada turno)
+        """
+        price_change = state.price_change_percentage()
+        draw = rng.random
+        
+        if price_change <= -0.01:
+            return ['buy' if draw() < 0.75 else 'hold' for _ in range(n)]
+        return ['sell' if draw() < 0.20 else 'hold' for _ in range(n)]
@@ -2,10 +2,12 @@
 Clase base abstracta para todos los agentes del mercado
 """
 
+import random
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from typing import List, Optional
 
 from ..config import Config
+from ..ledger import BUY, SELL, TransactionLedger
 from ..models import MarketState, Decision
 
 
@@ -15,12 +17,33 @@ class Agent(ABC):
     decide() con su estrategia específica.
     """
     
-    def __init__(self, agent_id: int):
+    # True si decide_batch equivale exactamente a decide() en orden de turno
+    # (la decisión no depende del precio dentro de la iteración); la
+    # simulación entonces decide en lote siempre, sin batch_decisions
+    BATCH_EQUIVALENT = False
     
+    def __init__(
+        self,
+        agent_id: int,
+        rng: Optional[random.Random] = None,
+        ledger: Optional[TransactionLedger] = None
+    ):
+        """
+        agent_id: Identificador del agente
+        rng: Generador aleatorio para sus decisiones (compartido por clase
+             en la simulación). Si es None se siembra desde el `random` global.
+        ledger: Registro de transacciones compartido de la simulación.
+                Si es None el agente usa un registro propio.
+        """
         self.agent_id = agent_id #identificador
+        self.rng = rng if rng is not None else random.Random(random.getrandbits(64))
         self.balance: float = Config.INITIAL_BALANCE
         self.cards: int = 0
-        self.transactions: List[Tuple[str, float, int]] = []
+        self.trade_count: int = 0  # Se cuenta aunque el registro esté desactivado
+        self.ledger = ledger if ledger is not None else TransactionLedger()
+        self._type_code = self.ledger.type_code(self.__class__.__name__)
+        # Vista de sus filas en el registro: secuencia de (lado, precio, iteración)
+        self.transactions = self.ledger.view(agent_id)
     
     @abstractmethod
     def decide(self, market_state: MarketState, turn: int) -> Decision:# decide qué hacer
@@ -31,6 +54,27 @@ class Agent(ABC):
         """
         pass
     
+    @classmethod
+    def decide_batch(
+        cls,
+        state: MarketState,
+        n: int,
+        rng: random.Random
+    ) -> Optional[List[Decision]]:
+        """
+        Decide a la vez para `n` agentes de la clase que ven el mismo estado
+        (el del inicio de la iteración). Solo pueden implementarlo las
+        clases cuya decisión no depende del estado propio del agente.
+        
+            state: Estado del mercado común a los n agentes
+            n: Número de agentes
+            rng: Generador de la clase; se consume en el mismo orden que
+                 n llamadas sucesivas a decide()
+            Returns: Decisión de cada agente en orden de turno, o None si
+                     la clase no admite decisiones en lote (se usa decide())
+        """
+        return None
+    
     def can_buy(self, price: float) -> bool: #Verifica si el agente tiene fondos suficientes para comprar
         """
         price: Precio actual de una tarjeta
@@ -49,7 +93,8 @@ class Agent(ABC):
         if self.can_buy(price):
             self.balance -= price
             self.cards += 1
-            self.transactions.append(('buy', price, iteration))
+            self.trade_count += 1
+            self.ledger.record(self.agent_id, self._type_code, BUY, price, iteration)
             return True
         return False
     
@@ -57,7 +102,8 @@ class Agent(ABC):
         if self.can_sell():
             self.balance += price
             self.cards -= 1
-            self.transactions.append(('sell', price, iteration))
+            self.trade_count += 1
+            self.ledger.record(self.agent_id, self._type_code, SELL, price, iteration)
             return True
         return False
     
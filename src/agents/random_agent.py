@@ -3,6 +3,8 @@ Agente con estrategia aleatoria
 """
 #Imports
 import random
+from typing import List
+
 from .base import Agent
 from ..models import MarketState, Decision
 
@@ -10,6 +12,8 @@ class RandomAgent(Agent):
     """
     Agente con estrategia aleatoria(1/3 comprar, 1/3 vender, 1/3 hold)
     """
+    BATCH_EQUIVALENT = True
+
     def decide(self, market_state: MarketState, turn: int) -> Decision:
         """
         Decide random entre comprar, vender o no hacer nada
@@ -18,9 +22,21 @@ class RandomAgent(Agent):
         
         Returns: 'buy', 'sell', o 'hold' con igual probabilidad
         """
-        choice = random.random()
+        choice = self.rng.random()
         if choice < 1/3:
             return 'buy'
         elif choice < 2/3:
             return 'sell'
         return 'hold'
+    
+    @classmethod
+    def decide_batch(cls, state: MarketState, n: int, rng: random.Random) -> List[Decision]:
+        """
+        Decisiones de n RandomAgent: idénticas a n llamadas a decide(),
+        ya que no dependen del estado del mercado
+        """
+        draw = rng.random
+        return [
+            'buy' if choice < 1/3 else 'sell' if choice < 2/3 else 'hold'
+            for choice in [draw() for _ in range(n)]
+        ]
@@ -1,14 +1,95 @@
 """
 Agente inteligente
 """
+import json
+import os
 import random
-from typing import List
+from dataclasses import asdict, dataclass, fields
+from typing import Optional
 
 from .base import Agent
 from ..config import Config
+from ..indicators import RollingWindow
+from ..ledger import TransactionLedger
 from ..models import MarketState, Decision
 
 
+# Número de otros agentes (51 + 24 + 24) para el que están ajustados los
+# umbrales de presión; la presión estimada se escala a esta población
+PRESSURE_REFERENCE_AGENTS = 99
+
+
+@dataclass(frozen=True)
+class SmartAgentParams:
+    """
+    Parámetros de la estrategia del SmartAgent (los valores por defecto
+    reproducen la estrategia original).
+
+    accumulation_end: Fin de la fase de acumulación (fracción de la simulación)
+    reduction_start: Inicio de la fase de reducción gradual
+    reduction_span: Duración de la fase de reducción
+    reduction_rate: Fracción de tarjetas a reducir a lo largo de la fase
+    late_sell_start: Desde aquí se vende aleatoriamente en la fase de reducción
+    late_sell_probability: Probabilidad de esa venta aleatoria
+    liquidation_iterations: Últimas iteraciones dedicadas a liquidar
+    pressure_low_threshold: Precio bajo frente al promedio al comprar por presión
+    low_threshold: Precio bajo frente al promedio al comprar por momentum/acumulación
+    reduction_profit: Ganancia mínima para vender en la fase de reducción
+    trading_profit: Ganancia mínima para vender en la fase de trading
+    sell_pressure: Presión de compra a partir de la cual se vende (en agentes
+        sobre una población de PRESSURE_REFERENCE_AGENTS)
+    buy_pressure: Presión de venta por debajo de la cual se compra (ídem)
+    momentum_buy: Momentum por debajo del cual se compra
+    reserve_fraction: Fracción máxima del balance reservada como efectivo
+    reserve_exponent: Exponente de la fracción de simulación restante en la
+        reserva (reserva = balance * restante ** exponente * reserve_fraction)
+    """
+    accumulation_end: float = 0.3
+    reduction_start: float = 0.7
+    reduction_span: float = 0.25
+    reduction_rate: float = 0.7
+    late_sell_start: float = 0.85
+    late_sell_probability: float = 0.4
+    liquidation_iterations: int = 50
+    pressure_low_threshold: float = 0.97
+    low_threshold: float = 0.98
+    reduction_profit: float = 1.03
+    trading_profit: float = 1.08
+    sell_pressure: float = 15
+    buy_pressure: float = -10
+    momentum_buy: float = -0.02
+    reserve_fraction: float = 0.2
+    reserve_exponent: float = 0.5
+
+    @classmethod
+    def from_dict(cls, values: dict) -> 'SmartAgentParams':
+        """
+        Parámetros a partir de un dict parcial (el resto toma su valor por defecto)
+
+        Raises:
+            ValueError: Si algún parámetro no existe
+        """
+        names = {f.name for f in fields(cls)}
+        unknown = set(values) - names
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos: {', '.join(sorted(unknown))}")
+        return cls(**values)
+
+    @classmethod
+    def load(cls, path: str) -> 'SmartAgentParams':
+        """Lee los parámetros de un fichero JSON (ej: el generado por el optimizador)"""
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, path: str):
+        """Guarda los parámetros en un fichero JSON"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(asdict(self), f, indent=2)
+
+
 class SmartAgent(Agent):
     """
     Agente inteligente con estrategia de fases:
@@ -20,25 +101,45 @@ class SmartAgent(Agent):
     (Adaptación temporal con estrategias por fase)
     """
     
-    def __init__(self, agent_id: int):
+    def __init__(
+        self,
+        agent_id: int,
+        rng: Optional[random.Random] = None,
+        num_random: int = Config.NUM_RANDOM,
+        num_trend: int = Config.NUM_TREND,
+        num_anti_trend: int = Config.NUM_ANTI_TREND,
+        ledger: Optional[TransactionLedger] = None,
+        params: Optional[SmartAgentParams] = None
+    ):
         """
         Inicializa el SmartAgent con estado adicional
+        num_random, num_trend, num_anti_trend: Distribución de los otros
+            agentes de la simulación (conocimiento del mercado)
+        ledger: Registro de transacciones compartido (ver Agent)
+        params: Parámetros de la estrategia (por defecto, los originales)
         """
-        super().__init__(agent_id)
-        self.price_history: List[float] = []
+        super().__init__(agent_id, rng, ledger)
+        self.params = params if params is not None else SmartAgentParams()
+        # Ventana de los últimos precios observados (promedio y momentum)
+        self.price_window = RollingWindow(20)
         self.avg_purchase_price: float = 0.0
         
         #Conocimiento del mercado (distribución de otros agentes)
-        self.num_random = Config.NUM_RANDOM
-        self.num_trend = Config.NUM_TREND
-        self.num_anti_trend = Config.NUM_ANTI_TREND
+        self.num_random = num_random
+        self.num_trend = num_trend
+        self.num_anti_trend = num_anti_trend
+        # Escala la presión a la población de referencia de los umbrales
+        others = num_random + num_trend + num_anti_trend
+        self._pressure_scale = PRESSURE_REFERENCE_AGENTS / max(others, 1)
     
     def _estimate_market_pressure(self, market_state: MarketState) -> float:
         """
         Estima la presión neta de compra/venta del mercado
         
         Analiza el comportamiento esperado de los otros agentes basándose
-        en sus reglas conocidas y el cambio de precio actual
+        en sus reglas conocidas y el cambio de precio actual. La presión se
+        normaliza a PRESSURE_REFERENCE_AGENTS agentes, de modo que los
+        umbrales de SmartAgentParams valen para cualquier tamaño de población
     
         Returns: Presión neta (positivo = compra, negativo = venta)
         """
@@ -59,25 +160,21 @@ class SmartAgent(Agent):
         else:
             anti_trend_pressure = self.num_anti_trend * -0.20  # 20% venden
         
-        return random_pressure + trend_pressure + anti_trend_pressure
+        return (random_pressure + trend_pressure + anti_trend_pressure) * self._pressure_scale
     
     def _calculate_momentum(self, window: int = 10) -> float: #Calcula el momentum del precio en las últimas N iteraciones
         """
         window: Tamaño de la ventana temporal
         Returns: Momentum (cambio porcentual en la ventana)float
         """
-        if len(self.price_history) < window:
-            return 0
-        recent = self.price_history[-window:]
-        return (recent[-1] - recent[0]) / recent[0]
+        return self.price_window.momentum(window)
     
     def _is_price_low(self, current_price: float, threshold: float = 0.97) -> bool: # Si el precio está bajo comparado con el promedio reciente
 
-        if len(self.price_history) < 20:
+        if not self.price_window.full:
             return current_price < Config.INITIAL_PRICE * 1.025
         
-        avg_recent = sum(self.price_history[-20:]) / 20
-        return current_price < avg_recent * threshold
+        return current_price < self.price_window.mean() * threshold
     
     def _is_price_high(self, current_price: float, threshold: float = 1.03) -> bool: # Si el precio está alto comparado con el promedio reciente
         """
@@ -85,11 +182,10 @@ class SmartAgent(Agent):
         threshold: Umbral (ej: 1.03 = 3% sobre el promedio)
         True si el precio está alto
         """
-        if len(self.price_history) < 20:
+        if not self.price_window.full:
             return current_price > Config.INITIAL_PRICE * 1.10
         
-        avg_recent = sum(self.price_history[-20:]) / 20
-        return current_price > avg_recent * threshold
+        return current_price > self.price_window.mean() * threshold
     
     def _calculate_reserve(self, iteration: int, total: int) -> float: # Calcula la reserva de efectivo a mantener
         """
@@ -98,7 +194,8 @@ class SmartAgent(Agent):
         Returns: Cantidad a reservar
         """
         remaining_ratio = (total - iteration) / total
-        return self.balance * (remaining_ratio ** 0.5) * 0.2
+        params = self.params
+        return self.balance * (remaining_ratio ** params.reserve_exponent) * params.reserve_fraction
     
     def _update_avg_purchase_price(self, price: float): # Actualiza el precio promedio de compra
         """
@@ -117,55 +214,65 @@ class SmartAgent(Agent):
         Returns:
             -Decision: 'buy', 'sell', o 'hold'
         """
-        self.price_history.append(market_state.price)
+        self.price_window.push(market_state.price)
         
         iteration = market_state.iteration
         total = market_state.total_iterations
         price = market_state.price
+        params = self.params
         
         # FASE 1: LIQUIDACIÓN TOTAL (últimas 50 iteraciones) =====
-        if iteration >= total - 50:
+        if iteration >= total - params.liquidation_iterations:
             if self.cards > 0:
                 return 'sell'
             return 'hold'
         
         # FASE 2: REDUCCIÓN GRADUAL (iteraciones 70%-95%) =====
-        if iteration >= total * 0.7:
+        if iteration >= total * params.reduction_start:
             if self.cards > 0:
                 # Calcular target de tarjetas para esta iteración
-                phase_progress = (iteration - total * 0.7) / (total * 0.25)
-                target_cards = int(self.cards * (1 - phase_progress * 0.7))
+                phase_progress = (
+                    (iteration - total * params.reduction_start) / (total * params.reduction_span)
+                )
+                target_cards = int(self.cards * (1 - phase_progress * params.reduction_rate))
                 
                 # Vender si tenemos más tarjetas del target y hay ganancia
                 if self.cards > target_cards:
-                    if self.avg_purchase_price > 0 and price >= self.avg_purchase_price * 1.03:
+                    if (self.avg_purchase_price > 0
+                            and price >= self.avg_purchase_price * params.reduction_profit):
                         return 'sell'
                 
                 # O vender si estamos muy cerca del final
-                if iteration >= total * 0.85 and random.random() < 0.4:
+                if (iteration >= total * params.late_sell_start
+                        and self.rng.random() < params.late_sell_probability):
                     return 'sell'
             
             return 'hold'
         
         # FASE 3: TRADING ACTIVO (iteraciones 30%-70%) =====
-        if iteration >= total * 0.3:
+        if iteration >= total * params.accumulation_end:
             market_pressure = self._estimate_market_pressure(market_state)
             momentum = self._calculate_momentum()
             
             # Vender si hay presión de compra fuerte y tenemos ganancias
-            if market_pressure > 15 and self.cards > 0:
-                if self.avg_purchase_price > 0 and price > self.avg_purchase_price * 1.08:
+            if market_pressure > params.sell_pressure and self.cards > 0:
+                if (self.avg_purchase_price > 0
+                        and price > self.avg_purchase_price * params.trading_profit):
                     return 'sell'
             
             # Comprar si hay presión de venta y el precio es atractivo
-            if market_pressure < -10 and self._is_price_low(price) and self.can_buy(price):
+            if (market_pressure < params.buy_pressure
+                    and self._is_price_low(price, params.pressure_low_threshold)
+                    and self.can_buy(price)):
                 reserve = self._calculate_reserve(iteration, total)
                 if self.balance - price > reserve:
                     self._update_avg_purchase_price(price)
                     return 'buy'
             
             # Trading basado en momentum
-            if momentum < -0.02 and self._is_price_low(price, 0.98) and self.can_buy(price):
+            if (momentum < params.momentum_buy
+                    and self._is_price_low(price, params.low_threshold)
+                    and self.can_buy(price)):
                 reserve = self._calculate_reserve(iteration, total)
                 if self.balance - price > reserve:
                     self._update_avg_purchase_price(price)
@@ -174,7 +281,7 @@ class SmartAgent(Agent):
             return 'hold'
         
         # FASE 4: ACUMULACIÓN (iteraciones 0-30%) =====
-        if self._is_price_low(price, 0.98) and self.can_buy(price):
+        if self._is_price_low(price, params.low_threshold) and self.can_buy(price):
             reserve = self._calculate_reserve(iteration, total)
             if self.balance - price > reserve:
                 self._update_avg_purchase_price(price)
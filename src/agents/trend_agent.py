@@ -3,6 +3,7 @@ Agente que sigue la tendencia del precio
 """
 
 import random
+from typing import List
 
 from .base import Agent
 from ..models import MarketState, Decision
@@ -29,6 +30,19 @@ class TrendAgent(Agent):
         price_change = market_state.price_change_percentage()
         
         if price_change >= 0.01:  # Precio subió 1% o más
-            return 'buy' if random.random() < 0.75 else 'hold'
+            return 'buy' if self.rng.random() < 0.75 else 'hold'
         else:
-            return 'sell' if random.random() < 0.20 else 'hold'
+            return 'sell' if self.rng.random() < 0.20 else 'hold'
+    
+    @classmethod
+    def decide_batch(cls, state: MarketState, n: int, rng: random.Random) -> List[Decision]:
+        """
+        Decisiones de n agentes con el cambio de precio del estado común
+        (el de inicio de iteración, no el de cada turno)
+        """
+        price_change = state.price_change_percentage()
+        draw = rng.random
+        
+        if price_change >= 0.01:
+            return ['buy' if draw() < 0.75 else 'hold' for _ in range(n)]
+        return ['sell' if draw() < 0.20 else 'hold' for _ in range(n)]
@@ -0,0 +1,350 @@
+"""
+Archivo binario de simulaciones: solo anexado, leído con mmap
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from .agents import SmartAgentParams
+from .config import Config
+from .monte_carlo import MonteCarloRunner, RunResult
+from .pool import stream_pool
+from .shared_results import PricePathAggregates
+from .simulation import Simulation
+from .vectorized_simulation import VectorizedSimulation
+
+
+# Cabecera del fichero de datos: identificador, versión, orden de bytes de
+# los bloques, iteraciones y agentes por simulación. Ocupa HEADER_SIZE
+# bytes para que los bloques empiecen alineados.
+MAGIC = b'MKTRUNS\x00'
+VERSION = 1
+HEADER = struct.Struct('<8sIcqq')
+HEADER_SIZE = 64
+
+# Entrada del índice: los campos de RunResult en su orden
+INDEX_ENTRY = struct.Struct('<qQddqdqdd?7x')
+
+# Orden de bytes de los bloques (el nativo, para leerlos sin convertir)
+BYTE_ORDER = b'<' if sys.byteorder == 'little' else b'>'
+
+
+def index_path(path: str) -> str:
+    """Returns: Ruta del índice de un archivo"""
+    return path + '.idx'
+
+
+def block_size(total_iterations: int, num_agents: int) -> int:
+    """
+    Bytes del bloque de una simulación: precios (total_iterations + 1,
+    float64), volúmenes (total_iterations, int64), balances finales
+    (num_agents, float64) y tarjetas finales (num_agents, int64)
+    """
+    return 8 * (2 * total_iterations + 1 + 2 * num_agents)
+
+
+def pack_run(sim: Simulation) -> bytes:
+    """
+    Empaqueta el bloque de una simulación ya ejecutada (ver block_size).
+    Los agentes siguen el orden de agent_records().
+    """
+    balances = array('d')
+    cards = array('q')
+    for _, _, balance, agent_cards in sim.agent_records():
+        balances.append(balance)
+        cards.append(agent_cards)
+    return b''.join((
+        sim.market.price_history.tobytes(),
+        sim.market.volume_history.tobytes(),
+        balances.tobytes(),
+        cards.tobytes()
+    ))
+
+
+def _read_header(f: IO) -> Tuple[int, int]:
+    """
+    Returns: (total_iterations, num_agents) de la cabecera
+
+    Raises:
+        ValueError: Si el fichero no es un archivo de simulaciones compatible
+    """
+    data = f.read(HEADER_SIZE)
+    if len(data) < HEADER_SIZE:
+        raise ValueError("Cabecera de archivo incompleta")
+    magic, version, byte_order, total_iterations, num_agents = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("El fichero no es un archivo de simulaciones")
+    if version != VERSION:
+        raise ValueError(f"Versión de archivo no soportada: {version}")
+    if byte_order != BYTE_ORDER:
+        raise ValueError("El archivo se escribió con otro orden de bytes")
+    return total_iterations, num_agents
+
+
+class ArchiveWriter:
+    """
+    Añade simulaciones al final de un archivo. Cada simulación ocupa un
+    bloque de tamaño fijo en el fichero de datos (tras la cabecera) y una
+    entrada INDEX_ENTRY con su RunResult en el índice (path + '.idx'); la
+    simulación i está en el byte HEADER_SIZE + i * block_size de los datos
+    y en el byte i * INDEX_ENTRY.size del índice.
+
+    Si el archivo existe, su cabecera debe coincidir con los tamaños
+    indicados. Una simulación final incompleta (escritura interrumpida) se
+    descarta al abrir, así que el archivo siempre queda consistente.
+
+    Se usa como context manager: al salir se vuelcan y cierran los ficheros.
+    """
+
+    def __init__(self, path: str, total_iterations: int, num_agents: int):
+        """
+        Raises:
+            ValueError: Si algún tamaño no es positivo o el archivo
+                existente tiene otro formato
+        """
+        if min(total_iterations, num_agents) <= 0:
+            raise ValueError("Los tamaños del archivo deben ser positivos")
+
+        self.path = path
+        self.total_iterations = total_iterations
+        self.num_agents = num_agents
+        self.block_size = block_size(total_iterations, num_agents)
+
+        index = index_path(path)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as f:
+                if _read_header(f) != (total_iterations, num_agents):
+                    raise ValueError("El archivo existente tiene otro número de iteraciones o agentes")
+            index_size = os.path.getsize(index) if os.path.exists(index) else 0
+            self.count = min(
+                (os.path.getsize(path) - HEADER_SIZE) // self.block_size,
+                index_size // INDEX_ENTRY.size
+            )
+            os.truncate(path, HEADER_SIZE + self.count * self.block_size)
+            with open(index, 'ab') as f:
+                f.truncate(self.count * INDEX_ENTRY.size)
+        else:
+            header = bytearray(HEADER_SIZE)
+            HEADER.pack_into(header, 0, MAGIC, VERSION, BYTE_ORDER, total_iterations, num_agents)
+            with open(path, 'wb') as f:
+                f.write(header)
+            open(index, 'wb').close()
+            self.count = 0
+
+        self._data = open(path, 'ab')
+        self._index = open(index, 'ab')
+
+    def append(self, result: RunResult, sim: Simulation):
+        """Añade una simulación ya ejecutada y su resumen"""
+        self.append_packed(result, pack_run(sim))
+
+    def append_packed(self, result: RunResult, block: bytes):
+        """
+        Añade un bloque empaquetado con pack_run (ej: devuelto por un proceso
+        del pool) y su resumen.
+
+        Raises:
+            ValueError: Si el bloque no tiene el tamaño del archivo
+        """
+        if len(block) != self.block_size:
+            raise ValueError("La simulación no coincide con los tamaños del archivo")
+        # Los datos van antes que el índice: una entrada del índice nunca
+        # apunta a un bloque sin escribir
+        self._data.write(block)
+        self._index.write(INDEX_ENTRY.pack(
+            result.run_id, result.seed, result.smart_balance, result.total_value,
+            result.rank, result.return_pct, result.transactions, result.final_price,
+            result.price_change_pct, result.zero_cards
+        ))
+        self.count += 1
+
+    def flush(self):
+        """Vuelca ambos ficheros (los datos primero)"""
+        self._data.flush()
+        self._index.flush()
+
+    def close(self):
+        if not self._data.closed:
+            self.flush()
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class RunArchive(PricePathAggregates):
+    """
+    Lectura de un archivo de simulaciones proyectado en memoria (mmap).
+
+    Los resúmenes se leen del índice y los historiales se exponen como
+    vistas memoryview sobre el fichero de datos, de modo que analizar
+    cientos de miles de simulaciones no requiere interpretar texto ni
+    cargar el archivo en memoria: el sistema operativo lee solo las
+    páginas que se consultan.
+
+    Contiene las simulaciones completas en el momento de abrirlo. Las
+    vistas devueltas deben liberarse antes de close() (o del final del
+    bloque with).
+    """
+
+    def __init__(self, path: str):
+        """
+        Raises:
+            ValueError: Si el fichero no es un archivo de simulaciones compatible
+        """
+        with open(path, 'rb') as f:
+            self.total_iterations, self.num_agents = _read_header(f)
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        index = index_path(path)
+        index_size = os.path.getsize(index) if os.path.exists(index) else 0
+        self._index: Optional[mmap.mmap] = None
+        if index_size:
+            with open(index, 'rb') as f:
+                self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.path = path
+        self.path_length = self.total_iterations + 1
+        self.block_size = block_size(self.total_iterations, self.num_agents)
+        self.num_runs = min(
+            (len(self._data) - HEADER_SIZE) // self.block_size,
+            index_size // INDEX_ENTRY.size
+        )
+        self._stride = self.block_size // 8
+
+        blocks = memoryview(self._data)[HEADER_SIZE:HEADER_SIZE + self.num_runs * self.block_size]
+        self._views = [blocks, blocks.cast('d'), blocks.cast('q')]
+        self._floats, self._ints = self._views[1], self._views[2]
+        self._positions: Optional[Tuple[Dict[int, List[int]], Dict[int, List[int]]]] = None
+
+    def __len__(self) -> int:
+        return self.num_runs
+
+    def result(self, position: int) -> RunResult:
+        """Returns: Resumen de la simulación en una posición del archivo"""
+        if not 0 <= position < self.num_runs:
+            raise IndexError("Posición fuera del archivo")
+        return RunResult(*INDEX_ENTRY.unpack_from(self._index, position * INDEX_ENTRY.size))
+
+    def results(self) -> Iterator[RunResult]:
+        """Resúmenes de todas las simulaciones, en orden de anexado"""
+        if self._index is None:
+            return
+        with memoryview(self._index) as view:
+            for values in INDEX_ENTRY.iter_unpack(view[:self.num_runs * INDEX_ENTRY.size]):
+                yield RunResult(*values)
+
+    def find(self, run_id: Optional[int] = None, seed: Optional[int] = None) -> List[int]:
+        """
+        Posiciones de las simulaciones con ese run_id y/o semilla (un lote
+        anexado dos veces repite run_id; la semilla identifica la ejecución).
+        Los diccionarios de búsqueda se construyen en la primera llamada.
+        """
+        if self._positions is None:
+            by_run: Dict[int, List[int]] = {}
+            by_seed: Dict[int, List[int]] = {}
+            for position, result in enumerate(self.results()):
+                by_run.setdefault(result.run_id, []).append(position)
+                by_seed.setdefault(result.seed, []).append(position)
+            self._positions = (by_run, by_seed)
+
+        by_run, by_seed = self._positions
+        matches = None
+        for key, table in ((run_id, by_run), (seed, by_seed)):
+            if key is not None:
+                found = table.get(key, [])
+                matches = found if matches is None else [p for p in matches if p in found]
+        return list(matches or [])
+
+    def _offset(self, position: int) -> int:
+        if not 0 <= position < self.num_runs:
+            raise IndexError("Posición fuera del archivo")
+        return position * self._stride
+
+    def price_path(self, position: int) -> memoryview:
+        """Returns: Vista del historial de precios (incluye el inicial)"""
+        start = self._offset(position)
+        return self._floats[start:start + self.path_length]
+
+    def volumes(self, position: int) -> memoryview:
+        """Returns: Vista de las transacciones por iteración"""
+        start = self._offset(position) + self.path_length
+        return self._ints[start:start + self.total_iterations]
+
+    def balances(self, position: int) -> memoryview:
+        """Returns: Vista de los balances finales, en el orden de agent_records()"""
+        start = self._offset(position) + self.path_length + self.total_iterations
+        return self._floats[start:start + self.num_agents]
+
+    def cards(self, position: int) -> memoryview:
+        """Returns: Vista de las tarjetas finales, en el orden de agent_records()"""
+        start = self._offset(position) + self.path_length + self.total_iterations + self.num_agents
+        return self._ints[start:start + self.num_agents]
+
+    def prices_at(self, iteration: int) -> memoryview:
+        """Returns: Vista del precio de todas las simulaciones en una iteración"""
+        return self._floats[iteration::self._stride]
+
+    def close(self):
+        """Libera las vistas y las proyecciones de los ficheros"""
+        for view in reversed(self._views):
+            view.release()
+        self._data.close()
+        if self._index is not None:
+            self._index.close()
+
+    def __enter__(self) -> 'RunArchive':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_single_archived(
+    run_id: int,
+    seed: int,
+    total_iterations: int,
+    vectorized: bool,
+    smart_params: Optional[SmartAgentParams] = None
+) -> Tuple[RunResult, bytes]:
+    """
+    Como run_single (sin caché), pero devuelve también el bloque
+    empaquetado de la simulación para anexarlo al archivo
+    """
+    simulation_class = VectorizedSimulation if vectorized else Simulation
+    sim = simulation_class(
+        total_iterations=total_iterations, seed=seed,
+        record_transactions=False, smart_params=smart_params
+    )
+    sim.run(verbose=False)
+    return RunResult.from_simulation(run_id, seed, sim), pack_run(sim)
+
+
+def archive_runs(runner: MonteCarloRunner, path: str) -> List[RunResult]:
+    """
+    Ejecuta el lote de un MonteCarloRunner y anexa cada simulación al
+    archivo `path` en orden de run_id (se crea si no existe). Solo hay en
+    vuelo la ventana de tareas del pool, así que la memoria no crece con
+    el número de simulaciones. No usa la caché de resultados.
+
+    Returns: Resultados ordenados por run_id
+    """
+    num_agents = Config.NUM_RANDOM + Config.NUM_TREND + Config.NUM_ANTI_TREND + Config.NUM_SMART
+    tasks = [
+        (run_id, seed, runner.total_iterations, runner.vectorized, runner.smart_params)
+        for run_id, seed in enumerate(runner.seeds(), 1)
+    ]
+    results = []
+    with ArchiveWriter(path, runner.total_iterations, num_agents) as writer:
+        for result, block in stream_pool(run_single_archived, tasks, runner.workers):
+            writer.append_packed(result, block)
+            results.append(result)
+    return results
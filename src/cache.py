@@ -0,0 +1,223 @@
+"""
+Caché en disco de resultados de simulaciones
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from array import array
+from functools import lru_cache
+from typing import Any, NamedTuple, Optional
+
+from .config import Config
+
+
+# Entre dos recuentos del directorio, cada proceso escribe como máximo
+# esta fracción del margen que quedaba hasta max_bytes
+RESCAN_SHARE = 64
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """
+    Returns: Hash del código fuente del paquete src (cambia con cualquier
+             modificación, así que los resultados antiguos dejan de usarse)
+    """
+    root = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.endswith('.py'):
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, root).encode())
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()
+
+
+def config_values() -> dict:
+    """
+    Returns: Valores actuales de todos los parámetros de Config
+    """
+    return {name: getattr(Config, name) for name in dir(Config) if name.isupper()}
+
+
+def cache_key(**parts: Any) -> str:
+    """
+    Clave estable de una simulación: hash de los valores actuales de
+    Config, la versión del código y los parámetros indicados (semilla,
+    motor, población, parámetros del SmartAgent...).
+
+    parts: Valores serializables en JSON que identifican la ejecución
+    """
+    document = {'config': config_values(), 'code': code_version(), 'parts': parts}
+    encoded = json.dumps(document, sort_keys=True, default=repr).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class CacheEntry(NamedTuple):
+    """
+    Contenido de una entrada de la caché
+
+    result: Resumen de la simulación (ej: RunResult)
+    prices: Historial de precios, si se guardó
+    """
+    result: Any
+    prices: Optional[array]
+
+
+class ResultCache:
+    """
+    Caché en disco de resúmenes de simulaciones (y opcionalmente de su
+    historial de precios), un fichero por clave.
+
+    Las escrituras son atómicas (fichero temporal + os.replace) y cada
+    entrada es inmutable para su clave, así que varios procesos de un pool
+    pueden compartir el mismo directorio: en el peor caso dos procesos
+    escriben el mismo resultado.
+
+    Cuando el tamaño total supera max_bytes se eliminan las entradas usadas
+    hace más tiempo (LRU por fecha de modificación, que se actualiza en
+    cada acierto) hasta bajar al 90% del límite.
+
+    Cada proceso solo ve sus propias escrituras, así que vuelve a medir el
+    directorio en cuanto ha escrito 1/RESCAN_SHARE del margen que quedaba
+    en la última medición. Con hasta RESCAN_SHARE procesos compartiendo el
+    directorio, el tamaño no supera max_bytes más una entrada por proceso.
+    """
+
+    SUFFIX = '.pkl'
+
+    def __init__(self, directory: str, max_bytes: int = 1 << 30, store_prices: bool = False):
+        """
+        directory: Directorio de la caché (se crea si no existe)
+        max_bytes: Tamaño máximo aproximado de la caché
+        store_prices: Si True, put() guarda también el historial de precios
+
+        Raises:
+            ValueError: Si max_bytes no es positivo
+        """
+        if max_bytes <= 0:
+            raise ValueError("El tamaño máximo de la caché debe ser positivo")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.store_prices = store_prices
+        self.hits = 0
+        self.misses = 0
+        # Tamaño medido más las escrituras propias desde entonces, y bytes
+        # que se pueden escribir antes de volver a medir el directorio
+        self._size: Optional[int] = None
+        self._budget = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Returns: Entrada guardada para la clave, o None si no existe
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = CacheEntry(*pickle.load(f))
+            os.utime(path)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            # Inexistente, o eliminada por otro proceso mientras se leía
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, result: Any, prices: Optional[memoryview] = None):
+        """
+        Guarda el resultado de una clave (los precios solo si store_prices)
+        """
+        stored_prices = array('d', prices) if self.store_prices and prices is not None else None
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump((result, stored_prices), f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+        if self._size is None or size > self._budget:
+            # Medición real: incluye lo escrito por otros procesos
+            self._measured(self.size())
+        else:
+            self._size += size
+            self._budget -= size
+        if self._size > self.max_bytes:
+            self._evict()
+
+    def _measured(self, size: int):
+        """Registra un tamaño medido y renueva el margen hasta la próxima medición"""
+        self._size = size
+        self._budget = max(self.max_bytes - size, 0) // RESCAN_SHARE
+
+    def _entries(self):
+        """Lista de (fecha de uso, tamaño, ruta) de las entradas"""
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(self.SUFFIX):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def size(self) -> int:
+        """Returns: Tamaño total de las entradas en bytes"""
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def _evict(self):
+        """Elimina las entradas menos usadas hasta bajar al 90% de max_bytes"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Ya eliminada por otro proceso
+            total -= size
+        self._measured(total)
+
+    def clear(self):
+        """Elimina todas las entradas"""
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._measured(0)
+
+
+@lru_cache(maxsize=None)
+def open_cache(directory: str, store_prices: bool = False) -> ResultCache:
+    """
+    Returns: ResultCache compartida dentro del proceso para un directorio
+             (los procesos de un pool la reutilizan entre tareas)
+    """
+    return ResultCache(directory, store_prices=store_prices)
@@ -0,0 +1,200 @@
+"""
+Checkpoints de simulaciones en curso
+"""
+
+import os
+import pickle
+from array import array
+from dataclasses import dataclass, field
+from typing import IO, TYPE_CHECKING, Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+if TYPE_CHECKING:
+    from .simulation import Simulation
+
+
+# Cabecera de los ficheros de checkpoint y versión de su formato
+MAGIC = b'GPUSIMCK'
+FORMAT_VERSION = 2
+
+
+@dataclass
+class SegmentLog:
+    """
+    Índice del fichero de tramos que acompaña a un checkpoint.
+
+    filename: Nombre del fichero de tramos (en el directorio del checkpoint)
+    size: Bytes válidos del fichero (lo que haya detrás es de un guardado
+        interrumpido y se descarta)
+    typecodes: {buffer: typecode del array}
+    counts: {buffer: elementos guardados}
+    segments: [(buffer, posición, bytes)] en orden de escritura
+    """
+    filename: str
+    size: int = 0
+    typecodes: Dict[str, str] = field(default_factory=dict)
+    counts: Dict[str, int] = field(default_factory=dict)
+    segments: List[Tuple[str, int, int]] = field(default_factory=list)
+
+
+# Último SegmentLog guardado de cada simulación, para continuar sus tramos
+_logs: 'WeakKeyDictionary[Simulation, Tuple[str, SegmentLog]]' = WeakKeyDictionary()
+
+
+def _growing_buffers(simulation: 'Simulation') -> Dict[str, Tuple[array, int]]:
+    """Buffers de solo anexado del mercado y del registro de transacciones"""
+    buffers = {}
+    for prefix, owner in (('market', simulation.market), ('ledger', simulation.ledger)):
+        for name, entry in owner.growing_buffers().items():
+            buffers[f"{prefix}.{name}"] = entry
+    return buffers
+
+
+class _SnapshotPickler(pickle.Pickler):
+    """Sustituye los buffers de solo anexado por referencias a sus tramos"""
+
+    def __init__(self, file: IO, buffers: Dict[str, Tuple[array, int]]):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._references = {
+            id(buffer): (name, len(buffer)) for name, (buffer, _) in buffers.items()
+        }
+
+    def persistent_id(self, obj):
+        if type(obj) is array:
+            return self._references.get(id(obj))
+        return None
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """Reconstruye los buffers referenciados a partir de sus tramos"""
+
+    def __init__(self, file: IO, buffers: Dict[str, array]):
+        super().__init__(file)
+        self._buffers = buffers
+
+    def persistent_load(self, reference):
+        name, capacity = reference
+        buffer = self._buffers[name]
+        # La capacidad libre se rellena con ceros, como al crear el buffer
+        return buffer + array(buffer.typecode, [0]) * (capacity - len(buffer))
+
+
+def _read_header(f: IO, path: str) -> SegmentLog:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError(f"{path} no es un checkpoint de simulación")
+    version = int.from_bytes(f.read(2), 'little')
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Versión de checkpoint no soportada: {version}")
+    return pickle.load(f)
+
+
+def _previous_log(path: str) -> Optional[SegmentLog]:
+    """SegmentLog del checkpoint existente en `path`, si lo hay y es válido"""
+    try:
+        with open(path, 'rb') as f:
+            return _read_header(f, path)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        return None
+
+
+def _continued_log(simulation: 'Simulation', path: str, buffers: Dict[str, Tuple[array, int]]) -> Optional[SegmentLog]:
+    """
+    Último SegmentLog de esta simulación en `path`, si sus tramos siguen en
+    disco y los buffers solo han crecido desde entonces
+    """
+    saved = _logs.get(simulation)
+    if saved is None or saved[0] != os.path.abspath(path):
+        return None
+    log = saved[1]
+    segments_path = os.path.join(os.path.dirname(path), log.filename)
+    if not os.path.exists(segments_path) or os.path.getsize(segments_path) < log.size:
+        return None
+    if any(buffers.get(name, (None, -1))[1] < count for name, count in log.counts.items()):
+        return None
+    return log
+
+
+def save_checkpoint(simulation: 'Simulation', path: str):
+    """
+    Guarda el estado completo de una simulación: mercado (precio, stock,
+    historiales y estadísticas), agentes o población columnar (incluido el
+    estado interno de los SmartAgent), registro de transacciones, estado
+    de los generadores aleatorios y el contador de iteraciones.
+
+    Los historiales del mercado y las columnas del registro solo crecen,
+    así que se guardan por tramos en un fichero aparte (path + '.<id>.seg')
+    y cada checkpoint añade únicamente lo nuevo desde el anterior de la
+    misma simulación. El fichero `path` solo contiene el estado pequeño y
+    mutable (pickle, que conserva las referencias compartidas entre
+    generadores, agentes y registro) y el índice de tramos, de modo que
+    guardar cada K iteraciones cuesta O(K + agentes) y no O(iteraciones).
+
+    La escritura es atómica: los tramos se añaden tras los bytes válidos
+    del checkpoint anterior y después un fichero temporal reemplaza a
+    `path`, por lo que un fallo a mitad nunca deja un checkpoint corrupto.
+    Un checkpoint son ambos ficheros.
+    """
+    buffers = _growing_buffers(simulation)
+    directory = os.path.dirname(path)
+    previous = _continued_log(simulation, path, buffers)
+    if previous is None:
+        replaced = _previous_log(path)
+        log = SegmentLog(f"{os.path.basename(path)}.{os.urandom(4).hex()}.seg")
+        mode = 'wb'
+    else:
+        replaced = None
+        log = SegmentLog(
+            previous.filename, previous.size, dict(previous.typecodes),
+            dict(previous.counts), list(previous.segments)
+        )
+        mode = 'r+b'
+
+    with open(os.path.join(directory, log.filename), mode) as f:
+        f.truncate(log.size)
+        f.seek(log.size)
+        for name, (buffer, used) in buffers.items():
+            start = log.counts.get(name, 0)
+            if used > start:
+                with memoryview(buffer)[start:used] as data:
+                    f.write(data)
+                    log.segments.append((name, log.size, data.nbytes))
+                    log.size += data.nbytes
+            log.counts[name] = used
+            log.typecodes[name] = buffer.typecode
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(FORMAT_VERSION.to_bytes(2, 'little'))
+        pickle.dump(log, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _SnapshotPickler(f, buffers).dump(simulation)
+    os.replace(temp_path, path)
+    _logs[simulation] = (os.path.abspath(path), log)
+
+    # Tramos del checkpoint reemplazado, que ya nadie referencia
+    if replaced is not None and replaced.filename != log.filename:
+        try:
+            os.remove(os.path.join(directory, replaced.filename))
+        except OSError:
+            pass
+
+
+def load_checkpoint(path: str) -> 'Simulation':
+    """
+    Returns: Simulación restaurada, lista para continuar con run()
+
+    Raises:
+        ValueError: Si el fichero no es un checkpoint de este formato
+    """
+    with open(path, 'rb') as f:
+        log = _read_header(f, path)
+        buffers = {name: array(typecode) for name, typecode in log.typecodes.items()}
+        with open(os.path.join(os.path.dirname(path), log.filename), 'rb') as segments:
+            for name, offset, size in log.segments:
+                segments.seek(offset)
+                buffers[name].frombytes(segments.read(size))
+        simulation = _SnapshotUnpickler(f, buffers).load()
+
+    # Los siguientes checkpoints en la misma ruta continúan estos tramos
+    _logs[simulation] = (os.path.abspath(path), log)
+    return simulation
@@ -0,0 +1,206 @@
+"""
+Comparación de estrategias del SmartAgent con números aleatorios comunes
+"""
+
+import math
+import os
+import random
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from .agents import SmartAgentParams
+from .config import Config
+from .indicators import Z_95, RunningStatistics
+from .pool import run_pool
+from .sweep import run_replicate
+
+
+@dataclass
+class VariantSummary:
+    """
+    Resultado de una variante sobre las semillas de la comparación.
+
+    name: Nombre de la variante
+    runs: Semillas evaluadas (cada una con su ejecución antitética si procede)
+    mean_return_pct / return_ci95: Retorno medio del SmartAgent y semiancho
+        de su intervalo de confianza del 95%
+    mean_rank: Ranking medio del SmartAgent
+    """
+    name: str
+    runs: int
+    mean_return_pct: float
+    return_ci95: float
+    mean_rank: float
+
+
+@dataclass
+class PairedDifference:
+    """
+    Diferencia de retorno de una variante frente a la de referencia,
+    emparejada por semilla.
+
+    variant / baseline: Nombres de las variantes comparadas
+    mean_diff_pct / diff_ci95: Diferencia media (puntos porcentuales) y
+        semiancho de su intervalo de confianza del 95%
+    win_rate: Fracción de semillas en que la variante supera a la referencia
+    variance_reduction: Varianza de la diferencia entre ejecuciones
+        independientes dividida por la de la diferencia emparejada; es el
+        factor en que se reduce el número de ejecuciones necesario para la
+        misma precisión
+    """
+    variant: str
+    baseline: str
+    mean_diff_pct: float
+    diff_ci95: float
+    win_rate: float
+    variance_reduction: float
+
+    @property
+    def significant(self) -> bool:
+        """True si el intervalo de confianza no contiene el 0"""
+        return abs(self.mean_diff_pct) > self.diff_ci95
+
+
+@dataclass
+class ComparisonResult:
+    """
+    variants: Un VariantSummary por variante, en el orden de entrada
+    differences: Un PairedDifference por variante distinta de la referencia
+    """
+    variants: List[VariantSummary]
+    differences: List[PairedDifference]
+
+
+def _half_width(stats: RunningStatistics) -> float:
+    return Z_95 * stats.std() / math.sqrt(stats.count) if stats.count else 0.0
+
+
+class StrategyComparison:
+    """
+    Compara variantes de la estrategia del SmartAgent ejecutando todas con
+    las mismas semillas. Como los agentes con reglas fijas y el barajado
+    consumen siempre los mismos números aleatorios (ver RandomStreams), las
+    variantes se enfrentan a las mismas decisiones de fondo y la diferencia
+    de retorno emparejada por semilla tiene mucha menos varianza que la de
+    ejecuciones independientes.
+
+    Con antithetic=True cada semilla se ejecuta también con sus generadores
+    antitéticos (AntitheticRandom) y el retorno de la semilla es la media
+    de ambas ejecuciones.
+    """
+
+    def __init__(
+        self,
+        variants: Dict[str, SmartAgentParams],
+        runs: int,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        antithetic: bool = False,
+        vectorized: bool = False,
+        baseline: Optional[str] = None,
+        total_iterations: Optional[int] = None
+    ):
+        """
+        Args:
+            variants: {nombre: parámetros} de las estrategias a comparar
+            runs: Semillas por variante
+            workers: Procesos del pool (por defecto, número de CPUs).
+                Con 1 se ejecuta en el proceso actual.
+            seed: Semilla base (aleatoria si es None)
+            antithetic: Si True, añade la ejecución antitética de cada semilla
+            vectorized: Si True, usa VectorizedSimulation
+            baseline: Variante de referencia (por defecto, la primera)
+            total_iterations: Iteraciones por simulación (por defecto
+                Config.TOTAL_ITERATIONS al crear la comparación); viaja
+                en cada tarea, así que no depende de la Config de los procesos
+
+        Raises:
+            ValueError: Si hay menos de dos variantes, la referencia no
+                existe o runs/workers/total_iterations no son positivos
+        """
+        if len(variants) < 2:
+            raise ValueError("Se necesitan al menos dos variantes")
+        if baseline is not None and baseline not in variants:
+            raise ValueError(f"Variante de referencia desconocida: {baseline}")
+        if runs <= 0:
+            raise ValueError("El número de ejecuciones debe ser positivo")
+        if workers is not None and workers <= 0:
+            raise ValueError("El número de procesos debe ser positivo")
+        if total_iterations is not None and total_iterations <= 0:
+            raise ValueError("El número de iteraciones debe ser positivo")
+
+        self.variants = variants
+        self.runs = runs
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.antithetic = antithetic
+        self.vectorized = vectorized
+        self.total_iterations = (
+            total_iterations if total_iterations is not None else Config.TOTAL_ITERATIONS
+        )
+        self.baseline = baseline if baseline is not None else next(iter(variants))
+
+    def seeds(self) -> List[int]:
+        """
+        Returns: Semillas comunes a todas las variantes
+        """
+        seeder = random.Random(self.seed)
+        return [seeder.getrandbits(64) for _ in range(self.runs)]
+
+    def run(self) -> ComparisonResult:
+        """
+        Ejecuta todas las variantes sobre las mismas semillas.
+        """
+        signs = (False, True) if self.antithetic else (False,)
+        tasks = [
+            ({**asdict(params), 'TOTAL_ITERATIONS': self.total_iterations},
+             replicate, seed, self.vectorized, None, antithetic)
+            for params in self.variants.values()
+            for replicate, seed in enumerate(self.seeds())
+            for antithetic in signs
+        ]
+        results = run_pool(run_replicate, tasks, self.workers)
+
+        # returns[variante][semilla]: retorno (media con la antitética)
+        returns: Dict[str, List[float]] = {}
+        variants = []
+        for name in self.variants:
+            stats = RunningStatistics()
+            ranks = RunningStatistics()
+            values = []
+            for _ in range(self.runs):
+                pair = [next(results) for _ in signs]
+                value = math.fsum(r.return_pct for r in pair) / len(pair)
+                values.append(value)
+                stats.push(value)
+                for r in pair:
+                    ranks.push(r.rank)
+            returns[name] = values
+            variants.append(VariantSummary(
+                name, self.runs, stats.mean(), _half_width(stats), ranks.mean()
+            ))
+
+        base = returns[self.baseline]
+        differences = []
+        for summary in variants:
+            if summary.name == self.baseline:
+                continue
+            values = returns[summary.name]
+            paired = RunningStatistics()
+            own = RunningStatistics()
+            reference = RunningStatistics()
+            for a, b in zip(values, base):
+                paired.push(a - b)
+                own.push(a)
+                reference.push(b)
+            independent = own.variance() + reference.variance()
+            differences.append(PairedDifference(
+                variant=summary.name,
+                baseline=self.baseline,
+                mean_diff_pct=paired.mean(),
+                diff_ci95=_half_width(paired),
+                win_rate=sum(1 for a, b in zip(values, base) if a > b) / self.runs,
+                variance_reduction=(independent / paired.variance()
+                                    if paired.variance() > 0 else math.inf)
+            ))
+        return ComparisonResult(variants, differences)
@@ -1,6 +1,10 @@
 """
 Configuración global del sistema de simulación
 """
+from contextlib import contextmanager
+from typing import Iterator
+
+
 class Config:
     """Configuración centralizada de la simulación"""
     
@@ -16,7 +20,7 @@ class Config:
     # Configuración de simulación
     TOTAL_ITERATIONS: int = 1000
     
-    # Distribución de agentes
+    # Distribución de agentes (el total es configurable; por defecto 100)
     NUM_RANDOM: int = 51
     NUM_TREND: int = 24
     NUM_ANTI_TREND: int = 24
@@ -26,8 +30,8 @@ class Config:
     def validate(cls):
         """Valida que la configuración sea correcta"""
         total = cls.NUM_RANDOM + cls.NUM_TREND + cls.NUM_ANTI_TREND + cls.NUM_SMART
-        if total != 100:
-            raise ValueError(f"El total de agentes debe ser 100, actual: {total}")
+        if total <= 0:
+            raise ValueError(f"El total de agentes debe ser positivo, actual: {total}")
         
         if cls.TOTAL_ITERATIONS <= 0:
             raise ValueError("El número de iteraciones debe ser positivo")
@@ -39,3 +43,29 @@ class Config:
             cls.NUM_SMART < 0
         ]):
             raise ValueError("El número de agentes no puede ser negativo")
+    
+    @classmethod
+    @contextmanager
+    def override(cls, **values) -> Iterator[None]:
+        """
+        Cambia temporalmente valores de la configuración y los restaura al salir.
+        
+        Los valores se leen al crear cada Simulation o al aplicar cada
+        operación en el mercado, así que deben fijarse antes de crear la
+        simulación. El cambio es global al proceso.
+        
+        Raises:
+            ValueError: Si algún nombre no es un parámetro de Config
+        """
+        unknown = [name for name in values if not name.isupper() or not hasattr(cls, name)]
+        if unknown:
+            raise ValueError(f"Parámetros de Config desconocidos: {', '.join(unknown)}")
+        
+        previous = {name: getattr(cls, name) for name in values}
+        for name, value in values.items():
+            setattr(cls, name, value)
+        try:
+            yield
+        finally:
+            for name, value in previous.items():
+                setattr(cls, name, value)
@@ -0,0 +1,192 @@
+"""
+Motores de formación de precios del mercado
+"""
+
+from abc import ABC, abstractmethod
+from heapq import heappop, heappush
+from typing import Any, List, NamedTuple, Optional
+
+from .ledger import BUY, SELL
+from .market import Market
+
+
+class Fill(NamedTuple):
+    """
+    Ejecución de una orden diferida (ver MarketEngine.clear)
+
+    owner: Emisor de la orden (el objeto pasado a submit)
+    side: BUY o SELL
+    price: Precio de ejecución
+    """
+    owner: Any
+    side: int
+    price: float
+
+
+class MarketEngine(ABC):
+    """
+    Define cómo las órdenes de los agentes se convierten en operaciones
+    y cómo se forma el precio del Market.
+
+    En cada turno la simulación llama a submit() con la orden del agente.
+    Un motor puede ejecutarla en el acto (devuelve el precio) o guardarla
+    para la subasta de fin de iteración, que resuelve clear().
+    """
+
+    def __init__(self):
+        self.market: Optional[Market] = None
+
+    def bind(self, market: Market):
+        """Asocia el motor al mercado cuyo precio y stock gestiona"""
+        self.market = market
+
+    @abstractmethod
+    def submit(self, side: int, owner: Any, budget: float = float('inf')) -> Optional[float]:
+        """
+        Recibe una orden de una unidad.
+
+        side: BUY o SELL
+        owner: Emisor de la orden; se devuelve en los Fill de clear()
+        budget: Precio máximo que el emisor puede pagar (compras)
+        Returns: Precio de ejecución si se ejecutó en el acto, o None si
+                 quedó pendiente o se rechazó
+        """
+
+    def clear(self, iteration: int) -> List[Fill]:
+        """
+        Resuelve las órdenes pendientes al final de la iteración.
+
+        Returns: Órdenes ejecutadas (ninguna en motores de ejecución inmediata)
+        """
+        return []
+
+
+class MultiplicativeEngine(MarketEngine):
+    """
+    Motor por defecto: cada orden se ejecuta al instante contra el stock
+    del mercado al precio actual, que sube (compra) o baja (venta) un
+    porcentaje fijo (Market.apply_buy/apply_sell).
+    """
+
+    def submit(self, side: int, owner: Any, budget: float = float('inf')) -> Optional[float]:
+        market = self.market
+        price = market.price
+        if side == BUY:
+            if market.stock <= 0:
+                return None
+            market.apply_buy()
+        else:
+            market.apply_sell()
+        return price
+
+
+class OrderBookEngine(MarketEngine):
+    """
+    Libro de órdenes límite con subasta de precio único por iteración.
+
+    Las órdenes de los agentes se guardan en dos montículos (compras por
+    precio descendente y ventas por precio ascendente, con el orden de
+    llegada como desempate). El límite de cada orden es el precio actual
+    desplazado `aggression` a favor de la contraparte, sin superar el
+    presupuesto del agente.
+
+    Al cerrar la iteración, el mercado actúa como creador de mercado con su
+    stock: publica `dealer_levels` niveles de `dealer_size` unidades a cada
+    lado, separados `dealer_step` del precio actual. Se casan las mejores
+    órdenes mientras la mejor compra cubra la mejor venta (prioridad
+    precio-tiempo) y todas se ejecutan al precio de cierre: el punto medio
+    del último par casado, que pasa a ser el precio del mercado. Las
+    órdenes no ejecutadas se cancelan.
+    """
+
+    # Emisor de las órdenes del creador de mercado
+    DEALER = None
+
+    def __init__(
+        self,
+        aggression: float = 0.01,
+        dealer_levels: int = 5,
+        dealer_size: int = 10,
+        dealer_step: float = 0.005
+    ):
+        """
+        aggression: Desplazamiento relativo del límite respecto al precio actual
+        dealer_levels: Niveles de precio del creador de mercado por lado
+        dealer_size: Unidades por nivel del creador de mercado
+        dealer_step: Separación relativa entre niveles
+
+        Raises:
+            ValueError: Si algún parámetro es negativo o dealer_step no es positivo
+        """
+        if min(aggression, dealer_levels, dealer_size) < 0 or dealer_step <= 0:
+            raise ValueError("Parámetros del libro de órdenes inválidos")
+
+        super().__init__()
+        self.aggression = aggression
+        self.dealer_levels = dealer_levels
+        self.dealer_size = dealer_size
+        self.dealer_step = dealer_step
+        # Montículos de (clave de precio, secuencia, emisor)
+        self._bids: List[tuple] = []
+        self._asks: List[tuple] = []
+        self._sequence = 0
+
+    def __len__(self) -> int:
+        """Órdenes pendientes en el libro"""
+        return len(self._bids) + len(self._asks)
+
+    def submit(self, side: int, owner: Any, budget: float = float('inf')) -> Optional[float]:
+        price = self.market.price
+        self._sequence += 1
+        if side == BUY:
+            limit = min(price * (1 + self.aggression), budget)
+            heappush(self._bids, (-limit, self._sequence, owner))
+        else:
+            heappush(self._asks, (price * (1 - self.aggression), self._sequence, owner))
+        return None
+
+    def _post_dealer_quotes(self):
+        """Publica las órdenes del creador de mercado alrededor del precio actual"""
+        price = self.market.price
+        bids = self._bids
+        asks = self._asks
+        ask_units = min(self.market.stock, self.dealer_levels * self.dealer_size)
+
+        for level in range(1, self.dealer_levels + 1):
+            bid_limit = price * (1 - self.dealer_step * level)
+            ask_limit = price * (1 + self.dealer_step * level)
+            for _ in range(self.dealer_size):
+                self._sequence += 1
+                heappush(bids, (-bid_limit, self._sequence, self.DEALER))
+                if ask_units > 0:
+                    heappush(asks, (ask_limit, self._sequence, self.DEALER))
+                    ask_units -= 1
+
+    def clear(self, iteration: int) -> List[Fill]:
+        self._post_dealer_quotes()
+        bids = self._bids
+        asks = self._asks
+
+        matched = []
+        while bids and asks and -bids[0][0] >= asks[0][0]:
+            matched.append((heappop(bids), heappop(asks)))
+
+        fills = []
+        if matched:
+            last_bid, last_ask = matched[-1]
+            price = (-last_bid[0] + last_ask[0]) / 2
+            stock_change = 0
+            for (_, _, buyer), (_, _, seller) in matched:
+                if buyer is self.DEALER:
+                    stock_change += 1
+                else:
+                    fills.append(Fill(buyer, BUY, price))
+                if seller is self.DEALER:
+                    stock_change -= 1
+                else:
+                    fills.append(Fill(seller, SELL, price))
+            self.market.apply_auction(price, len(matched), stock_change)
+
+        bids.clear()
+        asks.clear()
+        return fills
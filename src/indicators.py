@@ -0,0 +1,160 @@
+"""
+Indicadores de ventana móvil en O(1) sobre un buffer circular
+"""
+
+from array import array
+from collections import deque
+from typing import Deque, Tuple
+
+# Cuantil de la normal para intervalos de confianza del 95%
+Z_95 = 1.959963984540054
+
+
+class RollingWindow:
+    """
+    Ventana móvil de tamaño fijo sobre una serie de precios.
+
+    Mantiene en un buffer circular los últimos `size` valores junto con
+    su suma acumulada y dos colas monótonas para el mínimo y el máximo,
+    de modo que push(), mean(), min(), max() y momentum() son O(1)
+    (amortizado) y la memoria no crece con el número de iteraciones.
+    """
+
+    def __init__(self, size: int):
+        """
+        size: Número de valores que conserva la ventana
+
+        Raises:
+            ValueError: Si size no es positivo
+        """
+        if size <= 0:
+            raise ValueError("El tamaño de la ventana debe ser positivo")
+
+        self.size = size
+        self.count = 0  # Total de valores recibidos
+        self.sum = 0.0
+        self._buffer = array('d', [0.0]) * size
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+
+    def __len__(self) -> int:
+        """Número de valores actualmente en la ventana"""
+        return min(self.count, self.size)
+
+    @property
+    def full(self) -> bool:
+        """True si la ventana ya contiene `size` valores"""
+        return self.count >= self.size
+
+    def push(self, value: float):
+        """
+        Añade un valor, descartando el más antiguo si la ventana está llena
+        """
+        index = self.count
+        slot = index % self.size
+
+        if index >= self.size:
+            self.sum -= self._buffer[slot]
+        self._buffer[slot] = value
+        self.count += 1
+
+        # Recalcular la suma en cada vuelta completa acota el error de redondeo
+        if slot == self.size - 1:
+            self.sum = sum(self._buffer)
+        else:
+            self.sum += value
+
+        oldest = self.count - self.size
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((index, value))
+        while self._min[0][0] < oldest:
+            self._min.popleft()
+
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((index, value))
+        while self._max[0][0] < oldest:
+            self._max.popleft()
+
+    def last(self, lag: int = 0) -> float:
+        """
+        lag: Posiciones hacia atrás (0 = último valor)
+        Returns: Valor añadido `lag` pasos antes del último
+
+        Raises:
+            IndexError: Si el valor ya no está en la ventana
+        """
+        if lag < 0 or lag >= len(self):
+            raise IndexError("Posición fuera de la ventana")
+        return self._buffer[(self.count - 1 - lag) % self.size]
+
+    def mean(self) -> float:
+        """Promedio de los valores de la ventana (0 si está vacía)"""
+        n = len(self)
+        return self.sum / n if n else 0.0
+
+    def min(self) -> float:
+        """Mínimo de la ventana"""
+        if not self._min:
+            raise ValueError("La ventana está vacía")
+        return self._min[0][1]
+
+    def max(self) -> float:
+        """Máximo de la ventana"""
+        if not self._max:
+            raise ValueError("La ventana está vacía")
+        return self._max[0][1]
+
+    def momentum(self, window: int) -> float:
+        """
+        Cambio porcentual entre el valor de hace `window - 1` pasos y el último.
+
+        window: Número de valores considerados (≤ size)
+        Returns: Momentum, o 0 si aún no hay `window` valores
+        """
+        if len(self) < window:
+            return 0
+        first = self.last(window - 1)
+        return (self.last() - first) / first
+
+
+class RunningStatistics:
+    """
+    Estadísticas acumuladas de una serie sin guardar sus valores:
+    conteo, suma, mínimo, máximo y media/varianza por el método de Welford.
+    Cada push() es O(1) y las estadísticas pueden consultarse en cualquier momento.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    def push(self, value: float):
+        """Incorpora un valor a las estadísticas"""
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+
+    def mean(self) -> float:
+        """Media de los valores (0 si no hay valores)"""
+        return self.sum / self.count if self.count else 0.0
+
+    def variance(self) -> float:
+        """Varianza muestral (0 con menos de dos valores)"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self) -> float:
+        """Desviación estándar muestral"""
+        return self.variance() ** 0.5
@@ -0,0 +1,217 @@
+"""
+Registro columnar de transacciones de la simulación
+"""
+
+from array import array
+from collections.abc import Sequence
+from typing import Dict, List, Optional, Tuple, Union
+
+
+# Códigos de la columna `side`
+BUY = 0
+SELL = 1
+
+SIDE_NAMES = ('buy', 'sell')
+
+
+class TransactionLedger:
+    """
+    Registro único de transacciones para toda la simulación, almacenado
+    por columnas en arrays: agent_id, tipo de agente, lado, precio e iteración.
+
+    Sustituye a las listas de tuplas por agente: cada transacción ocupa
+    unos 26 bytes y el flujo por iteración o por tipo de agente se agrega
+    recorriendo arrays, sin visitar a los agentes. Con enabled=False no se
+    registra nada (ejecuciones donde solo importa el throughput).
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.agent_ids = array('q')
+        self.agent_types = array('b')
+        self.sides = array('b')
+        self.prices = array('d')
+        self.iterations = array('q')
+        self.type_names: List[str] = []
+        self._type_codes: Dict[str, int] = {}
+        # Flujo neto de efectivo y tarjetas por código de tipo, acumulado
+        # también con el registro desactivado (totales por tipo en O(1))
+        self.cash_flow = array('d')
+        self.card_flow = array('q')
+        # Índice compartido {agent_id: filas}, ampliado bajo demanda
+        self._rows_by_agent: Dict[int, List[int]] = {}
+        self._indexed = 0
+
+    def __len__(self) -> int:
+        return len(self.agent_ids)
+
+    def type_code(self, type_name: str) -> int:
+        """
+        Returns: Código de la columna agent_types para un tipo de agente
+        """
+        code = self._type_codes.get(type_name)
+        if code is None:
+            code = len(self.type_names)
+            self.type_names.append(type_name)
+            self._type_codes[type_name] = code
+            self.cash_flow.append(0.0)
+            self.card_flow.append(0)
+        return code
+
+    def record(self, agent_id: int, type_code: int, side: int, price: float, iteration: int):
+        """
+        Registra una transacción y acumula su flujo neto por tipo (con el
+        registro desactivado solo se acumula el flujo)
+        """
+        if side == BUY:
+            self.cash_flow[type_code] -= price
+            self.card_flow[type_code] += 1
+        else:
+            self.cash_flow[type_code] += price
+            self.card_flow[type_code] -= 1
+        if not self.enabled:
+            return
+        self.agent_ids.append(agent_id)
+        self.agent_types.append(type_code)
+        self.sides.append(side)
+        self.prices.append(price)
+        self.iterations.append(iteration)
+
+    def rows(self, agent_id: int) -> List[int]:
+        """
+        Filas de las transacciones de un agente, en orden. El índice por
+        agente es común a todas las vistas y se amplía una sola vez con las
+        filas nuevas, así que consultar N agentes cuesta O(N + filas).
+        La lista devuelta no debe modificarse.
+        """
+        total = len(self.agent_ids)
+        if self._indexed < total:
+            index = self._rows_by_agent
+            agent_ids = self.agent_ids
+            for row in range(self._indexed, total):
+                rows = index.get(agent_ids[row])
+                if rows is None:
+                    index[agent_ids[row]] = rows = []
+                rows.append(row)
+            self._indexed = total
+        return self._rows_by_agent.get(agent_id, [])
+
+    def __getstate__(self) -> dict:
+        """Estado para pickle: el índice por agente se reconstruye al consultarlo"""
+        state = self.__dict__.copy()
+        state['_rows_by_agent'] = {}
+        state['_indexed'] = 0
+        return state
+
+    def growing_buffers(self) -> Dict[str, Tuple[array, int]]:
+        """
+        Returns: Columnas del registro ({nombre: (array, filas)}), que los
+                 checkpoints guardan por tramos
+        """
+        total = len(self.agent_ids)
+        return {
+            'agent_ids': (self.agent_ids, total),
+            'agent_types': (self.agent_types, total),
+            'sides': (self.sides, total),
+            'prices': (self.prices, total),
+            'iterations': (self.iterations, total),
+        }
+
+    def net_flow(self, type_name: str) -> Tuple[float, int]:
+        """
+        Returns: (efectivo neto, tarjetas netas) de todas las operaciones
+                 de un tipo de agente; (0.0, 0) si no ha operado
+        """
+        code = self._type_codes.get(type_name)
+        if code is None:
+            return 0.0, 0
+        return self.cash_flow[code], self.card_flow[code]
+
+    def view(self, agent_id: int) -> 'AgentTransactions':
+        """
+        Returns: Vista de las transacciones de un agente
+        """
+        return AgentTransactions(self, agent_id)
+
+    def summary_by_type(self) -> Dict[str, Dict[str, float]]:
+        """
+        Agrega compras, ventas y valor negociado por tipo de agente.
+
+        Returns: {tipo: {'buys', 'sells', 'buy_value', 'sell_value'}}
+        """
+        totals = [[0, 0, 0.0, 0.0] for _ in self.type_names]
+        for code, side, price in zip(self.agent_types, self.sides, self.prices):
+            entry = totals[code]
+            entry[side] += 1
+            entry[2 + side] += price
+
+        return {
+            name: {
+                'buys': buys, 'sells': sells,
+                'buy_value': buy_value, 'sell_value': sell_value
+            }
+            for name, (buys, sells, buy_value, sell_value) in zip(self.type_names, totals)
+        }
+
+    def flow_by_iteration(
+        self,
+        num_iterations: Optional[int] = None,
+        agent_type: Optional[str] = None
+    ) -> Tuple[array, array]:
+        """
+        Compras y ventas por iteración, opcionalmente de un solo tipo de agente.
+
+        num_iterations: Longitud de los arrays (por defecto, última iteración + 1)
+        agent_type: Nombre del tipo de agente a considerar (todos si es None)
+        Returns: (compras, ventas) como array('q') indexados por iteración
+        """
+        if num_iterations is None:
+            num_iterations = max(self.iterations) + 1 if len(self) else 0
+        flows = (array('q', [0]) * num_iterations, array('q', [0]) * num_iterations)
+
+        code = None if agent_type is None else self._type_codes.get(agent_type, -1)
+        for agent_code, side, iteration in zip(self.agent_types, self.sides, self.iterations):
+            if code is None or agent_code == code:
+                flows[side][iteration] += 1
+        return flows
+
+
+class AgentTransactions(Sequence):
+    """
+    Vista de solo lectura de las transacciones de un agente dentro de un
+    TransactionLedger. Cada elemento es (lado, precio, iteración), con el
+    mismo formato que las antiguas listas de tuplas por agente.
+
+    Las filas del agente salen del índice por agente del registro
+    (TransactionLedger.rows), común a todas las vistas.
+    """
+
+    def __init__(self, ledger: TransactionLedger, agent_id: int):
+        self.ledger = ledger
+        self.agent_id = agent_id
+
+    def _refresh(self) -> List[int]:
+        """Filas actuales del agente en el registro"""
+        return self.ledger.rows(self.agent_id)
+
+    def __len__(self) -> int:
+        return len(self._refresh())
+
+    def __getitem__(self, index: Union[int, slice]):
+        rows = self._refresh()
+        if isinstance(index, slice):
+            return [self._row(row) for row in rows[index]]
+        return self._row(rows[index])
+
+    def _row(self, row: int) -> Tuple[str, float, int]:
+        ledger = self.ledger
+        return SIDE_NAMES[ledger.sides[row]], ledger.prices[row], ledger.iterations[row]
+
+    def __eq__(self, other) -> bool:
+        # Se compara como lista para seguir siendo intercambiable con las antiguas listas de tuplas
+        if isinstance(other, (AgentTransactions, list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"AgentTransactions(agent_id={self.agent_id}, transactions={len(self)})"
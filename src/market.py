@@ -1,31 +1,108 @@
 """
 Mercado de tarjetas gráficas ()gestion
 """
-from typing import List
+import math
+from array import array
+from typing import Dict, NamedTuple, Tuple
 
 from .config import Config
+from .indicators import RunningStatistics
 from .models import MarketState
 
 
+class BatchFill(NamedTuple):
+    """
+    Resultado de aplicar un lote de operaciones con Market.apply_batch
+
+    buys: Compras ejecutadas (limitadas por el stock)
+    sells: Ventas ejecutadas
+    buy_value: Suma de los precios de ejecución de las compras
+    sell_value: Suma de los precios de ejecución de las ventas
+    """
+    buys: int
+    sells: int
+    buy_value: float
+    sell_value: float
+
+
 class Market:
     """
     El mercado mantiene el stock y ajusta el precio basándose
     en las transacciones de compra/venta realizadas por los agentes
+
+    Los historiales de precio y volumen se guardan en buffers array('d') y
+    array('q') preasignados y se exponen como memoryview de solo lectura,
+    de modo que los agentes pueden compartirlos sin copiarlos.
     """
     
     def __init__(
         self,
         initial_price: float = Config.INITIAL_PRICE,
-        initial_stock: int = Config.INITIAL_STOCK
+        initial_stock: int = Config.INITIAL_STOCK,
+        capacity: int = Config.TOTAL_ITERATIONS
     ):
+        """
+        capacity: Iteraciones previstas; dimensiona los buffers de historial
+                  (crecen automáticamente si se superan)
+        """
        #inicializacion
 
         self.price = initial_price
         self.initial_price = initial_price
         self.stock = initial_stock
         self.previous_price = initial_price
-        self.price_history: List[float] = [initial_price]
-        self.volume_history: List[int] = []
+        
+        capacity = max(capacity, 1)
+        self._prices = array('d', [0.0]) * (capacity + 1)
+        self._prices[0] = initial_price
+        self._num_prices = 1
+        self._volumes = array('q', [0]) * capacity
+        self._num_volumes = 0
+        self._update_views()
+        
+        # Estado reutilizado en cada turno (ver MarketState.update)
+        self._state = MarketState(
+            initial_price, initial_price, initial_stock, 0, capacity, self._price_view
+        )
+        
+        # Estadísticas acumuladas: precios de cierre y valor negociado (VWAP)
+        self.price_stats = RunningStatistics()
+        self.price_stats.push(initial_price)
+        self.traded_value = 0.0
+        self.traded_volume = 0
+    
+    @property
+    def price_history(self) -> memoryview:
+        """Precios al cierre de cada iteración (incluye el inicial), solo lectura"""
+        return self._price_view
+    
+    @property
+    def volume_history(self) -> memoryview:
+        """Transacciones por iteración, solo lectura"""
+        return self._volume_view
+    
+    def _update_views(self):
+        """Regenera las vistas de solo lectura tras añadir datos"""
+        self._price_view = memoryview(self._prices)[:self._num_prices].toreadonly()
+        self._volume_view = memoryview(self._volumes)[:self._num_volumes].toreadonly()
+    
+    @staticmethod
+    def _grow(buffer: array) -> array:
+        """
+        Duplica la capacidad de un buffer. Se crea un array nuevo en lugar de
+        redimensionar, porque el anterior puede tener vistas exportadas.
+        """
+        return buffer + array(buffer.typecode, [0]) * len(buffer)
+    
+    def record_volume(self, volume: int):
+        """
+        Registra el número de transacciones de la iteración actual
+        """
+        if self._num_volumes == len(self._volumes):
+            self._volumes = self._grow(self._volumes)
+        self._volumes[self._num_volumes] = volume
+        self._num_volumes += 1
+        self._volume_view = memoryview(self._volumes)[:self._num_volumes].toreadonly()
     
     def apply_buy(self) -> bool:
         """
@@ -38,6 +115,8 @@ class Market:
         """
         if self.stock > 0:
             self.stock -= 1
+            self.traded_value += self.price
+            self.traded_volume += 1
             self.price *= (1 + Config.PRICE_INCREASE_RATE)
             return True
         return False
@@ -51,42 +130,151 @@ class Market:
         Returns: True (las ventas siempre son posibles)
         """
         self.stock += 1
+        self.traded_value += self.price
+        self.traded_volume += 1
         self.price *= (1 - Config.PRICE_DECREASE_RATE)
         return True
     
+    def quote_batch(self, buys: int, sells: int) -> BatchFill:
+        """
+        Calcula, sin modificar el mercado, el resultado de ejecutar un lote
+        de `sells` ventas seguidas de `buys` compras.
+        
+        El precio final es price * (1+r)^buys * (1-d)^sells, calculado en
+        espacio logarítmico, y los valores negociados se obtienen con la
+        suma de la serie geométrica, así que el coste es O(1) en el número
+        de operaciones. Las compras se limitan al stock disponible tras las
+        ventas.
+        
+        Returns: BatchFill con las operaciones ejecutadas y sus valores
+        """
+        sells = max(sells, 0)
+        buys = min(max(buys, 0), self.stock + sells)
+        
+        price = self.price
+        after_sells = price * math.exp(sells * math.log1p(-Config.PRICE_DECREASE_RATE))
+        after_buys = after_sells * math.exp(buys * math.log1p(Config.PRICE_INCREASE_RATE))
+        
+        if Config.PRICE_DECREASE_RATE:
+            sell_value = (price - after_sells) / Config.PRICE_DECREASE_RATE
+        else:
+            sell_value = price * sells
+        if Config.PRICE_INCREASE_RATE:
+            buy_value = (after_buys - after_sells) / Config.PRICE_INCREASE_RATE
+        else:
+            buy_value = after_sells * buys
+        
+        return BatchFill(buys, sells, buy_value, sell_value)
+    
+    def apply_batch(self, buys: int, sells: int) -> BatchFill:
+        """
+        Aplica un lote de operaciones en O(1) (ver quote_batch).
+        
+        Equivale a llamar apply_sell() `sells` veces y después apply_buy()
+        `buys` veces, salvo por el redondeo en coma flotante.
+        
+        Returns: BatchFill con las operaciones ejecutadas y sus valores
+        """
+        fill = self.quote_batch(buys, sells)
+        
+        self.stock += fill.sells - fill.buys
+        self.price *= math.exp(
+            fill.buys * math.log1p(Config.PRICE_INCREASE_RATE)
+            + fill.sells * math.log1p(-Config.PRICE_DECREASE_RATE)
+        )
+        self.traded_value += fill.buy_value + fill.sell_value
+        self.traded_volume += fill.buys + fill.sells
+        return fill
+    
+    def apply_auction(self, price: float, volume: int, stock_change: int):
+        """
+        Aplica el resultado de una subasta: `volume` unidades negociadas a un
+        precio único, que pasa a ser el precio del mercado.
+        
+        stock_change: Variación del stock del mercado (ventas al mercado
+                      menos compras al mercado)
+        """
+        self.stock += stock_change
+        self.traded_value += price * volume
+        self.traded_volume += volume
+        self.price = price
+    
     def end_iteration(self):
         """
         Finaliza una iteración guardando el precio actual en el historial
+        y en las estadísticas acumuladas
+        """
+        if self._num_prices == len(self._prices):
+            self._prices = self._grow(self._prices)
+        self._prices[self._num_prices] = self.price
+        self._num_prices += 1
+        self.previous_price = self._prices[self._num_prices - 2]
+        self._price_view = memoryview(self._prices)[:self._num_prices].toreadonly()
+        self.price_stats.push(self.price)
+    
+    def __getstate__(self) -> dict:
+        """
+        Estado para pickle (checkpoints): sin las vistas memoryview, que no
+        son serializables. Los buffers de historial se guardan tal cual para
+        que save_checkpoint los reconozca (ver growing_buffers).
         """
-        self.price_history.append(self.price)
-        self.previous_price = (
-            self.price_history[-2] if len(self.price_history) > 1 
-            else self.initial_price
+        state = self.__dict__.copy()
+        for name in ('_price_view', '_volume_view', '_state'):
+            del state[name]
+        return state
+    
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._update_views()
+        self._state = MarketState(
+            self.price, self.previous_price, self.stock, 0, len(self._volumes), self._price_view
         )
     
+    def growing_buffers(self) -> Dict[str, Tuple[array, int]]:
+        """
+        Returns: Buffers de solo anexado del mercado ({nombre: (buffer,
+                 elementos usados)}), que los checkpoints guardan por tramos
+        """
+        return {
+            'prices': (self._prices, self._num_prices),
+            'volumes': (self._volumes, self._num_volumes),
+        }
+    
     def get_state(self, iteration: int, total_iterations: int) -> MarketState:
         """
         Obtiene el estado actual del mercado.
-    
+        
+        Devuelve siempre la misma instancia actualizada en el lugar; el
+        estado solo es válido hasta la siguiente llamada.
         """
-        return MarketState(
-            price=self.price,
-            previous_price=self.previous_price,
-            stock=self.stock,
-            iteration=iteration,
-            total_iterations=total_iterations
+        state = self._state
+        state.update(
+            self.price, self.previous_price, self.stock,
+            iteration, total_iterations, self._price_view
         )
+        return state
     
     def get_statistics(self) -> dict:
         """
         Estadísticas del mercado.
+        
+        Se calculan en O(1) a partir de acumuladores, por lo que pueden
+        consultarse en mitad de la simulación sin recorrer el historial.
         """
+        stats = self.price_stats
         return {
             'final_price': self.price,
             'initial_price': self.initial_price,
             'price_change_pct': ((self.price / self.initial_price) - 1) * 100,
             'final_stock': self.stock,
-            'max_price': max(self.price_history),
-            'min_price': min(self.price_history),
-            'avg_price': sum(self.price_history) / len(self.price_history)
+            'max_price': stats.max,
+            'min_price': stats.min,
+            'avg_price': stats.mean(),
+            'std_price': stats.std(),
+            'num_prices': stats.count,
+            'total_volume': self.traded_volume,
+            'vwap': (
+                self.traded_value / self.traded_volume if self.traded_volume
+                else self.initial_price
+            )
         }
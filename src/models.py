@@ -2,36 +2,116 @@
 Modelos de datos para la simulación
 """
 
-from dataclasses import dataclass
-from typing import Literal
+from typing import Literal, Optional
 
 
 # Tipo para las decisiones de los agentes
 Decision = Literal['buy', 'sell', 'hold']
 
 
-@dataclass
 class MarketState:
     """
-    Estado inmutable del mercado en un momento dado.
+    Estado del mercado en un momento dado.
 
     price: Precio actual de las tarjetas
     previous_price: Precio en la iteración anterior
     stock: Cantidad de tarjetas disponibles
     iteration: Número de iteración actual
     total_iterations: Total de iteraciones de la simulación
+    price_history: Vista de solo lectura del historial de precios del
+                   mercado (compartida, sin copia), si está disponible
+
+    Usa __slots__ y el mercado reutiliza una única instancia que actualiza
+    en cada turno con update(), así que obtener el estado no reserva memoria.
+    Los agentes no deben modificarlo; si necesitan conservarlo entre turnos
+    deben usar copy().
     """
-    price: float
-    previous_price: float
-    stock: int
-    iteration: int
-    total_iterations: int
-    
+
+    __slots__ = (
+        'price', 'previous_price', 'stock', 'iteration', 'total_iterations',
+        'price_history', '_change_price', '_change_previous', '_change'
+    )
+
+    def __init__(
+        self,
+        price: float,
+        previous_price: float,
+        stock: int,
+        iteration: int,
+        total_iterations: int,
+        price_history: Optional[memoryview] = None
+    ):
+        self.price = price
+        self.previous_price = previous_price
+        self.stock = stock
+        self.iteration = iteration
+        self.total_iterations = total_iterations
+        self.price_history = price_history
+        self._change_price = None
+        self._change_previous = None
+        self._change = 0.0
+
+    def update(
+        self,
+        price: float,
+        previous_price: float,
+        stock: int,
+        iteration: int,
+        total_iterations: int,
+        price_history: Optional[memoryview] = None
+    ):
+        """
+        Actualiza el estado en el lugar para un nuevo turno
+        """
+        self.price = price
+        self.previous_price = previous_price
+        self.stock = stock
+        self.iteration = iteration
+        self.total_iterations = total_iterations
+        self.price_history = price_history
+
+    def copy(self) -> 'MarketState':
+        """
+        Returns: Copia independiente del estado actual
+        """
+        return MarketState(
+            self.price, self.previous_price, self.stock,
+            self.iteration, self.total_iterations, self.price_history
+        )
+
     def price_change_percentage(self) -> float:
         """
         Calcula el cambio porcentual del precio.
+        El resultado se guarda mientras price y previous_price no cambien,
+        por lo que los agentes de un mismo turno no lo recalculan.
         Returns: Cambio porcentual (ej: 0.01 = 1% de aumento)
         """
-        if self.previous_price == 0:
-            return 0
-        return (self.price - self.previous_price) / self.previous_price
+        price = self.price
+        previous_price = self.previous_price
+        if self._change_price == price and self._change_previous == previous_price:
+            return self._change
+
+        if previous_price == 0:
+            change = 0
+        else:
+            change = (price - previous_price) / previous_price
+        self._change_price = price
+        self._change_previous = previous_price
+        self._change = change
+        return change
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MarketState):
+            return NotImplemented
+        return (
+            self.price == other.price
+            and self.previous_price == other.previous_price
+            and self.stock == other.stock
+            and self.iteration == other.iteration
+            and self.total_iterations == other.total_iterations
+        )
+
+    def __repr__(self):
+        return (f"MarketState(price={self.price!r}, previous_price={self.previous_price!r}, "
+                f"stock={self.stock!r}, iteration={self.iteration!r}, "
+                f"total_iterations={self.total_iterations!r})")
@@ -0,0 +1,328 @@
+"""
+Ejecución en paralelo de múltiples simulaciones (Monte Carlo)
+"""
+
+import csv
+import os
+import random
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+from .agents import SmartAgentParams
+from .cache import cache_key, open_cache
+from .config import Config
+from .pool import run_pool, stream_pool
+from .sequential import SequentialMonitor, SequentialResult, StoppingRule
+from .shared_results import SharedRunResults
+from .simulation import Simulation
+from .vectorized_simulation import VectorizedSimulation
+
+
+# Columnas del CSV de resultados (results/simulation_results.csv)
+CSV_HEADER = [
+    'Simulacion', 'Balance_SmartAgent', 'Valor_Total', 'Ranking', 'Retorno_%',
+    'Transacciones', 'Precio_Final', 'Cambio_Precio_%', 'Tarjetas_0'
+]
+
+
+@dataclass
+class RunResult:
+    """
+    Resumen compacto de una simulación, sin listas de agentes.
+
+    run_id: Número de la simulación dentro del lote
+    seed: Semilla con la que se ejecutó
+    smart_balance: Balance final del SmartAgent
+    total_value: Valor total final del SmartAgent (balance + tarjetas)
+    rank: Posición del SmartAgent por valor total (1 = mejor)
+    return_pct: Retorno del SmartAgent en porcentaje
+    transactions: Transacciones realizadas por el SmartAgent
+    final_price: Precio final del mercado
+    price_change_pct: Cambio del precio respecto al inicial en porcentaje
+    zero_cards: True si el SmartAgent terminó con 0 tarjetas
+    """
+    run_id: int
+    seed: int
+    smart_balance: float
+    total_value: float
+    rank: int
+    return_pct: float
+    transactions: int
+    final_price: float
+    price_change_pct: float
+    zero_cards: bool
+
+    @classmethod
+    def from_simulation(cls, run_id: int, seed: int, sim: Simulation) -> 'RunResult':
+        """
+        Construye el resumen a partir de una simulación ya ejecutada
+
+        Raises:
+            ValueError: Si la simulación no tiene ningún SmartAgent
+        """
+        smart = sim.smart_agent
+        if smart is None:
+            raise ValueError("El resumen requiere al menos un SmartAgent (num_smart=0)")
+        price = sim.market.price
+        total_value = smart.get_total_value(price)
+        better = sum(
+            1 for _, _, balance, cards in sim.agent_records()
+            if balance + cards * price > total_value
+        )
+        return cls(
+            run_id=run_id,
+            seed=seed,
+            smart_balance=smart.balance,
+            total_value=total_value,
+            rank=better + 1,
+            return_pct=((total_value / Config.INITIAL_BALANCE) - 1) * 100,
+            transactions=smart.trade_count,
+            final_price=price,
+            price_change_pct=((price / sim.market.initial_price) - 1) * 100,
+            zero_cards=smart.cards == 0
+        )
+
+    def to_csv_row(self) -> list:
+        """Fila con el formato de CSV_HEADER"""
+        return [
+            self.run_id,
+            f"{self.smart_balance:.2f}",
+            f"{self.total_value:.2f}",
+            self.rank,
+            f"{self.return_pct:.2f}",
+            self.transactions,
+            f"{self.final_price:.2f}",
+            f"{self.price_change_pct:.2f}",
+            'SI' if self.zero_cards else 'NO'
+        ]
+
+
+def run_single(
+    run_id: int,
+    seed: int,
+    total_iterations: int = Config.TOTAL_ITERATIONS,
+    vectorized: bool = False,
+    cache_dir: Optional[str] = None,
+    cache_prices: bool = False,
+    smart_params: Optional[SmartAgentParams] = None
+) -> RunResult:
+    """
+    Ejecuta una simulación con su propia semilla y devuelve su resumen.
+
+    Se ejecuta dentro de los procesos del pool; como la simulación solo
+    usa generadores derivados de su semilla, el resultado no depende del
+    proceso en que se ejecute.
+
+    cache_dir: Directorio de una ResultCache; si ya contiene esta
+        ejecución (misma Config, código, motor y semilla) no se simula
+    cache_prices: Si True, la caché guarda también el historial de precios
+    smart_params: Parámetros de la estrategia del SmartAgent (por defecto, los originales)
+    """
+    simulation_class = VectorizedSimulation if vectorized else Simulation
+
+    if cache_dir is not None:
+        cache = open_cache(cache_dir, cache_prices)
+        key = cache_key(
+            engine=simulation_class.__name__, seed=seed, total_iterations=total_iterations,
+            smart_params=asdict(smart_params or SmartAgentParams())
+        )
+        entry = cache.get(key)
+        if entry is not None:
+            return replace(entry.result, run_id=run_id)
+
+    sim = simulation_class(total_iterations=total_iterations, seed=seed, smart_params=smart_params)
+    sim.run(verbose=False)
+    result = RunResult.from_simulation(run_id, seed, sim)
+
+    if cache_dir is not None:
+        cache.put(key, result, sim.market.price_history)
+    return result
+
+
+# Bloques compartidos a los que ya se conectó este proceso, por nombre
+_attached: Dict[str, SharedRunResults] = {}
+
+
+def run_single_shared(
+    run_id: int,
+    seed: int,
+    total_iterations: int,
+    vectorized: bool,
+    block: Tuple[str, int, int],
+    smart_params: Optional[SmartAgentParams] = None
+) -> RunResult:
+    """
+    Como run_single (sin caché), pero además escribe el historial de
+    precios y el estado final de los agentes en la fila run_id - 1 de un
+    SharedRunResults.
+
+    block: (nombre, num_runs, num_agents) del bloque compartido
+    smart_params: Parámetros del SmartAgent (por defecto, los originales)
+    """
+    name, num_runs, num_agents = block
+    shared = _attached.get(name)
+    if shared is None:
+        shared = SharedRunResults.attach(name, num_runs, num_agents, total_iterations)
+        _attached[name] = shared
+
+    simulation_class = VectorizedSimulation if vectorized else Simulation
+    sim = simulation_class(
+        total_iterations=total_iterations, seed=seed,
+        record_transactions=False, smart_params=smart_params
+    )
+    sim.run(verbose=False)
+    shared.write(run_id - 1, sim)
+    return RunResult.from_simulation(run_id, seed, sim)
+
+
+class MonteCarloRunner:
+    """
+    Reparte N simulaciones independientes entre un pool de procesos.
+
+    Cada simulación recibe una semilla propia derivada de la semilla base,
+    por lo que el lote es reproducible con independencia del número de
+    procesos. Los procesos devuelven RunResult en lugar de los agentes.
+    """
+
+    def __init__(
+        self,
+        num_runs: int,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        total_iterations: int = Config.TOTAL_ITERATIONS,
+        vectorized: bool = False,
+        cache_dir: Optional[str] = None,
+        cache_prices: bool = False,
+        smart_params: Optional[SmartAgentParams] = None
+    ):
+        """
+        Args:
+            num_runs: Número de simulaciones a ejecutar
+            workers: Procesos del pool (por defecto, número de CPUs).
+                Con 1 se ejecuta en el proceso actual.
+            seed: Semilla base del lote (aleatoria si es None)
+            total_iterations: Iteraciones por simulación
+            vectorized: Si True, usa VectorizedSimulation
+            cache_dir: Directorio de la caché de resultados (sin caché si es None)
+            cache_prices: Si True, la caché guarda también los historiales de precios
+            smart_params: Parámetros del SmartAgent a evaluar (por defecto, los originales)
+
+        Raises:
+            ValueError: Si num_runs, workers o total_iterations no son positivos
+        """
+        if num_runs <= 0:
+            raise ValueError("El número de simulaciones debe ser positivo")
+        if workers is not None and workers <= 0:
+            raise ValueError("El número de procesos debe ser positivo")
+        if total_iterations <= 0:
+            raise ValueError("El número de iteraciones debe ser positivo")
+
+        self.num_runs = num_runs
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.total_iterations = total_iterations
+        self.vectorized = vectorized
+        self.cache_dir = cache_dir
+        self.cache_prices = cache_prices
+        self.smart_params = smart_params
+
+    def seeds(self) -> List[int]:
+        """
+        Returns: Semilla independiente de cada simulación del lote
+        """
+        seeder = random.Random(self.seed)
+        return [seeder.getrandbits(64) for _ in range(self.num_runs)]
+
+    def _tasks(self) -> List[tuple]:
+        return [
+            (run_id, seed, self.total_iterations, self.vectorized,
+             self.cache_dir, self.cache_prices, self.smart_params)
+            for run_id, seed in enumerate(self.seeds(), 1)
+        ]
+
+    def run(self) -> List[RunResult]:
+        """
+        Ejecuta el lote completo.
+
+        Returns: Resultados ordenados por run_id
+        """
+        return list(run_pool(run_single, self._tasks(), self.workers))
+
+    def run_sequential(self, rule: StoppingRule) -> SequentialResult:
+        """
+        Ejecuta el lote como máximo hasta num_runs simulaciones, deteniéndose
+        en cuanto se cumple la regla de parada.
+
+        Los resultados se evalúan en orden de run_id, así que la parada es
+        reproducible con cualquier número de procesos; al detenerse se
+        cancelan las tareas pendientes del pool.
+
+        Returns: Resultado con las simulaciones usadas y el motivo de parada
+        """
+        monitor = SequentialMonitor(rule)
+        results = []
+        stream = stream_pool(run_single, self._tasks(), self.workers)
+        try:
+            for result in stream:
+                results.append(result)
+                if monitor.push(result):
+                    break
+        finally:
+            stream.close()
+        return SequentialResult.from_monitor(results, monitor)
+
+    def run_shared(self) -> Tuple[List[RunResult], SharedRunResults]:
+        """
+        Ejecuta el lote guardando los historiales de precios y el estado
+        final de todos los agentes en un SharedRunResults preasignado, en
+        el que escriben directamente los procesos del pool. La fila de
+        cada simulación es run_id - 1. No usa la caché de resultados.
+
+        Returns: (resultados ordenados por run_id, bloque compartido); el
+                 llamador debe cerrar el bloque al terminar
+        """
+        num_agents = Config.NUM_RANDOM + Config.NUM_TREND + Config.NUM_ANTI_TREND + Config.NUM_SMART
+        shared = SharedRunResults(self.num_runs, num_agents, self.total_iterations)
+        block = (shared.name, self.num_runs, num_agents)
+        tasks = [
+            (run_id, seed, self.total_iterations, self.vectorized, block, self.smart_params)
+            for run_id, seed in enumerate(self.seeds(), 1)
+        ]
+        try:
+            if self.workers == 1:
+                # En el proceso actual se escribe en el propio bloque
+                _attached[shared.name] = shared
+            return list(run_pool(run_single_shared, tasks, self.workers)), shared
+        except BaseException:
+            shared.close()
+            raise
+        finally:
+            _attached.pop(shared.name, None)
+
+    @staticmethod
+    def summarize(results: List[RunResult]) -> Dict[str, float]:
+        """
+        Estadísticas agregadas del SmartAgent sobre un lote.
+        """
+        n = len(results)
+        returns = [r.return_pct for r in results]
+        return {
+            'runs': n,
+            'avg_return_pct': sum(returns) / n,
+            'min_return_pct': min(returns),
+            'max_return_pct': max(returns),
+            'avg_rank': sum(r.rank for r in results) / n,
+            'top10_rate': sum(1 for r in results if r.rank <= 10) / n,
+            'zero_cards_rate': sum(1 for r in results if r.zero_cards) / n,
+        }
+
+    @staticmethod
+    def write_csv(results: List[RunResult], path: str):
+        """
+        Escribe los resultados con el formato de results/simulation_results.csv
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_HEADER)
+            for result in results:
+                writer.writerow(result.to_csv_row())
@@ -0,0 +1,311 @@
+"""
+Optimización evolutiva de los parámetros de la estrategia del SmartAgent
+"""
+
+import math
+import os
+import random
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from typing import Dict, List, Optional, Tuple
+
+from .agents import SmartAgentParams
+from .config import Config
+from .indicators import Z_95, RunningStatistics
+from .pool import run_pool
+from .sweep import latin_hypercube, run_replicate, scale_unit, split_parameters
+
+
+# Rangos de búsqueda por defecto ({parámetro: (mínimo, máximo)}; enteros si
+# ambos límites lo son)
+DEFAULT_SPACE: Dict[str, Tuple[float, float]] = {
+    'accumulation_end': (0.1, 0.5),
+    'reduction_start': (0.5, 0.85),
+    'reduction_rate': (0.3, 1.0),
+    'late_sell_start': (0.75, 0.95),
+    'late_sell_probability': (0.0, 1.0),
+    'liquidation_iterations': (10, 200),
+    'pressure_low_threshold': (0.9, 1.0),
+    'low_threshold': (0.9, 1.0),
+    'reduction_profit': (1.0, 1.1),
+    'trading_profit': (1.0, 1.2),
+    'sell_pressure': (0.0, 30.0),
+    'buy_pressure': (-30.0, 0.0),
+    'momentum_buy': (-0.1, 0.0),
+    'reserve_fraction': (0.0, 0.5),
+    'reserve_exponent': (0.25, 2.0),
+}
+
+
+@dataclass
+class Candidate:
+    """
+    Individuo de la población: parámetros codificados en [0, 1]^d y sus
+    retornos (uno por semilla evaluada, en el orden de las semillas)
+
+    genes: Posición normalizada de cada parámetro del espacio de búsqueda
+    returns: Retorno del SmartAgent (%) en cada semilla evaluada
+    eliminated: True si se descartó antes de evaluar todas las semillas
+    """
+    genes: List[float]
+    returns: List[float]
+    eliminated: bool = False
+
+    @property
+    def mean_return(self) -> float:
+        return math.fsum(self.returns) / len(self.returns) if self.returns else -math.inf
+
+
+@dataclass
+class GenerationSummary:
+    """
+    generation: Número de generación (0 = población inicial)
+    best_return_pct: Retorno medio del mejor candidato en las semillas de la generación
+    best_params: Parámetros del mejor candidato
+    evaluations: Simulaciones ejecutadas en la generación
+    eliminated: Candidatos descartados antes de evaluar todas las semillas
+    """
+    generation: int
+    best_return_pct: float
+    best_params: Dict[str, object]
+    evaluations: int
+    eliminated: int
+
+
+class StrategyOptimizer:
+    """
+    Algoritmo genético sobre SmartAgentParams.
+
+    Cada candidato se codifica en [0, 1]^d según los rangos del espacio de
+    búsqueda. Por generación se conservan los `elite` mejores y el resto se
+    genera por torneo binario, cruce BLX-alfa y mutación gaussiana.
+
+    Todos los candidatos de una generación se evalúan sobre las mismas
+    semillas (números aleatorios comunes), de modo que las diferencias entre
+    candidatos no se deben a la suerte de las semillas. Cada generación usa
+    semillas nuevas, así que la élite se vuelve a evaluar.
+
+    La evaluación avanza por etapas de `stage_size` semillas en un pool de
+    procesos. Tras cada etapa se descarta a los candidatos claramente
+    perdedores: aquellos cuya diferencia pareada de retorno frente al líder
+    tiene un intervalo de confianza del 95% completamente negativo.
+    """
+
+    def __init__(
+        self,
+        space: Optional[Dict[str, Tuple[float, float]]] = None,
+        population: int = 16,
+        generations: int = 10,
+        evaluations: int = 32,
+        stage_size: int = 8,
+        elite: int = 2,
+        mutation_rate: float = 0.3,
+        mutation_scale: float = 0.1,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        vectorized: bool = False,
+        total_iterations: Optional[int] = None,
+        config: Optional[Dict[str, object]] = None
+    ):
+        """
+        Args:
+            space: {parámetro de SmartAgentParams: (mínimo, máximo)}; por defecto DEFAULT_SPACE
+            population: Candidatos por generación
+            generations: Generaciones tras la población inicial
+            evaluations: Semillas por candidato y generación
+            stage_size: Semillas por etapa antes de descartar perdedores
+            elite: Mejores candidatos que pasan sin cambios a la siguiente generación
+            mutation_rate: Probabilidad de mutar cada gen
+            mutation_scale: Desviación típica de la mutación (en [0, 1])
+            workers: Procesos del pool (por defecto, número de CPUs).
+                Con 1 se ejecuta en el proceso actual.
+            seed: Semilla del optimizador (aleatoria si es None)
+            vectorized: Si True, evalúa con VectorizedSimulation
+            total_iterations: Iteraciones por simulación (por defecto
+                Config.TOTAL_ITERATIONS al crear el optimizador)
+            config: Valores de Config para las simulaciones (ej: NUM_TREND).
+                Viajan en cada tarea, así que no dependen de que los procesos
+                del pool hereden la Config del proceso principal.
+
+        Raises:
+            ValueError: Si algún parámetro no existe o los tamaños no son válidos
+        """
+        space = dict(DEFAULT_SPACE if space is None else space)
+        names = {f.name for f in fields(SmartAgentParams)}
+        unknown = set(space) - names
+        if unknown:
+            raise ValueError(f"Parámetros desconocidos: {', '.join(sorted(unknown))}")
+        if not space:
+            raise ValueError("El espacio de búsqueda está vacío")
+        if population < 2 or not 0 <= elite < population:
+            raise ValueError("La población debe tener al menos 2 candidatos y más que la élite")
+        if generations < 0 or evaluations <= 0 or stage_size <= 0:
+            raise ValueError("Generaciones, evaluaciones y etapas deben ser positivas")
+        if workers is not None and workers <= 0:
+            raise ValueError("El número de procesos debe ser positivo")
+        if total_iterations is not None and total_iterations <= 0:
+            raise ValueError("El número de iteraciones debe ser positivo")
+        config = dict(config or {})
+        config_values, smart_params = split_parameters(config)
+        if smart_params is not None:
+            raise ValueError("config solo admite valores de Config")
+
+        self.space = space
+        self.names = list(space)
+        self.population = population
+        self.generations = generations
+        self.evaluations = evaluations
+        self.stage_size = stage_size
+        self.elite = elite
+        self.mutation_rate = mutation_rate
+        self.mutation_scale = mutation_scale
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.vectorized = vectorized
+        self.config = config_values
+        self.config['TOTAL_ITERATIONS'] = (
+            total_iterations if total_iterations is not None else Config.TOTAL_ITERATIONS
+        )
+        self.rng = random.Random(f"{self.seed}:optimizer")
+        self.history: List[GenerationSummary] = []
+
+    def decode(self, genes: List[float]) -> SmartAgentParams:
+        """Returns: Parámetros correspondientes a una posición normalizada"""
+        values = {
+            name: scale_unit(low, high, gene)
+            for name, gene, (low, high) in zip(self.names, genes, self.space.values())
+        }
+        return SmartAgentParams.from_dict(values)
+
+    def encode(self, params: SmartAgentParams) -> List[float]:
+        """Returns: Posición normalizada (recortada a [0, 1]) de unos parámetros"""
+        genes = []
+        for name, (low, high) in self.space.items():
+            value = getattr(params, name)
+            genes.append(min(max((value - low) / (high - low), 0.0), 1.0) if high != low else 0.0)
+        return genes
+
+    def _smart_values(self, genes: List[float]) -> Dict[str, object]:
+        params = asdict(self.decode(genes))
+        return {name: params[name] for name in self.names}
+
+    def _task_params(self, genes: List[float]) -> Dict[str, object]:
+        """Parámetros de una tarea: valores de Config y del SmartAgent"""
+        return {**self.config, **self._smart_values(genes)}
+
+    def _initial_population(self) -> List[Candidate]:
+        """Estrategia por defecto más un hipercubo latino sobre el espacio"""
+        unit = {name: (0.0, 1.0) for name in self.names}
+        samples = latin_hypercube(unit, self.population - 1, self.rng.getrandbits(64))
+        genes = [self.encode(SmartAgentParams())]
+        genes.extend([sample[name] for name in self.names] for sample in samples)
+        return [Candidate(g, []) for g in genes]
+
+    def _tournament(self, ranked: List[Candidate]) -> Candidate:
+        """Torneo binario: gana el mejor clasificado de dos al azar"""
+        i, j = self.rng.randrange(len(ranked)), self.rng.randrange(len(ranked))
+        return ranked[min(i, j)]
+
+    def _offspring(self, first: Candidate, second: Candidate) -> Candidate:
+        """Cruce BLX-0.5 y mutación gaussiana, recortados a [0, 1]"""
+        rng = self.rng
+        genes = []
+        for a, b in zip(first.genes, second.genes):
+            low, high = min(a, b), max(a, b)
+            spread = (high - low) * 0.5
+            gene = rng.uniform(low - spread, high + spread)
+            if rng.random() < self.mutation_rate:
+                gene += rng.gauss(0.0, self.mutation_scale)
+            genes.append(min(max(gene, 0.0), 1.0))
+        return Candidate(genes, [])
+
+    def _next_population(self, ranked: List[Candidate]) -> List[Candidate]:
+        children = [Candidate(c.genes, []) for c in ranked[:self.elite]]
+        while len(children) < self.population:
+            children.append(self._offspring(self._tournament(ranked), self._tournament(ranked)))
+        return children
+
+    def _generation_seeds(self, generation: int) -> List[int]:
+        """Semillas comunes a todos los candidatos de una generación"""
+        seeder = random.Random(f"{self.seed}:generation:{generation}")
+        return [seeder.getrandbits(64) for _ in range(self.evaluations)]
+
+    def _eliminate(self, candidates: List[Candidate]):
+        """
+        Descarta a los candidatos cuya diferencia pareada con el líder tiene
+        un intervalo de confianza del 95% por debajo de cero
+        """
+        alive = [c for c in candidates if not c.eliminated]
+        leader = max(alive, key=lambda c: c.mean_return)
+        for candidate in alive:
+            if candidate is leader or len(candidate.returns) < 2:
+                continue
+            differences = RunningStatistics()
+            for own, best in zip(candidate.returns, leader.returns):
+                differences.push(own - best)
+            upper = differences.mean() + Z_95 * differences.std() / math.sqrt(differences.count)
+            if upper < 0:
+                candidate.eliminated = True
+
+    def _evaluate(self, candidates: List[Candidate], seeds: List[int], executor: Optional[Executor]) -> int:
+        """
+        Evalúa la generación por etapas con descarte de perdedores.
+
+        Returns: Simulaciones ejecutadas
+        """
+        executed = 0
+        for start in range(0, len(seeds), self.stage_size):
+            stage = list(enumerate(seeds[start:start + self.stage_size], start))
+            alive = [c for c in candidates if not c.eliminated]
+            tasks = [
+                (self._task_params(c.genes), replicate, seed, self.vectorized)
+                for c in alive for replicate, seed in stage
+            ]
+            results = list(run_pool(run_replicate, tasks, self.workers, executor))
+            executed += len(tasks)
+
+            for i, candidate in enumerate(alive):
+                candidate.returns.extend(
+                    r.return_pct for r in results[i * len(stage):(i + 1) * len(stage)]
+                )
+            self._eliminate(candidates)
+        return executed
+
+    @staticmethod
+    def _rank(candidates: List[Candidate]) -> List[Candidate]:
+        """Mejores primero: antes los que completaron más semillas, luego por retorno medio"""
+        return sorted(candidates, key=lambda c: (len(c.returns), c.mean_return), reverse=True)
+
+    def run(self, verbose: bool = False) -> SmartAgentParams:
+        """
+        Ejecuta la optimización.
+
+        Returns: Mejores parámetros de la última generación
+        """
+        self.history = []
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            candidates = self._initial_population()
+            for generation in range(self.generations + 1):
+                if generation:
+                    candidates = self._next_population(ranked)
+                executed = self._evaluate(candidates, self._generation_seeds(generation), executor)
+                ranked = self._rank(candidates)
+
+                best = ranked[0]
+                summary = GenerationSummary(
+                    generation=generation,
+                    best_return_pct=best.mean_return,
+                    best_params=self._smart_values(best.genes),
+                    evaluations=executed,
+                    eliminated=sum(1 for c in candidates if c.eliminated)
+                )
+                self.history.append(summary)
+                if verbose:
+                    print(f"Generación {generation}: mejor retorno {summary.best_return_pct:+.2f}% "
+                          f"({executed} simulaciones, {summary.eliminated} descartados)")
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return self.decode(ranked[0].genes)
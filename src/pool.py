@@ -0,0 +1,73 @@
+"""
+Ejecución de tareas en un pool de procesos
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Iterator, Optional, Sequence
+
+
+def _call(function: Callable, task: tuple):
+    """Adaptador de argumentos para Executor.map"""
+    return function(*task)
+
+
+def run_pool(
+    function: Callable,
+    tasks: Sequence[tuple],
+    workers: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> Iterator:
+    """
+    Ejecuta function(*task) para cada tarea en un pool de procesos.
+
+    function: Función de nivel de módulo (se envía a los procesos por nombre)
+    workers: Procesos del pool (por defecto, número de CPUs). Con 1 se
+        ejecuta en el proceso actual.
+    executor: Pool ya abierto a reutilizar (ej: entre etapas); no se cierra
+
+    Returns: Iterador de resultados en el orden de `tasks`
+    """
+    workers = workers or os.cpu_count() or 1
+    if executor is None and workers == 1:
+        yield from (function(*task) for task in tasks)
+        return
+
+    # Agrupar tareas para amortizar la comunicación entre procesos
+    chunksize = max(1, len(tasks) // (workers * 4))
+    if executor is not None:
+        yield from executor.map(_call, repeat(function), tasks, chunksize=chunksize)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_call, repeat(function), tasks, chunksize=chunksize)
+
+
+def stream_pool(function: Callable, tasks: Sequence[tuple], workers: Optional[int] = None) -> Iterator:
+    """
+    Como run_pool, pero con un máximo de tareas enviadas al pool a la vez
+    (4 por proceso), de modo que la memoria no crece con el número de
+    tareas; al cerrar el iterador se cancelan las pendientes.
+
+    Returns: Iterador de resultados en el orden de `tasks`
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        yield from (function(*task) for task in tasks)
+        return
+
+    window = workers * 4
+    remaining = iter(tasks)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque(executor.submit(function, *task) for _, task in zip(range(window), remaining))
+        try:
+            while pending:
+                result = pending.popleft().result()
+                task = next(remaining, None)
+                if task is not None:
+                    pending.append(executor.submit(function, *task))
+                yield result
+        finally:
+            for future in pending:
+                future.cancel()
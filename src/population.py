@@ -0,0 +1,80 @@
+"""
+Población vectorizada de agentes con reglas fijas
+"""
+
+from array import array
+from typing import Iterator, Tuple
+
+from .config import Config
+
+
+# Códigos de tipo de agente almacenados en la columna `types`
+RANDOM = 0
+TREND = 1
+ANTI_TREND = 2
+
+TYPE_NAMES = ('RandomAgent', 'TrendAgent', 'AntiTrendAgent')
+
+
+class AgentPopulation:
+    """
+    Almacena en arrays columnares el estado de los agentes con reglas fijas
+    (RandomAgent, TrendAgent, AntiTrendAgent) en lugar de un objeto por agente.
+
+    balance: Balance de cada agente (array 'd')
+    cards: Tarjetas de cada agente (array 'q')
+    types: Código de tipo de cada agente (array 'b')
+
+    El índice de cada agente en los arrays coincide con su agent_id.
+    """
+
+    def __init__(
+        self,
+        num_random: int,
+        num_trend: int,
+        num_anti_trend: int,
+        initial_balance: float = Config.INITIAL_BALANCE
+    ):
+        size = num_random + num_trend + num_anti_trend
+        self.size = size
+        self.balance = array('d', [initial_balance]) * size
+        self.cards = array('q', [0]) * size
+        self.types = (
+            array('b', [RANDOM]) * num_random
+            + array('b', [TREND]) * num_trend
+            + array('b', [ANTI_TREND]) * num_anti_trend
+        )
+        # Los agentes de cada tipo ocupan un bloque contiguo de índices
+        self._bounds = (
+            (0, num_random),
+            (num_random, num_random + num_trend),
+            (num_random + num_trend, size)
+        )
+
+    def __len__(self) -> int:
+        return self.size
+
+    def count(self, agent_type: int) -> int:
+        """
+        Returns: Número de agentes del tipo indicado
+        """
+        return self.types.count(agent_type)
+
+    def totals(self, agent_type: int) -> Tuple[float, int]:
+        """
+        Returns: (balance total, tarjetas totales) de los agentes del tipo indicado
+        """
+        start, end = self._bounds[agent_type]
+        return sum(self.balance[start:end]), sum(self.cards[start:end])
+
+    def records(self) -> Iterator[Tuple[str, int, float, int]]:
+        """
+        Returns: Iterador de (tipo, agent_id, balance, tarjetas) por agente
+        """
+        for agent_id in range(self.size):
+            yield (
+                TYPE_NAMES[self.types[agent_id]],
+                agent_id,
+                self.balance[agent_id],
+                self.cards[agent_id]
+            )
@@ -0,0 +1,156 @@
+"""
+Instrumentación opcional de tiempos por fase de la simulación
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
+
+from .rng import RandomStreams
+
+if TYPE_CHECKING:
+    from .simulation import Simulation
+
+
+# Fase que engloba cada iteración completa; el resto de fases se anidan en ella
+ITERATION = 'iteration'
+# Tiempo de la iteración no atribuido a ninguna fase medida
+OTHER = 'other'
+
+
+class Profiler:
+    """
+    Mide tiempo acumulado y número de llamadas por fase de la simulación:
+    barajado de turnos, Market.get_state, decide() de cada clase de agente,
+    aplicación de operaciones (agente y mercado) e historial del mercado.
+
+    attach() sustituye los métodos medidos por envoltorios a nivel de
+    instancia y detach() los elimina, así que sin Profiler la simulación
+    no paga ningún coste. Con Profiler, cada llamada medida añade dos
+    lecturas de time.perf_counter.
+
+    En el motor vectorizado las decisiones de la población se resuelven en
+    línea dentro de run_iteration y aparecen en la fase 'other'.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        path: Fichero JSON donde Simulation.run guarda el perfil al terminar
+        """
+        self.path = path
+        # phases[fase] = [llamadas, segundos]
+        self.phases: Dict[str, List] = {}
+        self._installed: List[Tuple[object, str]] = []
+
+    def wrap(self, owner: object, name: str, phase: str):
+        """
+        Mide las llamadas a owner.name como parte de la fase indicada
+        """
+        original = getattr(owner, name)
+        stats = self.phases.setdefault(phase, [0, 0.0])
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                stats[1] += perf_counter() - start
+                stats[0] += 1
+
+        setattr(owner, name, timed)
+        self._installed.append((owner, name))
+
+    def attach(self, simulation: 'Simulation'):
+        """Instala la medición en una simulación y su mercado"""
+        self.wrap(simulation, 'run_iteration', ITERATION)
+        self.wrap(simulation.streams.get(RandomStreams.SHUFFLE), 'shuffle', 'shuffle')
+        if simulation.batch_decisions or any(agent.BATCH_EQUIVALENT for agent in simulation.agents):
+            self.wrap(simulation, '_batch_decisions', 'decide.batch')
+
+        market = simulation.market
+        self.wrap(market, 'get_state', 'market.get_state')
+        for name in ('apply_buy', 'apply_sell', 'apply_batch'):
+            self.wrap(market, name, 'trade.market')
+        for name in ('record_volume', 'end_iteration'):
+            self.wrap(market, name, 'market.history')
+        self.wrap(simulation.engine, 'clear', 'market.clear')
+
+        for agent in simulation.agents:
+            self.wrap(agent, 'decide', f"decide.{agent.__class__.__name__}")
+            self.wrap(agent, 'buy', 'trade.agent')
+            self.wrap(agent, 'sell', 'trade.agent')
+
+    def detach(self):
+        """Restaura los métodos originales"""
+        for owner, name in reversed(self._installed):
+            delattr(owner, name)
+        self._installed.clear()
+
+    @contextmanager
+    def suspended(self, simulation: 'Simulation') -> Iterator[None]:
+        """
+        Retira la medición temporalmente (ej: para guardar un checkpoint,
+        ya que los envoltorios no son serializables)
+        """
+        attached = bool(self._installed)
+        if attached:
+            self.detach()
+        try:
+            yield
+        finally:
+            if attached:
+                self.attach(simulation)
+
+    def summary(self) -> List[Tuple[str, int, float]]:
+        """
+        Returns: (fase, llamadas, segundos) por fase de mayor a menor tiempo,
+                 incluida 'other' (tiempo de iteración no atribuido)
+        """
+        rows = [(phase, calls, seconds) for phase, (calls, seconds) in self.phases.items()
+                if phase != ITERATION]
+        iteration_calls, iteration_seconds = self.phases.get(ITERATION, (0, 0.0))
+        measured = sum(seconds for _, _, seconds in rows)
+        rows.append((OTHER, iteration_calls, max(iteration_seconds - measured, 0.0)))
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    @property
+    def total_seconds(self) -> float:
+        """Tiempo total dentro de run_iteration"""
+        return self.phases.get(ITERATION, (0, 0.0))[1]
+
+    def print_summary(self):
+        """Imprime la tabla de tiempos por fase"""
+        total = self.total_seconds
+        print("\n" + "-" * 60)
+        print("PERFIL POR FASE")
+        print("-" * 60)
+        print(f"{'Fase':<26} {'Llamadas':>10} {'Tiempo (s)':>11} {'%':>6}")
+        for phase, calls, seconds in self.summary():
+            share = seconds / total * 100 if total else 0.0
+            print(f"{phase:<26} {calls:>10,} {seconds:>11.4f} {share:>5.1f}%")
+        iterations = self.phases.get(ITERATION, (0, 0.0))[0]
+        print(f"{'Total run_iteration':<26} {iterations:>10,} {total:>11.4f}")
+
+    def to_dict(self) -> dict:
+        """Perfil como documento serializable en JSON"""
+        return {
+            'total_seconds': self.total_seconds,
+            'iterations': self.phases.get(ITERATION, (0, 0.0))[0],
+            'phases': [
+                {'phase': phase, 'calls': calls, 'seconds': seconds}
+                for phase, calls, seconds in self.summary()
+            ],
+        }
+
+    def write(self, path: Optional[str] = None):
+        """Guarda el perfil en JSON (por defecto en self.path)"""
+        path = path or self.path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
@@ -0,0 +1,198 @@
+"""
+Reproducción de trayectorias de precio grabadas (backtesting del SmartAgent)
+"""
+
+import csv
+import json
+import os
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+from .agents import SmartAgent, SmartAgentParams
+from .config import Config
+from .market import Market
+from .monte_carlo import RunResult
+from .pool import run_pool
+from .sinks import read_binary
+from .simulation import Simulation
+
+
+class ReplayMarket(Market):
+    """
+    Mercado cuyo precio sigue una trayectoria grabada.
+
+    Al comienzo de la iteración t el precio es recorded[t] * impact. Las
+    operaciones de los agentes lo mueven con apply_buy/apply_sell como en
+    Market, y al cerrar la iteración ese movimiento se acumula en `impact`,
+    que se aplica al resto de la trayectoria (impacto permanente). Sin
+    operaciones, price_history coincide exactamente con la grabación.
+    """
+
+    def __init__(self, prices: Sequence[float], initial_stock: int = Config.INITIAL_STOCK):
+        """
+        prices: Precios grabados, incluido el inicial (len = iteraciones + 1)
+
+        Raises:
+            ValueError: Si hay menos de dos precios o alguno no es positivo
+        """
+        if len(prices) < 2:
+            raise ValueError("La trayectoria necesita al menos dos precios")
+        if min(prices) <= 0:
+            raise ValueError("Los precios grabados deben ser positivos")
+
+        self.recorded = array('d', prices)
+        self.impact = 1.0  # Efecto acumulado de las operaciones propias
+        super().__init__(self.recorded[0], initial_stock, capacity=len(self.recorded) - 1)
+
+    def end_iteration(self):
+        """
+        Acumula el impacto de la iteración y cierra al siguiente precio grabado
+        """
+        start = self._num_prices - 1
+        self.impact = self.price / self.recorded[start]
+        self.price = self.recorded[start + 1] * self.impact
+        super().end_iteration()
+
+
+class ReplaySimulation(Simulation):
+    """
+    Simulación en la que solo participan SmartAgent y el precio sigue una
+    trayectoria grabada (de Market.price_history, de un sink o de un CSV
+    externo) en lugar de formarse con el resto de agentes.
+
+    Cada SmartAgent recibe en cada turno el MarketState de la trayectoria y
+    sus operaciones se aplican como impacto sobre ella (ver ReplayMarket).
+    Cuesta una fracción de una simulación completa, así que permite evaluar
+    una estrategia sobre miles de trayectorias guardadas.
+
+    Los SmartAgent estiman la presión del mercado con la población de la
+    simulación que generó la trayectoria (por defecto, la de Config).
+    """
+
+    def __init__(
+        self,
+        prices: Sequence[float],
+        num_smart: int = 1,
+        seed: Optional[int] = None,
+        record_transactions: bool = True,
+        smart_params: Optional[SmartAgentParams] = None,
+        population: Optional[Tuple[int, int, int]] = None
+    ):
+        """
+        Args:
+            prices: Precios grabados, incluido el inicial
+            num_smart: SmartAgent que operan sobre la trayectoria
+            seed: Semilla de los generadores (turnos y SmartAgent)
+            record_transactions: Si False, no se registran transacciones
+            smart_params: Parámetros de la estrategia de los SmartAgent
+            population: (aleatorios, tendenciales, anti-tendenciales) que
+                conocen los SmartAgent (por defecto, los de Config)
+
+        Raises:
+            ValueError: Si la trayectoria no es válida o num_smart no es positivo
+        """
+        if num_smart <= 0:
+            raise ValueError("Se necesita al menos un SmartAgent")
+        self.recorded_population = population or (
+            Config.NUM_RANDOM, Config.NUM_TREND, Config.NUM_ANTI_TREND
+        )
+        market = ReplayMarket(prices)
+
+        super().__init__(
+            num_random=0,
+            num_trend=0,
+            num_anti_trend=0,
+            num_smart=num_smart,
+            total_iterations=len(market.recorded) - 1,
+            seed=seed,
+            record_transactions=record_transactions,
+            smart_params=smart_params
+        )
+        self.market = market
+        self.engine.bind(market)
+
+    def _create_smart_agents(self, first_id: int):
+        """Crea los SmartAgent con el conocimiento de la población grabada"""
+        num_random, num_trend, num_anti_trend = self.recorded_population
+        rng = self.streams.get('SmartAgent')
+        self.smart_agents = [
+            SmartAgent(
+                agent_id, rng,
+                num_random=num_random,
+                num_trend=num_trend,
+                num_anti_trend=num_anti_trend,
+                ledger=self.ledger,
+                params=self.smart_params
+            )
+            for agent_id in range(first_id, first_id + self.num_smart)
+        ]
+
+
+def load_price_path(path: str, column: str = 'price', initial_price: Optional[float] = None) -> array:
+    """
+    Lee una trayectoria de precios.
+
+    Formatos:
+        .bin / .jsonl / .csv con columna 'iteration' (ficheros de
+            IterationSink): precios de cierre de cada iteración; se antepone
+            el precio inicial (por defecto Config.INITIAL_PRICE)
+        .csv externo: valores de la columna `column`, el primero es el
+            precio inicial (se antepone initial_price si se indica)
+
+    Raises:
+        ValueError: Si el CSV no tiene la columna indicada
+    """
+    extension = os.path.splitext(path)[1].lower()
+    from_sink = True
+    if extension == '.bin':
+        closes = array('d', (record.price for record in read_binary(path)))
+    elif extension == '.jsonl':
+        with open(path) as f:
+            closes = array('d', (json.loads(line)['price'] for line in f if line.strip()))
+    else:
+        with open(path, newline='') as f:
+            reader = csv.DictReader(f)
+            if column not in (reader.fieldnames or ()):
+                raise ValueError(f"El CSV no tiene la columna {column!r}")
+            from_sink = 'iteration' in reader.fieldnames
+            closes = array('d', (float(row[column]) for row in reader))
+
+    if initial_price is None and from_sink:
+        initial_price = Config.INITIAL_PRICE
+    if initial_price is None:
+        return closes
+    return array('d', [initial_price]) + closes
+
+
+def replay_single(
+    path_id: int,
+    prices: Sequence[float],
+    seed: int,
+    smart_params: Optional[SmartAgentParams] = None
+) -> RunResult:
+    """
+    Reproduce una trayectoria con un SmartAgent y devuelve su resumen
+    (el ranking es entre los agentes de la reproducción)
+    """
+    sim = ReplaySimulation(prices, seed=seed, record_transactions=False, smart_params=smart_params)
+    sim.run(verbose=False)
+    return RunResult.from_simulation(path_id, seed, sim)
+
+
+def replay_many(
+    paths: Sequence[Sequence[float]],
+    smart_params: Optional[SmartAgentParams] = None,
+    seed: int = 0,
+    workers: Optional[int] = None
+) -> List[RunResult]:
+    """
+    Evalúa una estrategia sobre muchas trayectorias grabadas en un pool de
+    procesos. La trayectoria i usa la semilla seed + i.
+
+    paths: Trayectorias (arrays, listas o vistas memoryview, que se copian
+        a arrays para enviarlas a los procesos)
+
+    Returns: Un RunResult por trayectoria (run_id = posición), en orden
+    """
+    tasks = [(i, array('d', path), seed + i, smart_params) for i, path in enumerate(paths)]
+    return list(run_pool(replay_single, tasks, workers))
@@ -0,0 +1,78 @@
+"""
+Generadores de números aleatorios por componente de la simulación
+"""
+
+import random
+from typing import Dict, Optional
+
+
+# Mayor valor de random(): reflejar u respecto a él mantiene [0, 1)
+REFLECTION = 1.0 - 2.0 ** -53
+
+
+class AntitheticRandom(random.Random):
+    """
+    Generador antitético de random.Random con la misma semilla: random()
+    devuelve el reflejo de u en [0, 1) y shuffle() da la permutación invertida.
+
+    Una ejecución con generadores antitéticos está correlacionada
+    negativamente con la original, así que promediar ambas reduce la
+    varianza del resultado.
+    """
+
+    def random(self) -> float:
+        # u es múltiplo de 2**-53 en [0, 1); su reflejo (1 - 2**-53) - u es
+        # exacto y también está en [0, 1), mientras que 1 - u podría valer 1.0
+        return REFLECTION - super().random()
+
+    def getrandbits(self, k: int) -> int:
+        # Redefinirlo mantiene _randbelow (y por tanto shuffle) basado en
+        # getrandbits en lugar de en el random() antitético
+        return super().getrandbits(k)
+
+    def shuffle(self, x):
+        super().shuffle(x)
+        x.reverse()
+
+
+class RandomStreams:
+    """
+    Conjunto de generadores random.Random independientes derivados de
+    una única semilla: uno para barajar los turnos y uno por clase de agente.
+
+    Cada generador se siembra con la cadena "<semilla>:<componente>", de modo
+    que su secuencia depende solo de la semilla y del nombre del componente,
+    no del proceso ni del orden en que se piden los generadores.
+
+    Cada agente con reglas fijas consume exactamente un número por turno,
+    sea cual sea el estado del mercado, y el barajado consume siempre los
+    mismos bits; por eso dos simulaciones con la misma semilla y distinta
+    estrategia del SmartAgent reciben los mismos números aleatorios
+    (números aleatorios comunes).
+    """
+
+    SHUFFLE = 'shuffle'
+
+    def __init__(self, seed: Optional[int] = None, antithetic: bool = False):
+        """
+        Args:
+            seed: Semilla de la simulación. Si es None se toma del
+                generador global `random`, por lo que random.seed()
+                sigue haciendo reproducible la ejecución.
+            antithetic: Si True, todos los generadores son AntitheticRandom
+        """
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.antithetic = antithetic
+        self._streams: Dict[str, random.Random] = {}
+
+    def get(self, component: str) -> random.Random:
+        """
+        component: Nombre del componente (RandomStreams.SHUFFLE o nombre de la clase de agente)
+        Returns: Generador dedicado al componente (siempre el mismo objeto)
+        """
+        stream = self._streams.get(component)
+        if stream is None:
+            stream_class = AntitheticRandom if self.antithetic else random.Random
+            stream = stream_class(f"{self.seed}:{component}")
+            self._streams[component] = stream
+        return stream
@@ -0,0 +1,165 @@
+"""
+Parada temprana secuencial de lotes de simulaciones
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional
+
+from .indicators import Z_95, RunningStatistics
+
+# Decisiones del test secuencial frente a la referencia
+BETTER = 'better'
+NOT_BETTER = 'not_better'
+
+# Motivos de parada
+CONFIDENCE = 'confidence'
+SEQUENTIAL_TEST = 'sequential_test'
+
+
+@dataclass(frozen=True)
+class StoppingRule:
+    """
+    Criterios para detener un lote en cuanto la estimación es suficiente.
+
+    return_ci95: Semiancho objetivo del intervalo de confianza del 95% del
+        retorno medio del SmartAgent (puntos porcentuales)
+    top10_ci95: Semiancho objetivo del intervalo de la tasa de top 10
+        (intervalo de Agresti-Coull, que no se anula con tasas de 0 o 1)
+    baseline_return: Si se indica, test secuencial de razón de
+        verosimilitudes (SPRT de Wald) del retorno medio: H0 = baseline_return
+        frente a H1 = baseline_return + min_effect, con la varianza estimada
+        en línea. Se detiene al aceptar cualquiera de las dos hipótesis.
+    min_effect: Mejora mínima (puntos porcentuales) que el test debe detectar
+    alpha / beta: Probabilidades de error de tipo I y II del test
+    min_runs: Ejecuciones mínimas antes de evaluar cualquier criterio
+
+    Si se indican objetivos de intervalo, el lote se detiene cuando se
+    cumplen todos; el test secuencial lo detiene en cuanto decide.
+    """
+    return_ci95: Optional[float] = None
+    top10_ci95: Optional[float] = None
+    baseline_return: Optional[float] = None
+    min_effect: float = 1.0
+    alpha: float = 0.05
+    beta: float = 0.2
+    min_runs: int = 10
+
+    def __post_init__(self):
+        if self.return_ci95 is None and self.top10_ci95 is None and self.baseline_return is None:
+            raise ValueError("Indica al menos un criterio de parada")
+        if any(t is not None and t <= 0 for t in (self.return_ci95, self.top10_ci95)):
+            raise ValueError("Los semianchos objetivo deben ser positivos")
+        if self.min_effect <= 0:
+            raise ValueError("min_effect debe ser positivo")
+        if not (0 < self.alpha < 1 and 0 < self.beta < 1):
+            raise ValueError("alpha y beta deben estar entre 0 y 1")
+        if self.min_runs < 2:
+            raise ValueError("Se necesitan al menos 2 ejecuciones antes de parar")
+
+
+class SequentialMonitor:
+    """
+    Estadísticas en línea de un lote y evaluación de la StoppingRule tras
+    cada resultado (en orden de run_id, para que la parada no dependa del
+    orden en que terminan los procesos).
+    """
+
+    def __init__(self, rule: StoppingRule):
+        self.rule = rule
+        self.returns = RunningStatistics()
+        self.top10 = 0
+        self.reason: Optional[str] = None
+        self.decision: Optional[str] = None
+        self._upper = math.log((1 - rule.beta) / rule.alpha)
+        self._lower = math.log(rule.beta / (1 - rule.alpha))
+
+    @property
+    def runs(self) -> int:
+        return self.returns.count
+
+    def return_ci95(self) -> float:
+        """Semiancho actual del intervalo del retorno medio"""
+        n = self.runs
+        return Z_95 * self.returns.std() / math.sqrt(n) if n > 1 else math.inf
+
+    def top10_rate(self) -> float:
+        return self.top10 / self.runs if self.runs else 0.0
+
+    def top10_ci95(self) -> float:
+        """Semiancho actual del intervalo de Agresti-Coull de la tasa de top 10"""
+        n = self.runs + 4
+        p = (self.top10 + 2) / n
+        return Z_95 * math.sqrt(p * (1 - p) / n)
+
+    def log_likelihood_ratio(self) -> float:
+        """Log-razón de verosimilitudes del SPRT (0 sin varianza estimable)"""
+        rule = self.rule
+        variance = self.returns.variance()
+        if variance <= 0:
+            return 0.0
+        delta = rule.min_effect
+        excess = self.returns.mean() - rule.baseline_return - delta / 2
+        return delta * self.runs * excess / variance
+
+    def push(self, result) -> bool:
+        """
+        Añade el resultado de una ejecución (RunResult).
+
+        Returns: True si el lote debe detenerse
+        """
+        self.returns.push(result.return_pct)
+        if result.rank <= 10:
+            self.top10 += 1
+
+        rule = self.rule
+        if self.runs < rule.min_runs:
+            return False
+
+        if rule.baseline_return is not None:
+            llr = self.log_likelihood_ratio()
+            if llr >= self._upper or llr <= self._lower:
+                self.decision = BETTER if llr >= self._upper else NOT_BETTER
+                self.reason = SEQUENTIAL_TEST
+                return True
+
+        targets = [
+            (rule.return_ci95, self.return_ci95),
+            (rule.top10_ci95, self.top10_ci95),
+        ]
+        targets = [(target, width) for target, width in targets if target is not None]
+        if targets and all(width() <= target for target, width in targets):
+            self.reason = CONFIDENCE
+            return True
+        return False
+
+
+@dataclass
+class SequentialResult:
+    """
+    results: RunResult de las ejecuciones usadas, ordenados por run_id
+    reason: Motivo de parada (CONFIDENCE, SEQUENTIAL_TEST, o None si se
+        agotaron las ejecuciones sin cumplir el criterio)
+    decision: Decisión del test secuencial (BETTER, NOT_BETTER o None)
+    mean_return_pct / return_ci95: Retorno medio y semiancho de su intervalo
+    top10_rate / top10_ci95: Tasa de top 10 y semiancho de su intervalo
+    """
+    results: List
+    reason: Optional[str]
+    decision: Optional[str]
+    mean_return_pct: float
+    return_ci95: float
+    top10_rate: float
+    top10_ci95: float
+
+    @classmethod
+    def from_monitor(cls, results: List, monitor: SequentialMonitor) -> 'SequentialResult':
+        return cls(
+            results=results,
+            reason=monitor.reason,
+            decision=monitor.decision,
+            mean_return_pct=monitor.returns.mean(),
+            return_ci95=monitor.return_ci95(),
+            top10_rate=monitor.top10_rate(),
+            top10_ci95=monitor.top10_ci95()
+        )
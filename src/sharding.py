@@ -0,0 +1,328 @@
+"""
+Simulación de varios mercados repartidos entre procesos (sharding)
+"""
+
+import math
+import multiprocessing
+import os
+import queue
+import traceback
+from array import array
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional
+
+from .config import Config
+from .simulation import Simulation
+from .vectorized_simulation import VectorizedSimulation
+
+
+# Segundos entre comprobaciones de que los procesos de los shards siguen vivos
+POLL_SECONDS = 0.5
+
+
+@dataclass(frozen=True)
+class MarketSpec:
+    """
+    Definición de uno de los mercados de una ShardedSimulation.
+
+    seed: Semilla de la simulación del mercado
+    num_random, num_trend, num_anti_trend, num_smart: Población del mercado
+    vectorized: Si True, el mercado usa VectorizedSimulation
+    """
+    seed: int
+    num_random: int = Config.NUM_RANDOM
+    num_trend: int = Config.NUM_TREND
+    num_anti_trend: int = Config.NUM_ANTI_TREND
+    num_smart: int = Config.NUM_SMART
+    vectorized: bool = False
+
+    def create(self, total_iterations: int) -> Simulation:
+        """Returns: Simulación del mercado"""
+        simulation_class = VectorizedSimulation if self.vectorized else Simulation
+        return simulation_class(
+            num_random=self.num_random,
+            num_trend=self.num_trend,
+            num_anti_trend=self.num_anti_trend,
+            num_smart=self.num_smart,
+            total_iterations=total_iterations,
+            seed=self.seed,
+            record_transactions=False
+        )
+
+
+@dataclass
+class MarketSummary:
+    """
+    Resultado de un mercado de la simulación por shards.
+
+    market_id: Posición del mercado en la lista de MarketSpec
+    statistics: Market.get_statistics() al terminar
+    smart_return_pct: Retorno medio de sus SmartAgent (0 si no tiene)
+    """
+    market_id: int
+    statistics: Dict[str, float]
+    smart_return_pct: float
+
+
+@dataclass
+class ShardedResult:
+    """
+    markets: Un MarketSummary por mercado
+    price_paths: Historial de precios de cada mercado
+    index: Índice de precios entre mercados al final de cada iteración
+    """
+    markets: List[MarketSummary]
+    price_paths: List[array]
+    index: array
+
+
+class _SharedBlock:
+    """
+    Bloque de memoria compartida con las señales entre mercados y los
+    resultados, visto como arrays de float64 sin copia:
+
+    exchange: 2 x num_markets precios relativos (doble buffer por paridad
+              de iteración, así basta una barrera por iteración)
+    paths: num_markets x (total_iterations + 1) historiales de precio
+    index: total_iterations valores del índice entre mercados
+    """
+
+    def __init__(self, num_markets: int, total_iterations: int, name: Optional[str] = None):
+        self.num_markets = num_markets
+        self.path_length = total_iterations + 1
+        doubles = 2 * num_markets + num_markets * self.path_length + total_iterations
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=doubles * 8)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.values = self.shm.buf.cast('d')
+        self._paths_start = 2 * num_markets
+        self._index_start = self._paths_start + num_markets * self.path_length
+
+    def exchange(self, iteration: int) -> memoryview:
+        start = (iteration % 2) * self.num_markets
+        return self.values[start:start + self.num_markets]
+
+    def path(self, market_id: int) -> memoryview:
+        start = self._paths_start + market_id * self.path_length
+        return self.values[start:start + self.path_length]
+
+    @property
+    def index(self) -> memoryview:
+        return self.values[self._index_start:]
+
+    def close(self):
+        # Las vistas deben liberarse antes de cerrar el segmento
+        self.values.release()
+        self.shm.close()
+
+
+def _smart_return(sim: Simulation) -> float:
+    smart_agents = sim.smart_agents
+    if not smart_agents:
+        return 0.0
+    price = sim.market.price
+    total = sum(agent.get_total_value(price) for agent in smart_agents)
+    return ((total / (len(smart_agents) * Config.INITIAL_BALANCE)) - 1) * 100
+
+
+def _advance(
+    specs: Dict[int, MarketSpec],
+    block: _SharedBlock,
+    total_iterations: int,
+    coupling: float,
+    wait: Callable[[], None]
+) -> List[MarketSummary]:
+    """
+    Avanza en paralelo los mercados de un shard, sincronizándose con el
+    resto en cada iteración mediante `wait` (una barrera).
+    """
+    simulations = {market_id: spec.create(total_iterations) for market_id, spec in specs.items()}
+    num_markets = block.num_markets
+
+    for iteration in range(total_iterations):
+        exchange = block.exchange(iteration)
+        for market_id, sim in simulations.items():
+            sim.run_iteration(iteration, close=False)
+            sim.iteration = iteration + 1
+            market = sim.market
+            exchange[market_id] = market.price / market.initial_price
+        wait()
+
+        # Índice: media geométrica de los precios relativos de todos los mercados
+        index = math.exp(sum(math.log(value) for value in exchange) / num_markets)
+        if 0 in specs:
+            block.index[iteration] = index
+        for market_id, sim in simulations.items():
+            if coupling:
+                # Contagio entre mercados: cada precio se acerca al índice
+                # antes del cierre, que así lo registra en el historial
+                sim.market.price *= (index / exchange[market_id]) ** coupling
+            sim.market.end_iteration()
+        exchange.release()
+
+    summaries = []
+    for market_id, sim in simulations.items():
+        block.path(market_id)[:] = array('d', sim.market.price_history)
+        summaries.append(MarketSummary(market_id, sim.market.get_statistics(), _smart_return(sim)))
+    return summaries
+
+
+def _shard_worker(specs, block_name, num_markets, total_iterations, coupling, barrier, results):
+    """Proceso de un shard: avanza sus mercados y envía los resúmenes"""
+    block = _SharedBlock(num_markets, total_iterations, block_name)
+    try:
+        results.put(('ok', _advance(specs, block, total_iterations, coupling, barrier.wait)))
+    except BaseException:
+        barrier.abort()  # Despierta al resto de shards con BrokenBarrierError
+        results.put(('error', traceback.format_exc()))
+    finally:
+        block.close()
+
+
+class ShardedSimulation:
+    """
+    Simula varios mercados independientes o débilmente acoplados, cada
+    uno con su propia población, repartidos entre procesos.
+
+    Los mercados avanzan en iteraciones sincronizadas (una barrera por
+    iteración). Cada mercado publica su precio relativo al inicial en un
+    bloque de memoria compartida, desde el que todos calculan el índice
+    entre mercados (media geométrica) sin pasar datos por pickle. Con
+    coupling > 0 cada precio se mueve hacia el índice antes del cierre de
+    cada iteración: price *= (índice / precio relativo) ** coupling, de
+    modo que el historial y las estadísticas registran el precio acoplado.
+
+    Los historiales de precio también se escriben en la memoria compartida;
+    por cola solo viajan los resúmenes de cada mercado.
+    """
+
+    def __init__(
+        self,
+        specs: List[MarketSpec],
+        total_iterations: int = Config.TOTAL_ITERATIONS,
+        workers: Optional[int] = None,
+        coupling: float = 0.0
+    ):
+        """
+        Args:
+            specs: Un MarketSpec por mercado
+            total_iterations: Iteraciones de todos los mercados
+            workers: Procesos (por defecto, número de CPUs, sin superar el
+                número de mercados). Con 1 se ejecuta en el proceso actual.
+            coupling: Intensidad del contagio entre mercados (0 = independientes)
+
+        Raises:
+            ValueError: Si no hay mercados o algún parámetro no es válido
+        """
+        if not specs:
+            raise ValueError("Se necesita al menos un mercado")
+        if total_iterations <= 0:
+            raise ValueError("El número de iteraciones debe ser positivo")
+        if workers is not None and workers <= 0:
+            raise ValueError("El número de procesos debe ser positivo")
+        if not 0 <= coupling <= 1:
+            raise ValueError("coupling debe estar entre 0 y 1")
+
+        self.specs = specs
+        self.total_iterations = total_iterations
+        self.workers = min(workers or os.cpu_count() or 1, len(specs))
+        self.coupling = coupling
+
+    def shards(self) -> List[Dict[int, MarketSpec]]:
+        """
+        Returns: Mercados de cada proceso ({market_id: MarketSpec}), en reparto circular
+        """
+        shards: List[Dict[int, MarketSpec]] = [{} for _ in range(self.workers)]
+        for market_id, spec in enumerate(self.specs):
+            shards[market_id % self.workers][market_id] = spec
+        return shards
+
+    def run(self) -> ShardedResult:
+        """
+        Ejecuta todos los mercados.
+
+        Raises:
+            RuntimeError: Si falla algún proceso
+        """
+        num_markets = len(self.specs)
+        block = _SharedBlock(num_markets, self.total_iterations)
+        try:
+            if self.workers == 1:
+                summaries = _advance(
+                    self.shards()[0], block, self.total_iterations, self.coupling, lambda: None
+                )
+            else:
+                summaries = self._run_processes(block)
+
+            summaries.sort(key=lambda summary: summary.market_id)
+            return ShardedResult(
+                markets=summaries,
+                price_paths=[array('d', block.path(i)) for i in range(num_markets)],
+                index=array('d', block.index)
+            )
+        finally:
+            block.close()
+            block.shm.unlink()
+
+    def _run_processes(self, block: _SharedBlock) -> List[MarketSummary]:
+        context = multiprocessing.get_context()
+        barrier = context.Barrier(self.workers)
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=_shard_worker,
+                args=(shard, block.shm.name, len(self.specs), self.total_iterations,
+                      self.coupling, barrier, results)
+            )
+            for shard in self.shards()
+        ]
+        for process in processes:
+            process.start()
+
+        summaries = []
+        errors = []
+        received = 0
+        # Un shard que termina sin enviar resultado (ej: matado por el sistema)
+        # dejaría al resto bloqueados en la barrera: se comprueba en cada espera
+        lost = False
+        while received < len(processes):
+            try:
+                status, payload = results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                exited = [process for process in processes if process.exitcode is not None]
+                if len(exited) <= received:
+                    continue
+                if not lost:
+                    # El resultado de un proceso recién terminado puede estar en camino
+                    lost = True
+                    continue
+                self._abort(processes, barrier)
+                codes = ', '.join(str(process.exitcode) for process in exited)
+                raise RuntimeError(
+                    "Un proceso de la simulación por shards terminó sin enviar "
+                    f"resultado (códigos de salida: {codes})"
+                )
+            received += 1
+            lost = False
+            if status == 'ok':
+                summaries.extend(payload)
+            else:
+                errors.append(payload)
+        for process in processes:
+            process.join()
+
+        if errors:
+            raise RuntimeError("Falló un proceso de la simulación por shards:\n" + errors[0])
+        return summaries
+
+    @staticmethod
+    def _abort(processes, barrier):
+        """Despierta a los shards bloqueados en la barrera y termina los procesos"""
+        barrier.abort()
+        for process in processes:
+            if process.exitcode is None:
+                process.terminate()
+        for process in processes:
+            process.join()
@@ -0,0 +1,182 @@
+"""
+Resultados completos de un lote de simulaciones en memoria compartida
+"""
+
+import math
+from array import array
+from collections import Counter
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+
+from .simulation import Simulation
+
+
+class PricePathAggregates:
+    """
+    Agregados entre simulaciones de historiales de precios de la misma
+    longitud. Las subclases definen num_runs, path_length y prices_at().
+    """
+
+    def mean_path(self) -> array:
+        """Returns: Precio medio de todas las simulaciones en cada iteración"""
+        n = self.num_runs
+        return array('d', (math.fsum(self.prices_at(t)) / n for t in range(self.path_length)))
+
+    def quantile_bands(self, quantiles: Sequence[float] = (0.05, 0.5, 0.95)) -> Dict[float, array]:
+        """
+        Cuantiles del precio entre simulaciones en cada iteración
+        (interpolación lineal entre observaciones ordenadas).
+
+        Returns: {cuantil: array con el valor en cada iteración}
+
+        Raises:
+            ValueError: Si algún cuantil está fuera de [0, 1]
+        """
+        if any(not 0 <= q <= 1 for q in quantiles):
+            raise ValueError("Los cuantiles deben estar entre 0 y 1")
+
+        bands = {q: array('d') for q in quantiles}
+        last = self.num_runs - 1
+        for t in range(self.path_length):
+            ordered = sorted(self.prices_at(t))
+            for q, band in bands.items():
+                position = q * last
+                low = int(position)
+                high = min(low + 1, last)
+                band.append(ordered[low] + (ordered[high] - ordered[low]) * (position - low))
+        return bands
+
+
+class SharedRunResults(PricePathAggregates):
+    """
+    Bloque de memoria compartida preasignado con los datos completos de
+    cada simulación de un lote:
+
+    prices: num_runs x (total_iterations + 1) precios (float64)
+    balances: num_runs x num_agents balances finales (float64)
+    cards: num_runs x num_agents tarjetas finales (int64)
+
+    Los procesos del pool se conectan por nombre (attach) y escriben su
+    fila con write(); el proceso principal agrega directamente sobre las
+    vistas memoryview, sin copiar ni serializar los historiales.
+
+    El proceso que crea el bloque debe liberarlo con close() (o usarlo
+    como gestor de contexto), lo que también elimina el segmento.
+    """
+
+    def __init__(
+        self,
+        num_runs: int,
+        num_agents: int,
+        total_iterations: int,
+        name: Optional[str] = None
+    ):
+        """
+        name: Segmento existente al que conectarse (None = crear uno nuevo)
+
+        Raises:
+            ValueError: Si algún tamaño no es positivo
+        """
+        if min(num_runs, num_agents, total_iterations) <= 0:
+            raise ValueError("Los tamaños del bloque deben ser positivos")
+
+        self.num_runs = num_runs
+        self.num_agents = num_agents
+        self.path_length = total_iterations + 1
+        self._owner = name is None
+
+        price_bytes = num_runs * self.path_length * 8
+        agent_bytes = num_runs * num_agents * 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=price_bytes + 2 * agent_bytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+
+        buffer = self.shm.buf
+        self.prices = buffer[:price_bytes].cast('d')
+        self.balances = buffer[price_bytes:price_bytes + agent_bytes].cast('d')
+        self.cards = buffer[price_bytes + agent_bytes:price_bytes + 2 * agent_bytes].cast('q')
+
+    @property
+    def name(self) -> str:
+        """Nombre del segmento (para attach desde otros procesos)"""
+        return self.shm.name
+
+    @classmethod
+    def attach(cls, name: str, num_runs: int, num_agents: int, total_iterations: int) -> 'SharedRunResults':
+        """Conecta con un bloque creado por otro proceso"""
+        return cls(num_runs, num_agents, total_iterations, name)
+
+    def write(self, slot: int, sim: Simulation):
+        """
+        Copia el historial de precios y el estado final de los agentes de
+        una simulación ya ejecutada en la fila `slot`.
+
+        Raises:
+            ValueError: Si la simulación no encaja en el bloque
+        """
+        prices = sim.market.price_history
+        if len(prices) != self.path_length or sim.num_agents != self.num_agents:
+            raise ValueError("La simulación no coincide con el tamaño del bloque")
+
+        start = slot * self.path_length
+        self.prices[start:start + self.path_length] = prices
+
+        start = slot * self.num_agents
+        balances = array('d')
+        cards = array('q')
+        for _, _, balance, agent_cards in sim.agent_records():
+            balances.append(balance)
+            cards.append(agent_cards)
+        self.balances[start:start + self.num_agents] = balances
+        self.cards[start:start + self.num_agents] = cards
+
+    def price_path(self, slot: int) -> memoryview:
+        """Returns: Vista del historial de precios de una simulación"""
+        start = slot * self.path_length
+        return self.prices[start:start + self.path_length]
+
+    def prices_at(self, iteration: int) -> memoryview:
+        """Returns: Vista del precio de todas las simulaciones en una iteración"""
+        return self.prices[iteration::self.path_length]
+
+    def ranks(self, agent_index: int) -> List[int]:
+        """
+        Posición por valor total final (1 = mejor) de un agente en cada
+        simulación, con el precio final de cada una.
+
+        agent_index: Posición del agente en agent_records() (los SmartAgent
+            son los últimos: num_agents - num_smart para el primero)
+        """
+        n = self.num_agents
+        ranks = []
+        for slot in range(self.num_runs):
+            price = self.prices[(slot + 1) * self.path_length - 1]
+            start = slot * n
+            balances = self.balances[start:start + n]
+            cards = self.cards[start:start + n]
+            target = balances[agent_index] + cards[agent_index] * price
+            better = sum(1 for balance, agent_cards in zip(balances, cards)
+                         if balance + agent_cards * price > target)
+            ranks.append(better + 1)
+        return ranks
+
+    def rank_distribution(self, agent_index: int) -> Dict[int, int]:
+        """
+        Returns: {posición: número de simulaciones}, ordenado por posición
+        """
+        return dict(sorted(Counter(self.ranks(agent_index)).items()))
+
+    def close(self):
+        """Libera las vistas y el segmento (lo elimina si este objeto lo creó)"""
+        for view in (self.prices, self.balances, self.cards):
+            view.release()
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+    def __enter__(self) -> 'SharedRunResults':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
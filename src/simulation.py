@@ -2,12 +2,20 @@
 Orquestación de la simulación
 """
 
-import random
-from typing import List, Tuple
+import heapq
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
 
+from .checkpoint import load_checkpoint, save_checkpoint
 from .config import Config
+from .engines import MarketEngine, MultiplicativeEngine
+from .ledger import BUY, SELL, TransactionLedger
 from .market import Market
-from .agents import Agent, RandomAgent, TrendAgent, AntiTrendAgent, SmartAgent
+from .models import Decision
+from .profiling import Profiler
+from .rng import RandomStreams
+from .sinks import AGENT_TYPES, IterationRecord, IterationSink
+from .agents import Agent, RandomAgent, TrendAgent, AntiTrendAgent, SmartAgent, SmartAgentParams
 
 
 class Simulation:
@@ -24,7 +32,13 @@ class Simulation:
         num_trend: int = Config.NUM_TREND,
         num_anti_trend: int = Config.NUM_ANTI_TREND,
         num_smart: int = Config.NUM_SMART,
-        total_iterations: int = Config.TOTAL_ITERATIONS
+        total_iterations: int = Config.TOTAL_ITERATIONS,
+        seed: Optional[int] = None,
+        record_transactions: bool = True,
+        smart_params: Optional[SmartAgentParams] = None,
+        batch_decisions: bool = False,
+        engine: Optional[MarketEngine] = None,
+        antithetic: bool = False
     ):
         """
         Inicializa la simulación.
@@ -35,102 +49,303 @@ class Simulation:
             num_anti_trend: Número de AntiTrendAgents
             num_smart: Número de SmartAgents
             total_iterations: Total de iteraciones a ejecutar
+            seed: Semilla de los generadores de la simulación (turnos y
+                uno por clase de agente). Misma semilla, misma ejecución.
+            record_transactions: Si False, no se registran transacciones
+                (ejecuciones donde solo importa el throughput)
+            smart_params: Parámetros de la estrategia de los SmartAgent
+                (por defecto, los originales)
+            batch_decisions: Si True, TrendAgent y AntiTrendAgent también
+                deciden en lote al inicio de cada iteración, con el cambio
+                de precio de inicio de iteración en lugar del de su turno.
+                Las clases con Agent.BATCH_EQUIVALENT (RandomAgent) deciden
+                siempre en lote, ya que la ejecución es la misma; el resto
+                sigue usando decide() en su turno.
+            engine: Motor de formación de precios (por defecto
+                MultiplicativeEngine, la regla de ±0.5% por operación)
+            antithetic: Si True, usa los generadores antitéticos de la
+                semilla (ver AntitheticRandom)
         
         Raises:
             ValueError: Si la configuración es inválida
         """
         # Validar configuración
+        if min(num_random, num_trend, num_anti_trend, num_smart) < 0:
+            raise ValueError("El número de agentes no puede ser negativo")
+        
         total_agents = num_random + num_trend + num_anti_trend + num_smart
-        if total_agents != 100:
-            raise ValueError(f"El total de agentes debe ser 100, actual: {total_agents}")
+        if total_agents <= 0:
+            raise ValueError(f"El total de agentes debe ser positivo, actual: {total_agents}")
         
         if total_iterations <= 0:
             raise ValueError("El número de iteraciones debe ser positivo")
         
         self.total_iterations = total_iterations
-        self.market = Market()
+        self.num_random = num_random
+        self.num_trend = num_trend
+        self.num_anti_trend = num_anti_trend
+        self.num_smart = num_smart
+        self.iteration = 0  # Iteraciones completadas (siguiente a ejecutar)
+        self.streams = RandomStreams(seed, antithetic)
+        self.seed = self.streams.seed
+        self.smart_params = smart_params
+        self.batch_decisions = batch_decisions
+        # Valores de Config leídos al crear la simulación (admite Config.override)
+        self.market = Market(Config.INITIAL_PRICE, Config.INITIAL_STOCK, capacity=total_iterations)
+        self.ledger = TransactionLedger(enabled=record_transactions)
+        self.engine = engine if engine is not None else MultiplicativeEngine()
+        self.engine.bind(self.market)
         self.agents: List[Agent] = []
+        self.smart_agents: List[SmartAgent] = []
         
-        # Crear agentes
+        self._create_agents()
+        self._class_counts = Counter(agent.__class__ for agent in self.agents)
+        # Balance inicial total por tipo; type_totals le suma el flujo neto del registro
+        counts = (num_random, num_trend, num_anti_trend, num_smart)
+        self._initial_balances = [count * Config.INITIAL_BALANCE for count in counts]
+    
+    def _create_agents(self):
+        """Crea un objeto por agente (aleatorios, tendenciales, anti-tendenciales e inteligentes)"""
         agent_id = 0
         
-        for _ in range(num_random):
-            self.agents.append(RandomAgent(agent_id))
-            agent_id += 1
-        
-        for _ in range(num_trend):
-            self.agents.append(TrendAgent(agent_id))
-            agent_id += 1
-        
-        for _ in range(num_anti_trend):
-            self.agents.append(AntiTrendAgent(agent_id))
-            agent_id += 1
+        for agent_class, count in (
+            (RandomAgent, self.num_random),
+            (TrendAgent, self.num_trend),
+            (AntiTrendAgent, self.num_anti_trend)
+        ):
+            rng = self.streams.get(agent_class.__name__)
+            self.agents.extend(
+                agent_class(i, rng, self.ledger) for i in range(agent_id, agent_id + count)
+            )
+            agent_id += count
         
-        for _ in range(num_smart):
-            self.agents.append(SmartAgent(agent_id))
-            agent_id += 1
+        self._create_smart_agents(agent_id)
+        self.agents.extend(self.smart_agents)
+    
+    def _create_smart_agents(self, first_id: int):
+        """Crea los SmartAgent con el conocimiento de la población actual"""
+        rng = self.streams.get('SmartAgent')
+        self.smart_agents = [
+            SmartAgent(
+                agent_id, rng,
+                num_random=self.num_random,
+                num_trend=self.num_trend,
+                num_anti_trend=self.num_anti_trend,
+                ledger=self.ledger,
+                params=self.smart_params
+            )
+            for agent_id in range(first_id, first_id + self.num_smart)
+        ]
+    
+    @property
+    def smart_agent(self) -> Optional[SmartAgent]:
+        """Primer SmartAgent (referencia directa), o None si no hay"""
+        return self.smart_agents[0] if self.smart_agents else None
+    
+    @property
+    def num_agents(self) -> int:
+        """Total de agentes de la simulación"""
+        return len(self.agents)
+    
+    def agent_records(self) -> Iterator[Tuple[str, int, float, int]]:
+        """
+        Returns: Iterador de (tipo, agent_id, balance, tarjetas) por agente
+        """
+        for agent in self.agents:
+            yield agent.__class__.__name__, agent.agent_id, agent.balance, agent.cards
+    
+    def type_totals(self) -> List[Tuple[float, int]]:
+        """
+        Returns: (balance total, tarjetas totales) por tipo de agente, en el
+                 orden de AGENT_TYPES. Se obtienen en O(1) del balance inicial
+                 y del flujo neto que acumula el registro en cada operación.
+        """
+        totals = []
+        for name, initial in zip(AGENT_TYPES, self._initial_balances):
+            cash, cards = self.ledger.net_flow(name)
+            totals.append((initial + cash, cards))
+        return totals
+    
+    def iteration_record(self, iteration: int, buys: int, sells: int) -> IterationRecord:
+        """
+        Returns: Registro del estado actual para la iteración indicada
+        """
+        values = [iteration, self.market.price, self.market.stock, buys, sells]
+        for balance, cards in self.type_totals():
+            values.append(balance)
+            values.append(cards)
+        return IterationRecord(*values)
+    
+    def _batch_decisions(self, iteration: int) -> Dict[type, Iterator[Decision]]:
+        """
+        Decisiones en lote de las clases que admiten Agent.decide_batch,
+        con el estado de inicio de la iteración: las de BATCH_EQUIVALENT
+        siempre y el resto solo con batch_decisions.
         
-        # Referencia directa al agente inteligente
-        self.smart_agent = self.agents[-1]
+        Returns: {clase: iterador de decisiones en orden de turno}
+        """
+        state = self.market.get_state(iteration, self.total_iterations)
+        batched = {}
+        for agent_class, count in self._class_counts.items():
+            if not (self.batch_decisions or agent_class.BATCH_EQUIVALENT):
+                continue
+            decisions = agent_class.decide_batch(state, count, self.streams.get(agent_class.__name__))
+            if decisions is not None:
+                batched[agent_class] = iter(decisions)
+        return batched
     
-    def run_iteration(self, iteration: int) -> Tuple[int, int]:
+    def run_iteration(self, iteration: int, close: bool = True) -> Tuple[int, int]:
         """
         Ejecuta una iteración completa del mercado.
         
         Args:
             iteration: Número de iteración actual
+            close: Si False, no se cierra la iteración en el mercado
+                (quien llama debe hacerlo con market.end_iteration())
         
         Returns:
             Tuple[int, int]: (número de compras, número de ventas)
         """
         # Ordenar agentes aleatoriamente para fairness
         shuffled_agents = self.agents.copy()
-        random.shuffle(shuffled_agents)
+        self.streams.get(RandomStreams.SHUFFLE).shuffle(shuffled_agents)
         
         buys = 0
         sells = 0
+        batched = self._batch_decisions(iteration)
+        
+        submit = self.engine.submit
         
         for turn, agent in enumerate(shuffled_agents):
-            market_state = self.market.get_state(iteration, self.total_iterations)
-            decision = agent.decide(market_state, turn)
+            pending = batched.get(agent.__class__)
+            if pending is not None:
+                decision = next(pending)
+            else:
+                market_state = self.market.get_state(iteration, self.total_iterations)
+                decision = agent.decide(market_state, turn)
             
             if decision == 'buy' and agent.can_buy(self.market.price):
-                if self.market.stock > 0:
-                    agent.buy(self.market.price, iteration)
-                    self.market.apply_buy()
+                price = submit(BUY, agent, agent.balance)
+                if price is not None:
+                    agent.buy(price, iteration)
                     buys += 1
             
             elif decision == 'sell' and agent.can_sell():
-                agent.sell(self.market.price, iteration)
-                self.market.apply_sell()
+                price = submit(SELL, agent)
+                if price is not None:
+                    agent.sell(price, iteration)
+                    sells += 1
+        
+        # Órdenes diferidas (subasta de fin de iteración)
+        for agent, side, price in self.engine.clear(iteration):
+            if side == BUY:
+                agent.buy(price, iteration)
+                buys += 1
+            else:
+                agent.sell(price, iteration)
                 sells += 1
         
-        self.market.volume_history.append(buys + sells)
-        self.market.end_iteration()
+        self.market.record_volume(buys + sells)
+        if close:
+            self.market.end_iteration()
         
         return buys, sells
     
-    def run(self, verbose: bool = True):
+    def run(
+        self,
+        verbose: bool = True,
+        sink: Optional[IterationSink] = None,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_every: int = 5000,
+        profiler: Optional[Profiler] = None
+    ):
         """
-        Ejecuta la simulación completa.
+        Ejecuta la simulación completa, o lo que falte de ella si se
+        restauró de un checkpoint (ver resume).
         
         Args:
             verbose: Si True, imprime información durante la ejecución
+            sink: Destino opcional de un IterationRecord por iteración.
+                Se vuelca al terminar, pero no se cierra (lo gestiona quien lo abre).
+            checkpoint_path: Si se indica, guarda ahí un checkpoint cada
+                `checkpoint_every` iteraciones y al terminar
+            checkpoint_every: Iteraciones entre checkpoints
+            profiler: Si se indica, mide el tiempo por fase; al terminar
+                imprime la tabla (si verbose) y guarda el perfil en profiler.path
         """
+        if checkpoint_path is not None and checkpoint_every <= 0:
+            raise ValueError("checkpoint_every debe ser positivo")
+        
         if verbose:
             self._print_header()
         
-        for iteration in range(self.total_iterations):
-            buys, sells = self.run_iteration(iteration)
-            
-            if verbose and (iteration + 1) % 100 == 0:
-                print(f"Iteración {iteration + 1:4d}: "
-                      f"Precio=${self.market.price:8.2f} | "
-                      f"Stock={self.market.stock:6,} | "
-                      f"Compras={buys:2d} | Ventas={sells:2d}")
+        if profiler is not None:
+            profiler.attach(self)
+        try:
+            for iteration in range(self.iteration, self.total_iterations):
+                buys, sells = self.run_iteration(iteration)
+                self.iteration = iteration + 1
+                
+                if sink is not None:
+                    sink.write(self.iteration_record(iteration, buys, sells))
+                
+                if verbose and (iteration + 1) % 100 == 0:
+                    print(f"Iteración {iteration + 1:4d}: "
+                          f"Precio=${self.market.price:8.2f} | "
+                          f"Stock={self.market.stock:6,} | "
+                          f"Compras={buys:2d} | Ventas={sells:2d}")
+                
+                if checkpoint_path is not None and self.iteration % checkpoint_every == 0:
+                    self._checkpoint_during_run(checkpoint_path, profiler)
+        finally:
+            if profiler is not None:
+                profiler.detach()
+        
+        if sink is not None:
+            sink.flush()
+        
+        if checkpoint_path is not None and self.iteration % checkpoint_every:
+            self.checkpoint(checkpoint_path)
         
         if verbose:
             self._print_results()
+        
+        if profiler is not None:
+            if verbose:
+                profiler.print_summary()
+            if profiler.path:
+                profiler.write()
+    
+    def _checkpoint_during_run(self, path: str, profiler: Optional[Profiler]):
+        """Guarda un checkpoint retirando antes la medición, si la hay"""
+        if profiler is None:
+            self.checkpoint(path)
+        else:
+            with profiler.suspended(self):
+                self.checkpoint(path)
+    
+    def checkpoint(self, path: str):
+        """
+        Guarda el estado completo de la simulación en `path` (ver save_checkpoint)
+        """
+        save_checkpoint(self, path)
+    
+    @classmethod
+    def resume(cls, path: str) -> 'Simulation':
+        """
+        Restaura una simulación desde un checkpoint. Al llamar a run() continúa
+        desde la iteración guardada y produce exactamente la misma ejecución
+        que si no se hubiera interrumpido.
+        
+        Raises:
+            ValueError: Si el fichero no es un checkpoint o es de otra clase de simulación
+        """
+        simulation = load_checkpoint(path)
+        if not isinstance(simulation, cls):
+            raise ValueError(
+                f"El checkpoint contiene una {type(simulation).__name__}, no una {cls.__name__}"
+            )
+        return simulation
     
     def _print_header(self):
         """Imprime el encabezado de la simulación"""
@@ -139,11 +354,11 @@ class Simulation:
         print("=" * 60)
         print(f"Precio inicial: ${self.market.price:.2f}")
         print(f"Stock inicial: {self.market.stock:,} unidades")
-        print(f"Total de agentes: {len(self.agents)}")
-        print(f"  - RandomAgent: {Config.NUM_RANDOM}")
-        print(f"  - TrendAgent: {Config.NUM_TREND}")
-        print(f"  - AntiTrendAgent: {Config.NUM_ANTI_TREND}")
-        print(f"  - SmartAgent: {Config.NUM_SMART}")
+        print(f"Total de agentes: {self.num_agents}")
+        print(f"  - RandomAgent: {self.num_random}")
+        print(f"  - TrendAgent: {self.num_trend}")
+        print(f"  - AntiTrendAgent: {self.num_anti_trend}")
+        print(f"  - SmartAgent: {self.num_smart}")
         print(f"Iteraciones: {self.total_iterations:,}")
         print("=" * 60)
     
@@ -155,16 +370,32 @@ class Simulation:
         
         final_price = self.market.price
         
-        # Clasificar agentes por tipo
+        # Una sola pasada: acumulados por tipo y valor total de cada agente
+        # agent_types[tipo] = [agentes, balance, tarjetas, valor, mejor, peor]
         agent_types = {
-            'RandomAgent': [],
-            'TrendAgent': [],
-            'AntiTrendAgent': [],
-            'SmartAgent': []
+            'RandomAgent': [0, 0.0, 0, 0.0, float('-inf'), float('inf')],
+            'TrendAgent': [0, 0.0, 0, 0.0, float('-inf'), float('inf')],
+            'AntiTrendAgent': [0, 0.0, 0, 0.0, float('-inf'), float('inf')],
+            'SmartAgent': [0, 0.0, 0, 0.0, float('-inf'), float('inf')]
         }
+        # Montículo de los 10 mejores: (valor, -agent_id, ...) desempata por menor ID
+        top_heap = []
         
-        for agent in self.agents:
-            agent_types[agent.__class__.__name__].append(agent)
+        for agent_type, agent_id, balance, cards in self.agent_records():
+            total_value = balance + cards * final_price
+            entry = (total_value, -agent_id, agent_type, balance, cards)
+            if len(top_heap) < 10:
+                heapq.heappush(top_heap, entry)
+            elif entry > top_heap[0]:
+                heapq.heapreplace(top_heap, entry)
+            
+            totals = agent_types[agent_type]
+            totals[0] += 1
+            totals[1] += balance
+            totals[2] += cards
+            totals[3] += total_value
+            totals[4] = max(totals[4], total_value)
+            totals[5] = min(totals[5], total_value)
         
         market_stats = self.market.get_statistics()
         print(f"\nPrecio final: ${market_stats['final_price']:.2f}")
@@ -172,35 +403,53 @@ class Simulation:
         print(f"Stock final: {market_stats['final_stock']:,} unidades")
         print(f"Precio máximo alcanzado: ${market_stats['max_price']:.2f}")
         print(f"Precio mínimo alcanzado: ${market_stats['min_price']:.2f}")
+        print(f"Precio promedio ponderado (VWAP): ${market_stats['vwap']:.2f}")
         
         print("\n" + "-" * 60)
         print("RESUMEN POR TIPO DE AGENTE")
         print("-" * 60)
         
-        for agent_type, agents in agent_types.items():
-            if not agents:
+        for agent_type, (count, balance, cards, value, best, worst) in agent_types.items():
+            if not count:
                 continue
             
-            total_values = [a.get_total_value(final_price) for a in agents]
-            
-            print(f"\n{agent_type} ({len(agents)} agentes):")
-            print(f"  Balance promedio: ${sum(a.balance for a in agents)/len(agents):.2f}")
-            print(f"  Tarjetas promedio: {sum(a.cards for a in agents)/len(agents):.1f}")
-            print(f"  Valor total promedio: ${sum(total_values)/len(total_values):.2f}")
-            print(f"  Mejor agente: ${max(total_values):.2f}")
-            print(f"  Peor agente: ${min(total_values):.2f}")
-        
-        # Detalle del SmartAgent
+            print(f"\n{agent_type} ({count} agentes):")
+            print(f"  Balance promedio: ${balance/count:.2f}")
+            print(f"  Tarjetas promedio: {cards/count:.1f}")
+            print(f"  Valor total promedio: ${value/count:.2f}")
+            print(f"  Mejor agente: ${best:.2f}")
+            print(f"  Peor agente: ${worst:.2f}")
+        
+        if self.smart_agents:
+            self._print_smart_agent_detail(final_price)
+        
+        # Ranking top 10
+        print("\n" + "-" * 60)
+        print("TOP 10 AGENTES POR VALOR TOTAL")
+        print("-" * 60)
+        top_records = sorted(top_heap, reverse=True)
+        
+        for i, (total_value, negative_id, agent_type, balance, cards) in enumerate(top_records, 1):
+            marker = "🏆" if agent_type == 'SmartAgent' else "  "
+            print(f"{marker} {i:2d}. {agent_type:<18} (ID:{-negative_id:2d}): "
+                  f"${total_value:8.2f} "
+                  f"(${balance:7.2f} + {cards:2d} tarjetas)")
+        
+        print("=" * 60)
+    
+    def _print_smart_agent_detail(self, final_price: float):
+        """Imprime el detalle del primer SmartAgent y el resumen del resto"""
         print("\n" + "-" * 60)
         print("DETALLE DEL SMARTAGENT")
         print("-" * 60)
         smart = self.smart_agent
+        smart_value = smart.get_total_value(final_price)
         print(f"Balance final: ${smart.balance:.2f}")
         print(f"Tarjetas restantes: {smart.cards}")
-        print(f"Valor total: ${smart.get_total_value(final_price):.2f}")
+        print(f"Valor total: ${smart_value:.2f}")
         print(f"Ganancia/Pérdida: ${smart.balance - Config.INITIAL_BALANCE:+.2f}")
-        print(f"Retorno: {((smart.get_total_value(final_price) / Config.INITIAL_BALANCE) - 1) * 100:+.2f}%")
-        print(f"Transacciones realizadas: {len(smart.transactions)}")
+        print(f"Retorno: {((smart_value / Config.INITIAL_BALANCE) - 1) * 100:+.2f}%")
+        print(f"Transacciones realizadas: {smart.trade_count}")
         
         if smart.cards > 0:
             print(f"\n El agente no terminó todas sus tarjetas")
@@ -208,21 +457,6 @@ class Simulation:
         else:
             print(f"\n✓ El agente terminó con 0 tarjetas (requisito cumplido)")
         
-        # Ranking top 10
-        print("\n" + "-" * 60)
-        print("TOP 10 AGENTES POR VALOR TOTAL")
-        print("-" * 60)
-        sorted_agents = sorted(
-            self.agents,
-            key=lambda a: a.get_total_value(final_price),
-            reverse=True
-        )
-        
-        for i, agent in enumerate(sorted_agents[:10], 1):
-            total_value = agent.get_total_value(final_price)
-            marker = "🏆" if isinstance(agent, SmartAgent) else "  "
-            print(f"{marker} {i:2d}. {agent.__class__.__name__:<18} (ID:{agent.agent_id:2d}): "
-                  f"${total_value:8.2f} "
-                  f"(${agent.balance:7.2f} + {agent.cards:2d} tarjetas)")
-        
-        print("=" * 60)
+        if len(self.smart_agents) > 1:
+            finished = sum(1 for a in self.smart_agents if a.cards == 0)
+            print(f"\nSmartAgents con 0 tarjetas: {finished}/{len(self.smart_agents)}")
@@ -0,0 +1,257 @@
+"""
+Salidas en streaming de los registros por iteración de la simulación
+"""
+
+import csv
+import json
+import os
+import struct
+from abc import ABC, abstractmethod
+from typing import IO, Iterator, List, NamedTuple, Optional
+
+
+# Tipos de agente agregados en cada registro, en el orden de sus columnas
+AGENT_TYPES = ('RandomAgent', 'TrendAgent', 'AntiTrendAgent', 'SmartAgent')
+
+
+class IterationRecord(NamedTuple):
+    """
+    Estado del mercado y de la población al terminar una iteración.
+
+    iteration: Número de iteración
+    price: Precio al final de la iteración
+    stock: Stock al final de la iteración
+    buys: Compras ejecutadas en la iteración
+    sells: Ventas ejecutadas en la iteración
+    *_balance / *_cards: Balance y tarjetas totales de cada tipo de agente
+    """
+    iteration: int
+    price: float
+    stock: int
+    buys: int
+    sells: int
+    random_balance: float
+    random_cards: int
+    trend_balance: float
+    trend_cards: int
+    anti_trend_balance: float
+    anti_trend_cards: int
+    smart_balance: float
+    smart_cards: int
+
+
+class IterationSink(ABC):
+    """
+    Destino de los registros por iteración de Simulation.run.
+
+    Los registros se acumulan en un buffer de `buffer_size` elementos y se
+    escriben en bloque, así que la memoria es constante sea cual sea la
+    longitud de la ejecución. flush() vuelca el buffer y el fichero para
+    que otras herramientas puedan leerlo en vivo (ej: tail -f).
+
+    Se usa como context manager: al salir se vuelca y se cierra el fichero.
+
+    Al reanudar una simulación desde un checkpoint, resume_at=sim.iteration
+    conserva los registros de las iteraciones anteriores (descarta los
+    posteriores al checkpoint, que se volverán a escribir) y continúa el
+    fichero en lugar de sobrescribirlo.
+    """
+
+    # Modo de apertura del fichero ('w' para texto, 'wb' para binario)
+    MODE = 'w'
+    # Líneas de cabecera de los formatos de texto
+    HEADER_LINES = 0
+
+    def __init__(self, path: str, buffer_size: int = 1000, resume_at: Optional[int] = None):
+        """
+        path: Ruta del fichero de salida (se sobrescribe, salvo al reanudar)
+        buffer_size: Registros acumulados entre escrituras
+        resume_at: Iteración desde la que continúa la simulación reanudada
+
+        Raises:
+            ValueError: Si buffer_size no es positivo
+        """
+        if buffer_size <= 0:
+            raise ValueError("El tamaño del buffer debe ser positivo")
+
+        self.path = path
+        self.buffer_size = buffer_size
+        self.records_written = 0
+        self._buffer: List[IterationRecord] = []
+        self.appending = resume_at is not None and os.path.exists(path) and os.path.getsize(path) > 0
+        if self.appending:
+            with open(path, 'r+b') as f:
+                f.truncate(self._resume_offset(f, resume_at))
+        newline = '' if self.MODE == 'w' else None
+        mode = self.MODE.replace('w', 'a') if self.appending else self.MODE
+        self._file: IO = open(path, mode, newline=newline)
+        self._write_header()
+
+    def _write_header(self):
+        """Escribe la cabecera del formato, si la tiene (no al continuar un fichero)"""
+
+    def _resume_offset(self, f: IO, resume_at: int) -> int:
+        """
+        Returns: Posición del primer registro con iteración >= resume_at (o
+                 de un registro final incompleto) en el fichero abierto en binario
+        """
+        offset = 0
+        if self.HEADER_LINES:
+            offset += len(f.readline())
+        for line in f:
+            try:
+                complete = line.endswith(b'\n') and self._line_iteration(line) < resume_at
+            except ValueError:
+                complete = False
+            if not complete:
+                break
+            offset += len(line)
+        return offset
+
+    @staticmethod
+    def _line_iteration(line: bytes) -> int:
+        """Iteración de una línea de un formato de texto"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def _write_batch(self, records: List[IterationRecord]):
+        """Escribe un bloque de registros en self._file"""
+
+    def write(self, record: IterationRecord):
+        """Añade un registro, escribiendo el buffer cuando se llena"""
+        buffer = self._buffer
+        buffer.append(record)
+        if len(buffer) >= self.buffer_size:
+            self._drain()
+
+    def _drain(self):
+        if self._buffer:
+            self._write_batch(self._buffer)
+            self.records_written += len(self._buffer)
+            self._buffer.clear()
+
+    def flush(self):
+        """Escribe los registros pendientes y vuelca el fichero"""
+        self._drain()
+        self._file.flush()
+
+    def close(self):
+        """Escribe los registros pendientes y cierra el fichero"""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> 'IterationSink':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class CsvSink(IterationSink):
+    """Registros como CSV con una fila de cabecera"""
+
+    HEADER_LINES = 1
+
+    def _write_header(self):
+        self._writer = csv.writer(self._file)
+        if not self.appending:
+            self._writer.writerow(IterationRecord._fields)
+
+    @staticmethod
+    def _line_iteration(line: bytes) -> int:
+        return int(line.split(b',', 1)[0])
+
+    def _write_batch(self, records: List[IterationRecord]):
+        self._writer.writerows(records)
+
+
+class JsonLinesSink(IterationSink):
+    """Registros como JSON-lines: un objeto por línea"""
+
+    @staticmethod
+    def _line_iteration(line: bytes) -> int:
+        return json.loads(line)['iteration']
+
+    def _write_batch(self, records: List[IterationRecord]):
+        dumps = json.dumps
+        self._file.write(''.join(dumps(record._asdict()) + '\n' for record in records))
+
+
+class BinarySink(IterationSink):
+    """
+    Registros binarios de tamaño fijo (RECORD, little-endian, sin cabecera),
+    empaquetados en un bytearray reutilizado. El registro i está en el
+    byte i * RECORD.size, por lo que el fichero admite acceso aleatorio.
+    """
+
+    MODE = 'wb'
+    RECORD = struct.Struct('<qdqqq' + 'dq' * len(AGENT_TYPES))
+
+    def _write_header(self):
+        self._packed = bytearray(self.RECORD.size * self.buffer_size)
+
+    def _resume_offset(self, f: IO, resume_at: int) -> int:
+        # Los registros son de iteraciones consecutivas desde la del primero
+        size = self.RECORD.size
+        first = f.read(size)
+        if len(first) < size:
+            return 0
+        complete = os.fstat(f.fileno()).st_size // size
+        return min(max(resume_at - self.RECORD.unpack(first)[0], 0), complete) * size
+
+    def _write_batch(self, records: List[IterationRecord]):
+        pack_into = self.RECORD.pack_into
+        size = self.RECORD.size
+        packed = self._packed
+        for i, record in enumerate(records):
+            pack_into(packed, i * size, *record)
+        self._file.write(memoryview(packed)[:len(records) * size])
+
+
+# Formato de salida por extensión de fichero
+SINK_FORMATS = {
+    'csv': CsvSink,
+    'jsonl': JsonLinesSink,
+    'bin': BinarySink,
+}
+
+
+def open_sink(
+    path: str,
+    fmt: Optional[str] = None,
+    buffer_size: int = 1000,
+    resume_at: Optional[int] = None
+) -> IterationSink:
+    """
+    Abre un sink para la ruta indicada.
+
+    fmt: 'csv', 'jsonl' o 'bin' (por defecto, la extensión del fichero)
+    resume_at: Iteración de la simulación reanudada (continúa el fichero,
+        ver IterationSink)
+
+    Raises:
+        ValueError: Si el formato no es conocido
+    """
+    if fmt is None:
+        fmt = path.rsplit('.', 1)[-1].lower()
+    sink_class = SINK_FORMATS.get(fmt)
+    if sink_class is None:
+        raise ValueError(f"Formato de salida desconocido: {fmt!r}")
+    return sink_class(path, buffer_size=buffer_size, resume_at=resume_at)
+
+
+def read_binary(path: str, chunk_records: int = 4096) -> Iterator[IterationRecord]:
+    """
+    Lee un fichero de BinarySink por bloques de `chunk_records` registros.
+    Un registro final incompleto (escritura en curso) se ignora.
+    """
+    record = BinarySink.RECORD
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(record.size * chunk_records)
+            usable = len(chunk) - len(chunk) % record.size
+            for values in record.iter_unpack(chunk[:usable]):
+                yield IterationRecord(*values)
+            if len(chunk) < record.size * chunk_records:
+                break
@@ -0,0 +1,328 @@
+"""
+Barrido de parámetros (rejilla o muestreo) sobre Config y SmartAgentParams
+"""
+
+import csv
+import json
+import math
+import os
+import random
+from dataclasses import asdict, dataclass, fields, replace
+from itertools import product
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .agents import SmartAgentParams
+from .cache import cache_key, open_cache
+from .config import Config
+from .indicators import Z_95, RunningStatistics
+from .monte_carlo import RunResult
+from .pool import run_pool
+from .simulation import Simulation
+from .vectorized_simulation import VectorizedSimulation
+
+
+# Nombres de los parámetros de la estrategia del SmartAgent
+SMART_PARAMETERS = tuple(f.name for f in fields(SmartAgentParams))
+
+
+def grid(space: Dict[str, Sequence]) -> List[Dict[str, object]]:
+    """
+    Producto cartesiano de los valores de cada parámetro.
+
+    space: {parámetro: valores}
+    Returns: Una celda (dict parámetro -> valor) por combinación
+    """
+    names = list(space)
+    return [dict(zip(names, values)) for values in product(*(space[n] for n in names))]
+
+
+def scale_unit(low, high, u: float):
+    """Valor en [low, high] para u en [0, 1); enteros si ambos límites lo son"""
+    if isinstance(low, int) and isinstance(high, int):
+        return min(low + int(u * (high - low + 1)), high)
+    return low + u * (high - low)
+
+
+def random_samples(
+    space: Dict[str, Tuple[float, float]],
+    n: int,
+    seed: Optional[int] = None
+) -> List[Dict[str, object]]:
+    """
+    n celdas con cada parámetro muestreado uniformemente en [low, high].
+    """
+    rng = random.Random(seed)
+    return [{name: scale_unit(low, high, rng.random()) for name, (low, high) in space.items()}
+            for _ in range(n)]
+
+
+def latin_hypercube(
+    space: Dict[str, Tuple[float, float]],
+    n: int,
+    seed: Optional[int] = None
+) -> List[Dict[str, object]]:
+    """
+    n celdas por muestreo en hipercubo latino: el rango de cada parámetro
+    se divide en n estratos y cada estrato se usa exactamente una vez.
+    """
+    rng = random.Random(seed)
+    cells: List[Dict[str, object]] = [{} for _ in range(n)]
+    for name, (low, high) in space.items():
+        strata = list(range(n))
+        rng.shuffle(strata)
+        for cell, stratum in zip(cells, strata):
+            cell[name] = scale_unit(low, high, (stratum + rng.random()) / n)
+    return cells
+
+
+def split_parameters(params: Dict[str, object]) -> Tuple[Dict[str, object], Optional[SmartAgentParams]]:
+    """
+    Separa los parámetros de una celda en valores de Config (nombres en
+    mayúsculas, ej: PRICE_INCREASE_RATE, NUM_TREND, TOTAL_ITERATIONS) y
+    parámetros de SmartAgentParams (ej: reduction_start).
+
+    Returns: (valores de Config, SmartAgentParams o None si no hay ninguno)
+
+    Raises:
+        ValueError: Si algún parámetro no existe
+    """
+    config_values = {}
+    smart_values = {}
+    for name, value in params.items():
+        if name in SMART_PARAMETERS:
+            smart_values[name] = value
+        elif name.isupper() and hasattr(Config, name):
+            config_values[name] = value
+        else:
+            raise ValueError(f"Parámetro desconocido: {name}")
+
+    smart_params = replace(SmartAgentParams(), **smart_values) if smart_values else None
+    return config_values, smart_params
+
+
+def run_replicate(
+    params: Dict[str, object],
+    replicate: int,
+    seed: int,
+    vectorized: bool = False,
+    cache_dir: Optional[str] = None,
+    antithetic: bool = False
+) -> RunResult:
+    """
+    Ejecuta una réplica de una celda con Config modificada temporalmente.
+
+    cache_dir: Directorio de una ResultCache; la clave incluye la Config
+        ya modificada y los parámetros del SmartAgent
+    antithetic: Si True, usa los generadores antitéticos de la semilla
+    """
+    config_values, smart_params = split_parameters(params)
+    simulation_class = VectorizedSimulation if vectorized else Simulation
+
+    with Config.override(**config_values):
+        if cache_dir is not None:
+            cache = open_cache(cache_dir)
+            key = cache_key(
+                engine=simulation_class.__name__, seed=seed, antithetic=antithetic,
+                smart_params=asdict(smart_params or SmartAgentParams())
+            )
+            entry = cache.get(key)
+            if entry is not None:
+                return replace(entry.result, run_id=replicate)
+
+        sim = simulation_class(
+            num_random=Config.NUM_RANDOM,
+            num_trend=Config.NUM_TREND,
+            num_anti_trend=Config.NUM_ANTI_TREND,
+            num_smart=Config.NUM_SMART,
+            total_iterations=Config.TOTAL_ITERATIONS,
+            seed=seed,
+            record_transactions=False,
+            smart_params=smart_params,
+            antithetic=antithetic
+        )
+        sim.run(verbose=False)
+        result = RunResult.from_simulation(replicate, seed, sim)
+
+    if cache_dir is not None:
+        cache.put(key, result, sim.market.price_history)
+    return result
+
+
+def _cell_key(params: Dict[str, object]) -> str:
+    """Identificador estable de una celda (independiente del orden de claves)"""
+    return json.dumps(params, sort_keys=True)
+
+
+@dataclass
+class CellSummary:
+    """
+    Resultados agregados de las réplicas de una celda del barrido.
+
+    cell_id: Posición de la celda en el barrido
+    params: Valores de los parámetros de la celda
+    runs: Réplicas completadas
+    mean_return_pct / return_ci95: Retorno medio del SmartAgent y
+        semiancho de su intervalo de confianza del 95% (aprox. normal,
+        0 con menos de dos réplicas)
+    mean_rank / rank_ci95: Ídem para el ranking del SmartAgent
+    top10_rate: Fracción de réplicas en el top 10
+    """
+    cell_id: int
+    params: Dict[str, object]
+    runs: int
+    mean_return_pct: float
+    return_ci95: float
+    mean_rank: float
+    rank_ci95: float
+    top10_rate: float
+
+    @classmethod
+    def from_results(cls, cell_id: int, params: Dict[str, object], results: List[RunResult]) -> 'CellSummary':
+        returns = RunningStatistics()
+        ranks = RunningStatistics()
+        for result in results:
+            returns.push(result.return_pct)
+            ranks.push(result.rank)
+
+        n = len(results)
+        half_width = Z_95 / math.sqrt(n) if n else 0.0
+        return cls(
+            cell_id=cell_id,
+            params=params,
+            runs=n,
+            mean_return_pct=returns.mean(),
+            return_ci95=returns.std() * half_width,
+            mean_rank=ranks.mean(),
+            rank_ci95=ranks.std() * half_width,
+            top10_rate=sum(1 for r in results if r.rank <= 10) / n if n else 0.0
+        )
+
+
+class ParameterSweep:
+    """
+    Ejecuta `replicates` simulaciones por cada celda de un barrido de
+    parámetros, repartidas entre un pool de procesos.
+
+    La réplica r de todas las celdas usa la misma semilla (derivada de la
+    semilla base igual que en MonteCarloRunner), de modo que las celdas se
+    comparan sobre las mismas secuencias aleatorias.
+
+    Si se indica results_path, cada resultado se añade a ese fichero
+    JSON-lines en cuanto termina; al volver a ejecutar el barrido las
+    réplicas ya guardadas no se repiten, así que puede detenerse y
+    reanudarse en cualquier momento.
+    """
+
+    def __init__(
+        self,
+        cells: List[Dict[str, object]],
+        replicates: int,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        vectorized: bool = False,
+        results_path: Optional[str] = None,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        cache_dir: Directorio de la caché de resultados (sin caché si es None)
+
+        Raises:
+            ValueError: Si no hay celdas, algún parámetro no existe o
+                replicates/workers no son positivos
+        """
+        if not cells:
+            raise ValueError("El barrido no tiene celdas")
+        if replicates <= 0:
+            raise ValueError("El número de réplicas debe ser positivo")
+        if workers is not None and workers <= 0:
+            raise ValueError("El número de procesos debe ser positivo")
+        for params in cells:
+            split_parameters(params)
+
+        self.cells = cells
+        self.replicates = replicates
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.vectorized = vectorized
+        self.results_path = results_path
+        self.cache_dir = cache_dir
+
+    def seeds(self) -> List[int]:
+        """
+        Returns: Semilla de cada réplica (común a todas las celdas)
+        """
+        seeder = random.Random(self.seed)
+        return [seeder.getrandbits(64) for _ in range(self.replicates)]
+
+    def _load_completed(self) -> Dict[Tuple[str, int], RunResult]:
+        """Resultados ya guardados en results_path, por (celda, réplica)"""
+        completed = {}
+        if self.results_path is None or not os.path.exists(self.results_path):
+            return completed
+
+        seeds = self.seeds()
+        with open(self.results_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Línea incompleta de una ejecución interrumpida
+                result = RunResult(**entry['result'])
+                replicate = result.run_id
+                # Solo sirven las réplicas con la semilla de este barrido
+                if replicate < len(seeds) and seeds[replicate] == result.seed:
+                    completed[(_cell_key(entry['params']), replicate)] = result
+        return completed
+
+    def run(self) -> List[CellSummary]:
+        """
+        Ejecuta las réplicas pendientes y agrega los resultados por celda.
+
+        Returns: Un CellSummary por celda, en el orden de `cells`
+        """
+        completed = self._load_completed()
+        seeds = self.seeds()
+        pending = [
+            (params, replicate, seed, self.vectorized, self.cache_dir)
+            for params in self.cells
+            for replicate, seed in enumerate(seeds)
+            if (_cell_key(params), replicate) not in completed
+        ]
+
+        output = open(self.results_path, 'a') if self.results_path else None
+        try:
+            for task, result in zip(pending, run_pool(run_replicate, pending, self.workers)):
+                completed[(_cell_key(task[0]), task[1])] = result
+                if output is not None:
+                    output.write(json.dumps({'params': task[0], 'result': asdict(result)}) + '\n')
+                    output.flush()
+        finally:
+            if output is not None:
+                output.close()
+
+        return [
+            CellSummary.from_results(cell_id, params, [
+                completed[(_cell_key(params), replicate)] for replicate in range(self.replicates)
+            ])
+            for cell_id, params in enumerate(self.cells)
+        ]
+
+    @staticmethod
+    def write_summary(summaries: List[CellSummary], path: str):
+        """
+        Guarda un CellSummary por fila, con una columna por parámetro.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        names = list(dict.fromkeys(name for s in summaries for name in s.params))
+        columns = ['mean_return_pct', 'return_ci95', 'mean_rank', 'rank_ci95', 'top10_rate']
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['cell_id', *names, 'runs', *columns])
+            for s in summaries:
+                writer.writerow([
+                    s.cell_id, *(s.params.get(name, '') for name in names), s.runs,
+                    *(f"{getattr(s, column):.4f}" for column in columns)
+                ])
@@ -0,0 +1,278 @@
+"""
+Motor vectorizado de la simulación
+"""
+
+from typing import Iterator, List, Tuple
+
+from .agents import RandomAgent, TrendAgent, AntiTrendAgent
+from .config import Config
+from .engines import MultiplicativeEngine
+from .ledger import BUY, SELL
+from .population import AgentPopulation, RANDOM, TREND, TYPE_NAMES
+from .rng import RandomStreams
+from .simulation import Simulation
+
+
+# Clase de agente de cada código de tipo de la población
+AGENT_CLASSES = (RandomAgent, TrendAgent, AntiTrendAgent)
+
+
+class VectorizedSimulation(Simulation):
+    """
+    Variante de Simulation que almacena los agentes con reglas fijas
+    en una AgentPopulation (arrays de balance, tarjetas y tipo) y sortea
+    sus decisiones en un bloque de números aleatorios por clase e iteración.
+
+    Cada bloque sale del mismo generador por clase que usa Simulation y se
+    consume en orden de turno, así que con la misma semilla ambos motores
+    producen exactamente la misma ejecución.
+
+    Los turnos se siguen resolviendo en orden barajado, aplicando cada
+    compra/venta sobre el mercado antes del siguiente turno, por lo que
+    se conserva el impacto secuencial de Market.apply_buy/apply_sell.
+    Los SmartAgent siguen siendo objetos y deciden con su método decide().
+
+    self.agents contiene únicamente los SmartAgent; el resto vive en
+    self.population.
+
+    Con batch_random=True los RandomAgent, cuya decisión no depende del
+    precio intra-iteración, se resuelven al inicio de cada iteración como
+    un lote con Market.apply_batch (O(1) en el número de operaciones) y
+    solo los agentes que leen el precio siguen jugando turnos ordenados.
+    Es una aproximación: los RandomAgent pagan/cobran el precio promedio
+    de ejecución del lote y ya no comparten orden de turnos con el resto.
+    """
+
+    def __init__(self, *args, batch_random: bool = False, **kwargs):
+        """
+        Inicializa la simulación vectorizada.
+
+        Args:
+            batch_random: Si True, liquida los RandomAgent en lote por iteración
+            *args, **kwargs: Mismos parámetros que Simulation (el motor de
+                precios debe ser MultiplicativeEngine, que aplica en línea)
+        """
+        self.batch_random = batch_random
+        super().__init__(*args, **kwargs)
+        if not isinstance(self.engine, MultiplicativeEngine):
+            raise ValueError("El motor vectorizado solo admite MultiplicativeEngine")
+
+    def _create_agents(self):
+        """Crea la población columnar y los SmartAgent como objetos"""
+        self.population = AgentPopulation(
+            self.num_random, self.num_trend, self.num_anti_trend, Config.INITIAL_BALANCE
+        )
+
+        agent_id = len(self.population)
+        self._create_smart_agents(agent_id)
+        self.agents.extend(self.smart_agents)
+        agent_id += self.num_smart
+
+        # Orden de turnos: índices < len(population) son agentes de la
+        # población, el resto son SmartAgent (agent_id - len(population)).
+        # En modo lote los RandomAgent (los primeros índices) no juegan turnos.
+        first_turn = self.num_random if self.batch_random else 0
+        self._base_order: List[int] = list(range(first_turn, agent_id))
+        self._type_streams = [self.streams.get(name).random for name in TYPE_NAMES]
+        self._ledger_codes = [self.ledger.type_code(name) for name in TYPE_NAMES]
+        self._type_counts = [
+            self.population.count(agent_type) for agent_type in range(len(TYPE_NAMES))
+        ]
+        if self.batch_random:
+            self._type_counts[RANDOM] = 0
+
+    @property
+    def num_agents(self) -> int:
+        """Total de agentes de la simulación"""
+        return len(self.population) + len(self.agents)
+
+    def agent_records(self) -> Iterator[Tuple[str, int, float, int]]:
+        """
+        Returns: Iterador de (tipo, agent_id, balance, tarjetas) por agente
+        """
+        yield from self.population.records()
+        yield from super().agent_records()
+
+    def run_iteration(self, iteration: int, close: bool = True) -> Tuple[int, int]:
+        """
+        Ejecuta una iteración completa del mercado.
+
+        Args:
+            iteration: Número de iteración actual
+            close: Si False, no se cierra la iteración en el mercado
+                (quien llama debe hacerlo con market.end_iteration())
+
+        Returns:
+            Tuple[int, int]: (número de compras, número de ventas)
+        """
+        market = self.market
+        population = self.population
+        balance = population.balance
+        cards = population.cards
+        types = population.types
+        size = len(population)
+        ledger_codes = self._ledger_codes
+        record = self.ledger.record if self.ledger.enabled else None
+        # Sin registro, el flujo neto por tipo se acumula aquí (ver TransactionLedger.record)
+        cash_flow = self.ledger.cash_flow
+        card_flow = self.ledger.card_flow
+
+        buys = 0
+        sells = 0
+        if self.batch_random:
+            buys, sells = self._run_random_batch(iteration)
+
+        order = self._base_order.copy()
+        self.streams.get(RandomStreams.SHUFFLE).shuffle(order)
+
+        if self.batch_decisions:
+            # Decisiones en lote por clase con el estado de inicio de iteración
+            state = market.get_state(iteration, self.total_iterations)
+            batched = [
+                iter(agent_class.decide_batch(state, count, self.streams.get(agent_class.__name__)))
+                for agent_class, count in zip(AGENT_CLASSES, self._type_counts)
+            ]
+        else:
+            batched = None
+            # Un sorteo en bloque por clase, consumido en orden de turno
+            draws = [
+                iter([rand() for _ in range(count)])
+                for rand, count in zip(self._type_streams, self._type_counts)
+            ]
+
+        previous_price = market.previous_price
+
+        for turn, index in enumerate(order):
+            if index >= size:
+                agent = self.agents[index - size]
+                market_state = market.get_state(iteration, self.total_iterations)
+                decision = agent.decide(market_state, turn)
+
+                if decision == 'buy' and agent.can_buy(market.price):
+                    if market.stock > 0:
+                        agent.buy(market.price, iteration)
+                        market.apply_buy()
+                        buys += 1
+
+                elif decision == 'sell' and agent.can_sell():
+                    agent.sell(market.price, iteration)
+                    market.apply_sell()
+                    sells += 1
+                continue
+
+            price = market.price
+            agent_type = types[index]
+
+            if batched is not None:
+                decision = next(batched[agent_type])
+                wants_buy = decision == 'buy'
+                wants_sell = decision == 'sell'
+            # Reglas de RandomAgent, TrendAgent y AntiTrendAgent en línea
+            elif agent_type == RANDOM:
+                draw = next(draws[agent_type])
+                wants_buy = draw < 1/3
+                wants_sell = not wants_buy and draw < 2/3
+            else:
+                draw = next(draws[agent_type])
+                if previous_price == 0:
+                    price_change = 0
+                else:
+                    price_change = (price - previous_price) / previous_price
+                if agent_type == TREND:
+                    triggered = price_change >= 0.01
+                else:
+                    triggered = price_change <= -0.01
+                wants_buy = triggered and draw < 0.75
+                wants_sell = not triggered and draw < 0.20
+
+            if wants_buy:
+                if balance[index] >= price and market.stock > 0:
+                    balance[index] -= price
+                    cards[index] += 1
+                    market.apply_buy()
+                    buys += 1
+                    if record:
+                        record(index, ledger_codes[agent_type], BUY, price, iteration)
+                    else:
+                        cash_flow[ledger_codes[agent_type]] -= price
+                        card_flow[ledger_codes[agent_type]] += 1
+
+            elif wants_sell and cards[index] > 0:
+                balance[index] += price
+                cards[index] -= 1
+                market.apply_sell()
+                sells += 1
+                if record:
+                    record(index, ledger_codes[agent_type], SELL, price, iteration)
+                else:
+                    cash_flow[ledger_codes[agent_type]] += price
+                    card_flow[ledger_codes[agent_type]] -= 1
+
+        market.record_volume(buys + sells)
+        if close:
+            market.end_iteration()
+
+        return buys, sells
+
+    def _run_random_batch(self, iteration: int) -> Tuple[int, int]:
+        """
+        Resuelve todos los RandomAgent como un único lote de operaciones.
+
+        Compran quienes sacan < 1/3 y pueden pagar el precio promedio del
+        lote; venden quienes sacan < 2/3 y tienen tarjetas.
+
+        Returns:
+            Tuple[int, int]: (compras ejecutadas, ventas ejecutadas)
+        """
+        market = self.market
+        balance = self.population.balance
+        cards = self.population.cards
+        decisions = RandomAgent.decide_batch(
+            market.get_state(iteration, self.total_iterations),
+            self.num_random,
+            self.streams.get('RandomAgent')
+        )
+
+        buyers = []
+        sellers = []
+        price = market.price
+        for index, decision in enumerate(decisions):
+            if decision == 'buy':
+                if balance[index] >= price:
+                    buyers.append(index)
+            elif decision == 'sell' and cards[index] > 0:
+                sellers.append(index)
+
+        # Descartar a quien no alcance el precio promedio de compra del lote;
+        # con menos compradores ese promedio solo puede bajar
+        fill = market.quote_batch(len(buyers), len(sellers))
+        if fill.buys:
+            buy_price = fill.buy_value / fill.buys
+            buyers = [i for i in buyers[:fill.buys] if balance[i] >= buy_price]
+
+        fill = market.apply_batch(len(buyers), len(sellers))
+        ledger = self.ledger
+        record = ledger.record if ledger.enabled else None
+        code = self._ledger_codes[RANDOM]
+        if fill.buys:
+            buy_price = fill.buy_value / fill.buys
+            for index in buyers[:fill.buys]:
+                balance[index] -= buy_price
+                cards[index] += 1
+                if record:
+                    record(index, code, BUY, buy_price, iteration)
+            if not record:
+                ledger.cash_flow[code] -= buy_price * fill.buys
+                ledger.card_flow[code] += fill.buys
+        if fill.sells:
+            sell_price = fill.sell_value / fill.sells
+            for index in sellers:
+                balance[index] += sell_price
+                cards[index] -= 1
+                if record:
+                    record(index, code, SELL, sell_price, iteration)
+            if not record:
+                ledger.cash_flow[code] += sell_price * fill.sells
+                ledger.card_flow[code] -= fill.sells
+
+        return fill.buys, fill.sells
@@ -9,11 +9,30 @@ import os
 # Agregar el directorio raíz al path para importar src
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import csv
+import json
+import multiprocessing
+import random
+import tempfile
 import unittest
+from unittest import mock
+from concurrent.futures import ProcessPoolExecutor
+from array import array
+from dataclasses import asdict
 from src import (
-    Config, MarketState, Market, Simulation,
+    Config, MarketState, Market, Simulation, VectorizedSimulation, MonteCarloRunner,
+    RandomStreams, AntitheticRandom, RollingWindow, TransactionLedger,
+    IterationRecord, open_sink, read_binary,
+    ParameterSweep, SmartAgentParams, grid, latin_hypercube,
+    ResultCache, cache_key, Profiler, OrderBookEngine,
+    StoppingRule, run_pool, stream_pool, ReplaySimulation, load_price_path, replay_many, ShardedSimulation, MarketSpec, SharedRunResults,
+    RunArchive, ArchiveWriter, archive_runs, RunResult, StrategyOptimizer, StrategyComparison,
     Agent, RandomAgent, TrendAgent, AntiTrendAgent, SmartAgent
 )
+from src.ledger import BUY, SELL
+from src import sharding
+from src.rng import REFLECTION
+from src.sinks import AGENT_TYPES
 
 
 class TestConfig(unittest.TestCase):
@@ -186,6 +205,83 @@ class TestMarket(unittest.TestCase):
         self.market.end_iteration()
         self.assertEqual(len(self.market.price_history), initial_length + 1)
     
+    def test_history_is_read_only_view(self):
+        """Test que el historial se expone como memoryview de solo lectura"""
+        history = self.market.price_history
+        self.assertIsInstance(history, memoryview)
+        with self.assertRaises(TypeError):
+            history[0] = 1.0
+    
+    def test_history_grows_beyond_capacity(self):
+        """Test que el historial crece si se superan las iteraciones previstas"""
+        market = Market(capacity=2)
+        first_view = market.price_history
+        for volume in range(5):
+            market.apply_buy()
+            market.record_volume(volume)
+            market.end_iteration()
+        
+        self.assertEqual(len(market.price_history), 6)
+        self.assertEqual(list(market.volume_history), [0, 1, 2, 3, 4])
+        self.assertEqual(market.price_history[-1], market.price)
+        self.assertEqual(list(first_view), [Config.INITIAL_PRICE])
+    
+    def test_market_state_shares_history(self):
+        """Test que MarketState comparte el historial del mercado sin copiarlo"""
+        self.market.end_iteration()
+        state = self.market.get_state(iteration=1, total_iterations=1000)
+        self.assertIs(state.price_history, self.market.price_history)
+    
+    def test_statistics_match_history(self):
+        """Test que las estadísticas acumuladas coinciden con el historial"""
+        import statistics
+        for i in range(30):
+            self.market.apply_buy() if i % 3 else self.market.apply_sell()
+            self.market.end_iteration()
+        
+        stats = self.market.get_statistics()
+        history = list(self.market.price_history)
+        self.assertEqual(stats['max_price'], max(history))
+        self.assertEqual(stats['min_price'], min(history))
+        self.assertAlmostEqual(stats['avg_price'], sum(history) / len(history), places=9)
+        self.assertAlmostEqual(stats['std_price'], statistics.stdev(history), places=9)
+        self.assertEqual(stats['num_prices'], len(history))
+        self.assertEqual(stats['total_volume'], 30)
+    
+    def test_vwap_weights_each_trade(self):
+        """Test que el VWAP promedia el precio de ejecución de cada operación"""
+        first_price = self.market.price
+        self.market.apply_buy()
+        second_price = self.market.price
+        self.market.apply_sell()
+        
+        stats = self.market.get_statistics()
+        self.assertAlmostEqual(stats['vwap'], (first_price + second_price) / 2, places=9)
+    
+    def test_apply_batch_matches_sequential_trades(self):
+        """Test que apply_batch equivale a ventas y compras una a una"""
+        sequential = Market()
+        for _ in range(7):
+            sequential.apply_sell()
+        for _ in range(12):
+            sequential.apply_buy()
+        
+        fill = self.market.apply_batch(buys=12, sells=7)
+        
+        self.assertEqual((fill.buys, fill.sells), (12, 7))
+        self.assertAlmostEqual(self.market.price, sequential.price, places=9)
+        self.assertEqual(self.market.stock, sequential.stock)
+        self.assertAlmostEqual(self.market.traded_value, sequential.traded_value, places=6)
+        self.assertAlmostEqual(fill.buy_value + fill.sell_value, sequential.traded_value, places=6)
+    
+    def test_apply_batch_clamps_buys_to_stock(self):
+        """Test que el lote no compra más tarjetas que el stock disponible"""
+        market = Market(initial_stock=3)
+        fill = market.apply_batch(buys=10, sells=2)
+        
+        self.assertEqual(fill.buys, 5)
+        self.assertEqual(market.stock, 0)
+    
     def test_get_statistics(self):
         """Test que get_statistics retorna el formato correcto"""
         stats = self.market.get_statistics()
@@ -222,6 +318,32 @@ class TestMarketState(unittest.TestCase):
         )
         change = state.price_change_percentage()
         self.assertAlmostEqual(change, -0.01, places=6)  # 1% de disminución
+    
+    def test_state_uses_slots(self):
+        """Test que MarketState no tiene __dict__ por instancia"""
+        state = MarketState(200.0, 200.0, 100000, 0, 1000)
+        self.assertFalse(hasattr(state, '__dict__'))
+    
+    def test_market_reuses_state_instance(self):
+        """Test que el mercado actualiza el mismo estado en cada turno"""
+        market = Market()
+        first = market.get_state(iteration=0, total_iterations=1000)
+        market.apply_buy()
+        second = market.get_state(iteration=0, total_iterations=1000)
+        
+        self.assertIs(first, second)
+        self.assertEqual(second.price, market.price)
+    
+    def test_price_change_cache_follows_updates(self):
+        """Test que el cambio porcentual cacheado se recalcula al cambiar los precios"""
+        state = MarketState(202.0, 200.0, 100000, 1, 1000)
+        self.assertAlmostEqual(state.price_change_percentage(), 0.01, places=9)
+        
+        state.update(202.0, 202.0, 100000, 2, 1000)
+        self.assertEqual(state.price_change_percentage(), 0)
+        
+        state.update(198.0, 200.0, 100000, 2, 1000)
+        self.assertAlmostEqual(state.price_change_percentage(), -0.01, places=9)
 
 
 class TestAgentDecisions(unittest.TestCase):
@@ -301,9 +423,54 @@ class TestSimulation(unittest.TestCase):
         self.assertEqual(len(smart_agents), 1)
     
     def test_simulation_validates_agent_count(self):
-        """Test que la simulación valida el número total de agentes"""
+        """Test que la simulación valida el número de agentes"""
+        with self.assertRaises(ValueError):
+            Simulation(num_random=-1, num_trend=24, num_anti_trend=24, num_smart=1)
         with self.assertRaises(ValueError):
-            Simulation(num_random=50, num_trend=24, num_anti_trend=24, num_smart=1)
+            Simulation(num_random=0, num_trend=0, num_anti_trend=0, num_smart=0)
+    
+    def test_population_size_is_configurable(self):
+        """Test que el total de agentes ya no está fijado en 100"""
+        sim = Simulation(num_random=510, num_trend=240, num_anti_trend=240, num_smart=10)
+        self.assertEqual(len(sim.agents), 1000)
+        self.assertEqual(len(sim.smart_agents), 10)
+        self.assertIs(sim.smart_agent, sim.smart_agents[0])
+        self.assertEqual(sim.smart_agent.num_trend, 240)
+        
+        buys, sells = sim.run_iteration(0)
+        self.assertLessEqual(buys + sells, 1000)
+    
+    def test_pressure_is_normalised_by_population(self):
+        """Test que la presión estimada no depende del tamaño de la población"""
+        default = SmartAgent(0)
+        large = SmartAgent(0, num_random=5100, num_trend=2400, num_anti_trend=2400)
+        for price in (204.0, 196.0, 200.5):
+            state = MarketState(
+                price=price, previous_price=200.0, stock=1000, iteration=50, total_iterations=100
+            )
+            self.assertAlmostEqual(
+                large._estimate_market_pressure(state), default._estimate_market_pressure(state)
+            )
+        
+        # Una subida del 2% no es presión de compra suficiente para vender
+        # con la población por defecto, tampoco con una población 100 veces mayor
+        decisions = []
+        for agent in (default, large):
+            agent.cards = 5
+            agent.avg_purchase_price = 100.0
+            state = MarketState(
+                price=204.0, previous_price=200.0, stock=1000, iteration=500, total_iterations=1000
+            )
+            decisions.append(agent.decide(state, 0))
+        self.assertEqual(decisions, ['hold', 'hold'])
+    
+    def test_multiple_smart_agents_end_with_zero_cards(self):
+        """Test que todos los SmartAgent cumplen el requisito de 0 tarjetas"""
+        sim = Simulation(num_smart=3, total_iterations=100, seed=42)
+        sim.run(verbose=False)
+        
+        self.assertEqual(sim.num_agents, 102)
+        self.assertTrue(all(a.cards == 0 for a in sim.smart_agents))
     
     def test_simulation_validates_iterations(self):
         """Test que la simulación valida iteraciones positivas"""
@@ -353,6 +520,1268 @@ class TestSmartAgentIntegration(unittest.TestCase):
         sim.run(verbose=False)
         
         self.assertGreater(len(sim.smart_agent.transactions), 0)
+        self.assertEqual(len(sim.smart_agent.transactions), sim.smart_agent.trade_count)
+
+
+class TestVectorizedSimulation(unittest.TestCase):
+    """Tests para el motor vectorizado"""
+    
+    def test_creates_population_and_smart_agent(self):
+        """Test que la población columnar y el SmartAgent suman 100 agentes"""
+        sim = VectorizedSimulation()
+        self.assertEqual(len(sim.population), 99)
+        self.assertEqual(sim.num_agents, 100)
+        self.assertIsInstance(sim.smart_agent, SmartAgent)
+        self.assertEqual(sim.smart_agent.agent_id, 99)
+    
+    def test_cards_are_conserved(self):
+        """Test que las tarjetas de los agentes coinciden con el stock vendido"""
+        sim = VectorizedSimulation(total_iterations=200)
+        sim.run(verbose=False)
+        
+        held = sum(sim.population.cards) + sim.smart_agent.cards
+        self.assertEqual(held, Config.INITIAL_STOCK - sim.market.stock)
+        self.assertTrue(all(b >= 0 for b in sim.population.balance))
+    
+    def test_smart_agent_ends_with_zero_cards(self):
+        """Test que SmartAgent termina con 0 tarjetas en el motor vectorizado"""
+        sim = VectorizedSimulation(total_iterations=100, seed=42)
+        sim.run(verbose=False)
+        
+        self.assertEqual(sim.smart_agent.cards, 0)
+    
+    def test_large_population_without_agent_objects(self):
+        """Test que una población grande no crea objetos por agente"""
+        sim = VectorizedSimulation(
+            num_random=5100, num_trend=2400, num_anti_trend=2400, num_smart=2,
+            total_iterations=5, seed=1
+        )
+        sim.run(verbose=False)
+        
+        self.assertEqual(sim.num_agents, 9902)
+        self.assertEqual(len(sim.agents), 2)
+        held = sum(sim.population.cards) + sum(a.cards for a in sim.smart_agents)
+        self.assertEqual(held, Config.INITIAL_STOCK - sim.market.stock)
+    
+    def test_batch_random_mode_conserves_cards(self):
+        """Test que el modo lote de RandomAgent conserva tarjetas y balances válidos"""
+        sim = VectorizedSimulation(total_iterations=200, seed=4, batch_random=True)
+        sim.run(verbose=False)
+        
+        held = sum(sim.population.cards) + sim.smart_agent.cards
+        self.assertEqual(held, Config.INITIAL_STOCK - sim.market.stock)
+        self.assertTrue(all(b >= 0 for b in sim.population.balance))
+        self.assertEqual(sim.smart_agent.cards, 0)
+    
+    def test_same_rng_reproduces_run(self):
+        """Test que la misma semilla produce la misma serie de precios"""
+        prices = []
+        for _ in range(2):
+            sim = VectorizedSimulation(total_iterations=50, seed=7)
+            sim.run(verbose=False)
+            prices.append(sim.market.price_history)
+        
+        self.assertEqual(prices[0], prices[1])
+
+
+class TestMonteCarloRunner(unittest.TestCase):
+    """Tests para el ejecutor de simulaciones en paralelo"""
+    
+    def test_runner_validates_num_runs(self):
+        """Test que el número de simulaciones debe ser positivo"""
+        with self.assertRaises(ValueError):
+            MonteCarloRunner(num_runs=0)
+    
+    def test_summary_requires_smart_agent(self):
+        """Test que el resumen de una simulación sin SmartAgent da un error claro"""
+        sim = Simulation(num_smart=0, total_iterations=10, seed=1)
+        sim.run(verbose=False)
+        with self.assertRaises(ValueError):
+            RunResult.from_simulation(1, 1, sim)
+    
+    def test_seeds_are_independent_and_reproducible(self):
+        """Test que cada simulación recibe una semilla distinta y reproducible"""
+        seeds = MonteCarloRunner(num_runs=5, seed=3).seeds()
+        self.assertEqual(len(set(seeds)), 5)
+        self.assertEqual(seeds, MonteCarloRunner(num_runs=5, seed=3).seeds())
+    
+    def test_pool_matches_serial_execution(self):
+        """Test que el pool de procesos produce los mismos resultados que en serie"""
+        serial = MonteCarloRunner(num_runs=3, workers=1, seed=11, total_iterations=60).run()
+        pooled = MonteCarloRunner(num_runs=3, workers=2, seed=11, total_iterations=60).run()
+        
+        self.assertEqual(serial, pooled)
+        self.assertEqual([r.run_id for r in pooled], [1, 2, 3])
+        for result in pooled:
+            self.assertGreaterEqual(result.rank, 1)
+            self.assertLessEqual(result.rank, 100)
+
+
+class TestSequentialStopping(unittest.TestCase):
+    """Tests para la parada temprana de lotes Monte Carlo"""
+    
+    def test_stops_at_target_width_reproducibly(self):
+        """Test que el lote se detiene al alcanzar el semiancho objetivo"""
+        rule = StoppingRule(return_ci95=4.0, min_runs=5)
+        serial = MonteCarloRunner(num_runs=200, workers=1, seed=3, total_iterations=100).run_sequential(rule)
+        pooled = MonteCarloRunner(num_runs=200, workers=2, seed=3, total_iterations=100).run_sequential(rule)
+        
+        self.assertEqual(serial.reason, 'confidence')
+        self.assertLess(len(serial.results), 200)
+        self.assertLessEqual(serial.return_ci95, 4.0)
+        self.assertEqual(serial, pooled)
+        self.assertEqual([r.run_id for r in serial.results], list(range(1, len(serial.results) + 1)))
+    
+    def test_sequential_test_against_baseline(self):
+        """Test del SPRT: rechaza una referencia inalcanzable"""
+        runner = MonteCarloRunner(num_runs=100, workers=1, seed=3, total_iterations=100)
+        result = runner.run_sequential(StoppingRule(baseline_return=500.0, min_effect=5.0))
+        
+        self.assertEqual((result.reason, result.decision), ('sequential_test', 'not_better'))
+        self.assertEqual(len(result.results), 10)  # Decide en cuanto llega a min_runs
+    
+    def test_exhausted_without_decision(self):
+        """Test que sin alcanzar el criterio se ejecutan todas las simulaciones"""
+        runner = MonteCarloRunner(num_runs=12, workers=1, seed=3, total_iterations=100)
+        result = runner.run_sequential(StoppingRule(return_ci95=1e-6))
+        
+        self.assertIsNone(result.reason)
+        self.assertEqual(result.results, runner.run())
+        with self.assertRaises(ValueError):
+            StoppingRule()
+
+
+class TestReplay(unittest.TestCase):
+    """Tests para la reproducción de trayectorias grabadas"""
+    
+    def setUp(self):
+        self.source = Simulation(total_iterations=200, seed=8, record_transactions=False)
+        self.source.run(verbose=False)
+        self.prices = self.source.market.price_history
+    
+    def test_path_without_trades_is_reproduced(self):
+        """Test que sin operaciones el precio sigue exactamente la grabación"""
+        # Precios fuera del alcance del balance inicial: el SmartAgent no opera
+        prices = [price * 10 for price in self.prices]
+        sim = ReplaySimulation(prices, seed=1)
+        sim.run(verbose=False)
+        
+        self.assertEqual(sim.smart_agent.trade_count, 0)
+        self.assertEqual(list(sim.market.price_history), prices)
+    
+    def test_own_trades_apply_impact(self):
+        """Test que las operaciones del SmartAgent se aplican sobre la trayectoria"""
+        sim = ReplaySimulation([200.0] * 101, seed=1)
+        sim.run(verbose=False)
+        
+        agent = sim.smart_agent
+        self.assertGreater(agent.trade_count, 0)
+        self.assertEqual(agent.cards, 0)
+        self.assertEqual(len(sim.ledger), agent.trade_count)
+        self.assertEqual(sim.num_agents, 1)
+        expected = 200.0 * sim.market.impact
+        self.assertAlmostEqual(sim.market.price, expected)
+        self.assertNotEqual(sim.market.impact, 1.0)
+    
+    def test_load_price_path(self):
+        """Test de la lectura de trayectorias de sinks y de CSV externos"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            sink_path = os.path.join(tmpdir, 'run.csv')
+            sim = Simulation(total_iterations=50, seed=8, record_transactions=False)
+            with open_sink(sink_path) as sink:
+                sim.run(verbose=False, sink=sink)
+            self.assertEqual(list(load_price_path(sink_path)), list(sim.market.price_history))
+            
+            external = os.path.join(tmpdir, 'external.csv')
+            with open(external, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['date', 'close'])
+                writer.writerows([['d1', 10.0], ['d2', 11.5], ['d3', 9.25]])
+            self.assertEqual(list(load_price_path(external, column='close')), [10.0, 11.5, 9.25])
+            with self.assertRaises(ValueError):
+                load_price_path(external)
+    
+    def test_replay_many(self):
+        """Test de la evaluación de una estrategia sobre varias trayectorias"""
+        paths = [self.prices, [200.0] * 101]
+        results = replay_many(paths, seed=3, workers=2)
+        
+        self.assertEqual([r.run_id for r in results], [0, 1])
+        self.assertEqual(results, replay_many(paths, seed=3, workers=1))
+        self.assertEqual([r.seed for r in results], [3, 4])
+        self.assertEqual(results[1].rank, 1)
+
+
+class TestRandomStreams(unittest.TestCase):
+    """Tests para los generadores aleatorios por componente"""
+    
+    def test_same_seed_same_stream(self):
+        """Test que la misma semilla y componente producen la misma secuencia"""
+        a = RandomStreams(5).get('TrendAgent')
+        b = RandomStreams(5).get('TrendAgent')
+        self.assertEqual([a.random() for _ in range(5)], [b.random() for _ in range(5)])
+    
+    def test_components_are_independent(self):
+        """Test que cada componente tiene su propia secuencia"""
+        streams = RandomStreams(5)
+        self.assertIs(streams.get('RandomAgent'), streams.get('RandomAgent'))
+        self.assertNotEqual(streams.get('RandomAgent').random(), streams.get('TrendAgent').random())
+    
+    def test_simulation_seed_reproduces_run(self):
+        """Test que la misma semilla reproduce la simulación bit a bit"""
+        runs = []
+        for _ in range(2):
+            sim = Simulation(total_iterations=80, seed=123)
+            sim.run(verbose=False)
+            runs.append((sim.market.price_history, sim.smart_agent.transactions))
+        
+        self.assertEqual(runs[0], runs[1])
+    
+    def test_engines_match_with_same_seed(self):
+        """Test que Simulation y VectorizedSimulation coinciden con la misma semilla"""
+        sim = Simulation(total_iterations=150, seed=9)
+        vec = VectorizedSimulation(total_iterations=150, seed=9)
+        sim.run(verbose=False)
+        vec.run(verbose=False)
+        
+        self.assertEqual(sim.market.price_history, vec.market.price_history)
+        self.assertEqual(list(sim.agent_records()), list(vec.agent_records()))
+    
+    def test_antithetic_streams(self):
+        """Test de los generadores antitéticos: u reflejado y permutación invertida"""
+        plain = RandomStreams(5)
+        antithetic = RandomStreams(5, antithetic=True)
+        u = [plain.get('RandomAgent').random() for _ in range(5)]
+        v = [antithetic.get('RandomAgent').random() for _ in range(5)]
+        self.assertEqual(v, [REFLECTION - x for x in u])
+        
+        # Los extremos de random() se reflejan dentro de [0, 1)
+        with mock.patch.object(random.Random, 'random', side_effect=[0.0, REFLECTION]):
+            stream = AntitheticRandom(5)
+            self.assertEqual([stream.random(), stream.random()], [REFLECTION, 0.0])
+        self.assertLess(REFLECTION, 1.0)
+        
+        order = list(range(20))
+        reversed_order = list(range(20))
+        plain.get(RandomStreams.SHUFFLE).shuffle(order)
+        antithetic.get(RandomStreams.SHUFFLE).shuffle(reversed_order)
+        self.assertEqual(reversed_order, order[::-1])
+        
+        sim = Simulation(total_iterations=120, seed=9, antithetic=True)
+        vec = VectorizedSimulation(total_iterations=120, seed=9, antithetic=True)
+        sim.run(verbose=False)
+        vec.run(verbose=False)
+        self.assertEqual(sim.market.price_history, vec.market.price_history)
+
+
+class TestStrategyComparison(unittest.TestCase):
+    """Tests para la comparación emparejada de estrategias"""
+    
+    def test_background_draws_are_common_to_strategies(self):
+        """Test que cambiar la estrategia no cambia los números de los demás agentes"""
+        streams = []
+        for params in (SmartAgentParams(), SmartAgentParams(low_threshold=1.2)):
+            sim = Simulation(total_iterations=100, seed=3, smart_params=params)
+            sim.run(verbose=False)
+            streams.append([sim.streams.get(name).getstate()
+                            for name in ('RandomAgent', 'TrendAgent', 'AntiTrendAgent',
+                                         RandomStreams.SHUFFLE)])
+        
+        self.assertEqual(streams[0], streams[1])
+    
+    def test_paired_difference(self):
+        """Test de la diferencia emparejada frente a la referencia"""
+        variants = {
+            'default': SmartAgentParams(),
+            'same': SmartAgentParams(),
+            'eager': SmartAgentParams(low_threshold=1.2),
+        }
+        with Config.override(TOTAL_ITERATIONS=100):
+            result = StrategyComparison(variants, runs=4, workers=1, seed=2, antithetic=True).run()
+        
+        self.assertEqual([v.name for v in result.variants], ['default', 'same', 'eager'])
+        same, eager = result.differences
+        self.assertEqual((same.mean_diff_pct, same.diff_ci95), (0.0, 0.0))
+        self.assertEqual(same.win_rate, 0.0)
+        self.assertFalse(same.significant)
+        self.assertEqual(eager.baseline, 'default')
+        self.assertAlmostEqual(
+            eager.mean_diff_pct, result.variants[2].mean_return_pct - result.variants[0].mean_return_pct
+        )
+        with self.assertRaises(ValueError):
+            StrategyComparison({'default': SmartAgentParams()}, runs=4)
+
+    
+    def test_iterations_travel_with_tasks(self):
+        """Test que las iteraciones no dependen de la Config del proceso que ejecuta"""
+        variants = {'default': SmartAgentParams(), 'eager': SmartAgentParams(low_threshold=1.2)}
+        with Config.override(TOTAL_ITERATIONS=100):
+            expected = StrategyComparison(variants, runs=2, workers=1, seed=6).run()
+        
+        comparison = StrategyComparison(variants, runs=2, workers=2, seed=6, total_iterations=100)
+        with Config.override(TOTAL_ITERATIONS=300):
+            self.assertEqual(comparison.run(), expected)
+        with self.assertRaises(ValueError):
+            StrategyComparison(variants, runs=2, total_iterations=0)
+
+
+class TestPool(unittest.TestCase):
+    """Tests para la ejecución de tareas en un pool de procesos"""
+    
+    def test_results_in_task_order(self):
+        """Test que el pool devuelve los resultados en el orden de las tareas"""
+        tasks = [(base, 3) for base in range(20)]
+        expected = [base ** 3 for base in range(20)]
+        for workers in (1, 2):
+            self.assertEqual(list(run_pool(pow, tasks, workers)), expected)
+            self.assertEqual(list(stream_pool(pow, tasks, workers)), expected)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(list(run_pool(pow, tasks, 2, executor)), expected)
+    
+    def test_stream_stops_early(self):
+        """Test que cerrar el iterador del stream cancela las tareas pendientes"""
+        stream = stream_pool(pow, [(base, 2) for base in range(1000)], workers=2)
+        self.assertEqual([next(stream) for _ in range(3)], [0, 1, 4])
+        stream.close()
+
+class TestRollingWindow(unittest.TestCase):
+    """Tests para la ventana móvil de indicadores"""
+    
+    def test_matches_list_slices(self):
+        """Test que promedio, mínimo, máximo y momentum coinciden con slices de la lista"""
+        import random
+        rng = random.Random(1)
+        window = RollingWindow(20)
+        values = []
+        
+        for _ in range(200):
+            value = rng.uniform(150, 250)
+            values.append(value)
+            window.push(value)
+            recent = values[-20:]
+            
+            self.assertAlmostEqual(window.mean(), sum(recent) / len(recent), places=9)
+            self.assertEqual(window.min(), min(recent))
+            self.assertEqual(window.max(), max(recent))
+            if len(values) >= 10:
+                self.assertEqual(window.momentum(10), (values[-1] - values[-10]) / values[-10])
+    
+    def test_memory_is_bounded(self):
+        """Test que la ventana no crece más allá de su tamaño"""
+        window = RollingWindow(5)
+        for value in range(100):
+            window.push(float(value))
+        
+        self.assertEqual(len(window), 5)
+        self.assertTrue(window.full)
+        self.assertEqual(window.last(), 99.0)
+        self.assertEqual(window.last(4), 95.0)
+        with self.assertRaises(IndexError):
+            window.last(5)
+    
+    def test_momentum_needs_enough_values(self):
+        """Test que el momentum es 0 mientras no hay suficientes valores"""
+        window = RollingWindow(20)
+        window.push(200.0)
+        self.assertEqual(window.momentum(10), 0)
+
+
+class TestTransactionLedger(unittest.TestCase):
+    """Tests para el registro columnar de transacciones"""
+    
+    def test_agents_share_simulation_ledger(self):
+        """Test que los agentes escriben en el registro único de la simulación"""
+        sim = Simulation(total_iterations=50, seed=3)
+        sim.run(verbose=False)
+        
+        self.assertEqual(len(sim.ledger), sum(a.trade_count for a in sim.agents))
+        self.assertEqual(len(sim.ledger), sum(sim.market.volume_history))
+        smart = sim.smart_agent
+        self.assertIs(smart.ledger, sim.ledger)
+        self.assertEqual(len(smart.transactions), smart.trade_count)
+        for side, price, iteration in smart.transactions:
+            self.assertIn(side, ('buy', 'sell'))
+            self.assertLess(iteration, 50)
+    
+    def test_aggregates_by_type_and_iteration(self):
+        """Test de la agregación por tipo de agente y por iteración"""
+        ledger = TransactionLedger()
+        random_agent = RandomAgent(0, ledger=ledger)
+        trend_agent = TrendAgent(1, ledger=ledger)
+        random_agent.buy(200.0, iteration=0)
+        trend_agent.buy(201.0, iteration=0)
+        random_agent.sell(205.0, iteration=2)
+        
+        summary = ledger.summary_by_type()
+        self.assertEqual(summary['RandomAgent']['buys'], 1)
+        self.assertEqual(summary['RandomAgent']['sells'], 1)
+        self.assertAlmostEqual(summary['RandomAgent']['sell_value'], 205.0)
+        self.assertEqual(summary['TrendAgent']['buys'], 1)
+        
+        buys, sells = ledger.flow_by_iteration()
+        self.assertEqual(list(buys), [2, 0, 0])
+        self.assertEqual(list(sells), [0, 0, 1])
+        buys, _ = ledger.flow_by_iteration(agent_type='TrendAgent')
+        self.assertEqual(list(buys), [1, 0, 0])
+        self.assertEqual(random_agent.transactions, [('buy', 200.0, 0), ('sell', 205.0, 2)])
+    
+    def test_views_share_agent_index(self):
+        """Test que las vistas usan un índice común que se amplía una sola vez"""
+        ledger = TransactionLedger()
+        code = ledger.type_code('RandomAgent')
+        views = [ledger.view(agent_id) for agent_id in range(3)]
+        for row in range(9):
+            ledger.record(row % 3, code, BUY, 100.0 + row, row)
+        
+        self.assertEqual(len(views[0]), 3)
+        self.assertEqual(ledger._indexed, 9)
+        self.assertEqual(views[1][-1], ('buy', 107.0, 7))
+        
+        ledger.record(2, code, SELL, 50.0, 9)
+        self.assertEqual(len(views[0]), 3)
+        self.assertEqual(views[2][-1], ('sell', 50.0, 9))
+        self.assertEqual(ledger._indexed, 10)
+        self.assertEqual(len(ledger.view(7)), 0)
+    
+    def test_vectorized_engine_records_population_trades(self):
+        """Test que el motor vectorizado registra las operaciones de la población"""
+        sim = Simulation(total_iterations=40, seed=8)
+        vec = VectorizedSimulation(total_iterations=40, seed=8)
+        sim.run(verbose=False)
+        vec.run(verbose=False)
+        
+        self.assertEqual(sim.ledger.summary_by_type(), vec.ledger.summary_by_type())
+    
+    def test_disabled_ledger_keeps_trade_counts(self):
+        """Test que sin registro no se guardan filas pero se cuentan operaciones"""
+        sim = Simulation(total_iterations=100, seed=42, record_transactions=False)
+        sim.run(verbose=False)
+        
+        self.assertEqual(len(sim.ledger), 0)
+        self.assertGreater(sim.smart_agent.trade_count, 0)
+
+
+class TestIterationSinks(unittest.TestCase):
+    """Tests para la salida en streaming por iteración"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+    
+    def _run_to(self, filename, simulation_class=Simulation, buffer_size=7):
+        path = os.path.join(self.tmpdir.name, filename)
+        sim = simulation_class(total_iterations=30, seed=5)
+        with open_sink(path, buffer_size=buffer_size) as sink:
+            sim.run(verbose=False, sink=sink)
+            self.assertEqual(sink.records_written, 30)
+        return sim, path
+    
+    def test_binary_round_trip(self):
+        """Test que los registros binarios se leen tal como se escribieron"""
+        sim, path = self._run_to('run.bin')
+        records = list(read_binary(path, chunk_records=4))
+        
+        self.assertEqual(len(records), 30)
+        self.assertEqual([r.iteration for r in records], list(range(30)))
+        last = records[-1]
+        self.assertEqual(last.price, sim.market.price)
+        self.assertEqual(last.stock, sim.market.stock)
+        self.assertEqual(last.smart_cards, sim.smart_agent.cards)
+        self.assertEqual(sum(r.buys + r.sells for r in records), sum(sim.market.volume_history))
+    
+    def test_text_formats_match_binary(self):
+        """Test que CSV y JSON-lines contienen los mismos registros"""
+        _, bin_path = self._run_to('run.bin')
+        _, csv_path = self._run_to('run.csv')
+        _, jsonl_path = self._run_to('run.jsonl')
+        expected = [r._asdict() for r in read_binary(bin_path)]
+        
+        with open(csv_path, newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(list(rows[0]), list(IterationRecord._fields))
+        self.assertEqual([int(row['buys']) for row in rows], [r['buys'] for r in expected])
+        self.assertEqual([float(row['price']) for row in rows], [r['price'] for r in expected])
+        
+        with open(jsonl_path) as f:
+            self.assertEqual([json.loads(line) for line in f], expected)
+    
+    def test_engines_emit_identical_records(self):
+        """Test que ambos motores emiten los mismos agregados por tipo"""
+        _, objects_path = self._run_to('objects.bin')
+        _, vectorized_path = self._run_to('vectorized.bin', VectorizedSimulation)
+        
+        self.assertEqual(list(read_binary(objects_path)), list(read_binary(vectorized_path)))
+    
+    def test_type_totals_match_agents(self):
+        """Test que los totales incrementales por tipo coinciden con los agentes"""
+        engines = ((Simulation, {}), (VectorizedSimulation, {}), (VectorizedSimulation, {'batch_random': True}))
+        for simulation_class, kwargs in engines:
+            for record_transactions in (False, True):
+                sim = simulation_class(
+                    total_iterations=40, seed=8, record_transactions=record_transactions, **kwargs
+                )
+                sim.run(verbose=False)
+                expected = {name: [0.0, 0] for name in AGENT_TYPES}
+                for name, _, balance, cards in sim.agent_records():
+                    expected[name][0] += balance
+                    expected[name][1] += cards
+                for name, (balance, cards) in zip(AGENT_TYPES, sim.type_totals()):
+                    self.assertAlmostEqual(balance, expected[name][0], places=6)
+                    self.assertEqual(cards, expected[name][1])
+    
+    def test_resume_appends_to_sink(self):
+        """Test que al reanudar el sink continúa el fichero desde el checkpoint"""
+        checkpoint_path = os.path.join(self.tmpdir.name, 'run.ckpt')
+        _, reference_path = self._run_to('reference.bin')
+        expected = list(read_binary(reference_path))
+        for filename in ('run.bin', 'run.csv', 'run.jsonl'):
+            path = os.path.join(self.tmpdir.name, filename)
+            sim = Simulation(total_iterations=30, seed=5)
+            with open_sink(path, buffer_size=7) as sink:
+                with self.assertRaises(KeyboardInterrupt):
+                    sim.run(verbose=False, sink=_CrashingSink(22, sink),
+                            checkpoint_path=checkpoint_path, checkpoint_every=10)
+            
+            resumed = Simulation.resume(checkpoint_path)
+            self.assertEqual(resumed.iteration, 20)
+            with open_sink(path, buffer_size=7, resume_at=resumed.iteration) as sink:
+                self.assertTrue(sink.appending)
+                resumed.run(verbose=False, sink=sink)
+            
+            if filename.endswith('.bin'):
+                records = [r._asdict() for r in read_binary(path)]
+            elif filename.endswith('.csv'):
+                with open(path, newline='') as f:
+                    records = list(csv.DictReader(f))
+                self.assertEqual([int(row['iteration']) for row in records], list(range(30)))
+                records = [{'iteration': int(row['iteration']), 'price': float(row['price'])} for row in records]
+            else:
+                with open(path) as f:
+                    records = [json.loads(line) for line in f]
+            self.assertEqual([r['iteration'] for r in records], list(range(30)))
+            self.assertEqual([r['price'] for r in records], [r.price for r in expected])
+    
+    def test_unknown_format(self):
+        """Test que un formato desconocido produce error"""
+        with self.assertRaises(ValueError):
+            open_sink(os.path.join(self.tmpdir.name, 'run.xlsx'))
+
+
+class _CrashingSink:
+    """Sink que simula una caída del proceso en una iteración dada"""
+    
+    def __init__(self, crash_at, inner=None):
+        self.crash_at = crash_at
+        self.inner = inner
+    
+    def write(self, record):
+        if record.iteration == self.crash_at:
+            raise KeyboardInterrupt
+        if self.inner is not None:
+            self.inner.write(record)
+    
+    def flush(self):
+        if self.inner is not None:
+            self.inner.flush()
+
+
+class TestCheckpoint(unittest.TestCase):
+    """Tests para checkpoints y reanudación de simulaciones"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'run.ckpt')
+    
+    def _assert_resume_matches(self, simulation_class, **kwargs):
+        reference = simulation_class(total_iterations=120, seed=21, **kwargs)
+        reference.run(verbose=False)
+        
+        interrupted = simulation_class(total_iterations=120, seed=21, **kwargs)
+        with self.assertRaises(KeyboardInterrupt):
+            interrupted.run(
+                verbose=False, sink=_CrashingSink(70),
+                checkpoint_path=self.path, checkpoint_every=25
+            )
+        
+        resumed = simulation_class.resume(self.path)
+        self.assertEqual(resumed.iteration, 50)
+        resumed.run(verbose=False)
+        
+        self.assertEqual(list(resumed.market.price_history), list(reference.market.price_history))
+        self.assertEqual(resumed.market.get_statistics(), reference.market.get_statistics())
+        self.assertEqual(list(resumed.agent_records()), list(reference.agent_records()))
+        self.assertEqual(resumed.smart_agent.avg_purchase_price, reference.smart_agent.avg_purchase_price)
+        self.assertEqual(resumed.smart_agent.transactions, reference.smart_agent.transactions)
+    
+    def test_resume_is_bit_identical(self):
+        """Test que reanudar desde un checkpoint reproduce la ejecución completa"""
+        self._assert_resume_matches(Simulation)
+    
+    def test_resume_vectorized(self):
+        """Test de reanudación con el motor vectorizado en modo lote"""
+        self._assert_resume_matches(VectorizedSimulation, batch_random=True)
+    
+    def test_resume_keeps_shared_references(self):
+        """Test que los agentes siguen compartiendo generador y registro"""
+        Simulation(total_iterations=10, seed=2).run(verbose=False, checkpoint_path=self.path)
+        sim = Simulation.resume(self.path)
+        
+        self.assertEqual(sim.iteration, 10)
+        self.assertIs(sim.agents[0].rng, sim.streams.get('RandomAgent'))
+        self.assertIs(sim.smart_agent.ledger, sim.ledger)
+        self.assertEqual(sim.market.get_state(0, 10).price_history, sim.market.price_history)
+    
+    def _segment_files(self):
+        return [name for name in os.listdir(self.tmpdir.name) if name.endswith('.seg')]
+    
+    def test_checkpoints_append_only_new_history(self):
+        """Test que cada checkpoint añade solo los tramos nuevos del historial"""
+        sim = Simulation(total_iterations=300, seed=4)
+        sizes = []
+        for iteration in range(300):
+            sim.run_iteration(iteration)
+            sim.iteration = iteration + 1
+            if sim.iteration % 100 == 0:
+                sim.checkpoint(self.path)
+                segments = os.path.join(self.tmpdir.name, self._segment_files()[0])
+                sizes.append((os.path.getsize(self.path), os.path.getsize(segments)))
+        
+        self.assertEqual(len(self._segment_files()), 1)
+        # El estado pequeño no crece con el historial
+        self.assertLess(sizes[-1][0], sizes[0][0] * 1.5)
+        # Los tramos crecen con lo nuevo: precios, volúmenes y transacciones
+        new_bytes = 100 * 16 + sum(sim.market.volume_history[200:]) * 26
+        self.assertEqual(sizes[2][1] - sizes[1][1], new_bytes)
+        
+        resumed = Simulation.resume(self.path)
+        self.assertEqual(list(resumed.market.price_history), list(sim.market.price_history))
+        self.assertEqual(resumed.smart_agent.transactions, sim.smart_agent.transactions)
+    
+    def test_interrupted_save_keeps_previous_checkpoint(self):
+        """Test que unos tramos escritos sin completar el checkpoint se descartan"""
+        sim = Simulation(total_iterations=60, seed=9)
+        sim.run(verbose=False, checkpoint_path=self.path, checkpoint_every=30)
+        segments = os.path.join(self.tmpdir.name, self._segment_files()[0])
+        with open(segments, 'ab') as f:
+            f.write(b'\xff' * 40)  # Guardado interrumpido antes de reemplazar el checkpoint
+        
+        resumed = Simulation.resume(self.path)
+        self.assertEqual(list(resumed.market.price_history), list(sim.market.price_history))
+        resumed.total_iterations = 90
+        resumed.run(verbose=False, checkpoint_path=self.path, checkpoint_every=30)
+        
+        again = Simulation.resume(self.path)
+        self.assertEqual(again.iteration, 90)
+        self.assertEqual(list(again.market.price_history), list(resumed.market.price_history))
+        
+        # Otra simulación en la misma ruta reemplaza también los tramos
+        Simulation(total_iterations=10, seed=1).run(verbose=False, checkpoint_path=self.path)
+        self.assertEqual(len(self._segment_files()), 1)
+        self.assertEqual(Simulation.resume(self.path).iteration, 10)
+    
+    def test_invalid_checkpoint(self):
+        """Test que un fichero ajeno o de otra clase se rechaza"""
+        with open(self.path, 'wb') as f:
+            f.write(b'not a checkpoint')
+        with self.assertRaises(ValueError):
+            Simulation.resume(self.path)
+        
+        Simulation(total_iterations=5, seed=2).run(verbose=False, checkpoint_path=self.path)
+        with self.assertRaises(ValueError):
+            VectorizedSimulation.resume(self.path)
+
+
+class TestParameterSweep(unittest.TestCase):
+    """Tests para el barrido de parámetros"""
+    
+    def test_grid_and_latin_hypercube(self):
+        """Test de la generación de celdas"""
+        cells = grid({'PRICE_INCREASE_RATE': [0.004, 0.006], 'NUM_TREND': [10, 20, 30]})
+        self.assertEqual(len(cells), 6)
+        self.assertIn({'PRICE_INCREASE_RATE': 0.006, 'NUM_TREND': 20}, cells)
+        
+        samples = latin_hypercube({'reduction_start': (0.6, 0.8), 'NUM_TREND': (0, 9)}, 10, seed=1)
+        strata = sorted(int((cell['reduction_start'] - 0.6) / 0.02) for cell in samples)
+        self.assertEqual(strata, list(range(10)))
+        self.assertEqual(sorted(cell['NUM_TREND'] for cell in samples), list(range(10)))
+    
+    def test_config_override_restores_values(self):
+        """Test que Config.override restaura los valores al salir"""
+        with Config.override(PRICE_INCREASE_RATE=0.01, TOTAL_ITERATIONS=10):
+            self.assertEqual(Config.PRICE_INCREASE_RATE, 0.01)
+        self.assertEqual(Config.PRICE_INCREASE_RATE, 0.005)
+        self.assertEqual(Config.TOTAL_ITERATIONS, 1000)
+        with self.assertRaises(ValueError):
+            with Config.override(NOT_A_SETTING=1):
+                pass
+    
+    def test_default_params_reproduce_strategy(self):
+        """Test que los parámetros por defecto no cambian la ejecución"""
+        default = Simulation(total_iterations=200, seed=4)
+        explicit = Simulation(total_iterations=200, seed=4, smart_params=SmartAgentParams())
+        tuned = Simulation(total_iterations=200, seed=4, smart_params=SmartAgentParams(low_threshold=1.2))
+        for sim in (default, explicit, tuned):
+            sim.run(verbose=False)
+        
+        self.assertEqual(list(default.market.price_history), list(explicit.market.price_history))
+        self.assertNotEqual(list(default.market.price_history), list(tuned.market.price_history))
+    
+    def test_sweep_aggregates_and_resumes(self):
+        """Test que el barrido agrega por celda y no repite réplicas guardadas"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'runs.jsonl')
+            cells = grid({'TOTAL_ITERATIONS': [100], 'reduction_start': [0.6, 0.7]})
+            
+            partial = ParameterSweep(cells[:1], replicates=3, workers=1, seed=9, results_path=path)
+            partial.run()
+            sweep = ParameterSweep(cells, replicates=3, workers=1, seed=9, results_path=path)
+            summaries = sweep.run()
+            with open(path) as f:
+                self.assertEqual(len(f.readlines()), 6)
+            
+            self.assertEqual([s.runs for s in summaries], [3, 3])
+            self.assertEqual(summaries, ParameterSweep(cells, replicates=3, workers=1, seed=9).run())
+            self.assertGreaterEqual(summaries[0].return_ci95, 0)
+            with self.assertRaises(ValueError):
+                ParameterSweep([{'unknown': 1}], replicates=1)
+
+
+def _fill_cache(task: tuple) -> int:
+    """Escribe entradas en una caché compartida desde un proceso del pool"""
+    directory, max_bytes, worker, count, barrier = task
+    cache = ResultCache(directory, max_bytes=max_bytes)
+    for i in range(count):
+        cache.put(f"{worker:02d}{i:04d}" * 10 + 'ab' * 2, 'x' * 1000)
+        if i == 0:
+            barrier.wait()  # Todos miden el directorio antes de que crezca
+    return count
+
+
+class TestResultCache(unittest.TestCase):
+    """Tests para la caché de resultados"""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+    
+    def test_key_depends_on_config_and_parts(self):
+        """Test que la clave cambia con la Config y los parámetros de la ejecución"""
+        key = cache_key(engine='Simulation', seed=1)
+        self.assertEqual(key, cache_key(seed=1, engine='Simulation'))
+        self.assertNotEqual(key, cache_key(engine='Simulation', seed=2))
+        with Config.override(PRICE_DECREASE_RATE=0.006):
+            self.assertNotEqual(key, cache_key(engine='Simulation', seed=1))
+    
+    def test_round_trip_with_prices(self):
+        """Test que se recupera el resumen y el historial de precios"""
+        cache = ResultCache(self.tmpdir.name, store_prices=True)
+        sim = Simulation(total_iterations=20, seed=1)
+        sim.run(verbose=False)
+        
+        self.assertIsNone(cache.get('ab' * 32))
+        cache.put('ab' * 32, {'final_price': sim.market.price}, sim.market.price_history)
+        entry = cache.get('ab' * 32)
+        
+        self.assertEqual(entry.result, {'final_price': sim.market.price})
+        self.assertEqual(list(entry.prices), list(sim.market.price_history))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    
+    def test_evicts_least_recently_used(self):
+        """Test que al superar el tamaño máximo se eliminan las entradas más antiguas"""
+        probe = ResultCache(os.path.join(self.tmpdir.name, 'probe'))
+        probe.put('00' * 32, 'x' * 1000)
+        entry_size = probe.size()
+        
+        cache = ResultCache(self.tmpdir.name, max_bytes=int(entry_size * 3.5))
+        keys = [f"{i:02d}" * 32 for i in range(4)]
+        for i, key in enumerate(keys[:3]):
+            cache.put(key, 'x' * 1000)
+            os.utime(cache._path(key), (i, i))
+        cache.get(keys[0])  # Uso reciente: la más antigua pasa a ser keys[1]
+        cache.put(keys[3], 'x' * 1000)
+        
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[3]))
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+    
+    def test_size_bound_with_pool_workers(self):
+        """Test que varios procesos escribiendo a la vez respetan el tamaño máximo"""
+        probe = ResultCache(os.path.join(self.tmpdir.name, 'probe'))
+        probe.put('00' * 32, 'x' * 1000)
+        entry_size = probe.size()
+        
+        workers = 4
+        directory = os.path.join(self.tmpdir.name, 'shared')
+        max_bytes = entry_size * 40
+        with multiprocessing.Manager() as manager:
+            barrier = manager.Barrier(workers)
+            tasks = [(directory, max_bytes, worker, 30, barrier) for worker in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                self.assertEqual(sum(executor.map(_fill_cache, tasks)), 120)
+        
+        self.assertLessEqual(ResultCache(directory).size(), max_bytes + workers * entry_size)
+    
+    def test_monte_carlo_reuses_cached_runs(self):
+        """Test que un lote repetido se sirve desde la caché con los mismos resultados"""
+        cache_dir = os.path.join(self.tmpdir.name, 'cache')
+        kwargs = dict(num_runs=3, workers=1, seed=5, total_iterations=50, cache_dir=cache_dir)
+        first = MonteCarloRunner(**kwargs).run()
+        
+        self.assertEqual(len(ResultCache(cache_dir)), 3)
+        self.assertEqual(MonteCarloRunner(**kwargs).run(), first)
+        self.assertEqual(MonteCarloRunner(num_runs=3, workers=1, seed=5, total_iterations=50).run(), first)
+
+
+class TestProfiler(unittest.TestCase):
+    """Tests para la instrumentación por fase"""
+    
+    def test_profiled_run_matches_plain_run(self):
+        """Test que medir no cambia la ejecución y se retira al terminar"""
+        profiler = Profiler()
+        profiled = Simulation(total_iterations=50, seed=6)
+        profiled.run(verbose=False, profiler=profiler)
+        plain = Simulation(total_iterations=50, seed=6)
+        plain.run(verbose=False)
+        
+        self.assertEqual(list(profiled.agent_records()), list(plain.agent_records()))
+        self.assertNotIn('decide', vars(profiled.agents[0]))
+        self.assertNotIn('get_state', vars(profiled.market))
+    
+    def test_phases_and_counts(self):
+        """Test de las fases medidas y sus contadores"""
+        profiler = Profiler()
+        sim = Simulation(total_iterations=20, seed=6)
+        sim.run(verbose=False, profiler=profiler)
+        
+        self.assertEqual(profiler.phases['iteration'][0], 20)
+        self.assertEqual(profiler.phases['shuffle'][0], 20)
+        # Los RandomAgent deciden en lote con un único estado por iteración
+        individual = sim.num_agents - sim.num_random
+        self.assertEqual(profiler.phases['market.get_state'][0], 20 * (individual + 1))
+        self.assertEqual(profiler.phases['decide.batch'][0], 20)
+        self.assertEqual(profiler.phases['decide.RandomAgent'][0], 0)
+        self.assertEqual(profiler.phases['decide.TrendAgent'][0], 20 * sim.num_trend)
+        self.assertEqual(profiler.phases['trade.market'][0], sum(sim.market.volume_history))
+        self.assertEqual(profiler.phases['market.history'][0], 40)
+        
+        summary = profiler.summary()
+        self.assertIn('other', [phase for phase, _, _ in summary])
+        self.assertAlmostEqual(sum(seconds for _, _, seconds in summary), profiler.total_seconds)
+    
+    def test_profile_file_with_checkpoints(self):
+        """Test que el perfil se guarda en JSON y convive con los checkpoints"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            profiler = Profiler(os.path.join(tmpdir, 'profile.json'))
+            sim = VectorizedSimulation(total_iterations=30, seed=6)
+            sim.run(
+                verbose=False, profiler=profiler,
+                checkpoint_path=os.path.join(tmpdir, 'run.ckpt'), checkpoint_every=10
+            )
+            
+            with open(profiler.path) as f:
+                document = json.load(f)
+            self.assertEqual(document['iterations'], 30)
+            self.assertIn('decide.SmartAgent', [p['phase'] for p in document['phases']])
+            self.assertEqual(VectorizedSimulation.resume(os.path.join(tmpdir, 'run.ckpt')).iteration, 30)
+
+
+class TestDecideBatch(unittest.TestCase):
+    """Tests para las decisiones en lote (Agent.decide_batch)"""
+    
+    def test_random_batch_matches_individual_decisions(self):
+        """Test que RandomAgent.decide_batch equivale a n llamadas a decide()"""
+        state = MarketState(200.0, 200.0, 100000, 0, 1000)
+        agent = RandomAgent(0, random.Random(3))
+        expected = [agent.decide(state, turn) for turn in range(50)]
+        
+        self.assertEqual(RandomAgent.decide_batch(state, 50, random.Random(3)), expected)
+    
+    def test_trend_batch_uses_state_change(self):
+        """Test que las reglas en lote usan el cambio de precio del estado"""
+        rising = MarketState(204.0, 200.0, 100000, 0, 1000)
+        falling = MarketState(196.0, 200.0, 100000, 0, 1000)
+        
+        self.assertEqual(set(TrendAgent.decide_batch(rising, 200, random.Random(1))), {'buy', 'hold'})
+        self.assertEqual(set(TrendAgent.decide_batch(falling, 200, random.Random(1))), {'sell', 'hold'})
+        self.assertEqual(set(AntiTrendAgent.decide_batch(falling, 200, random.Random(1))), {'buy', 'hold'})
+        self.assertIsNone(SmartAgent.decide_batch(rising, 1, random.Random(1)))
+    
+    def test_random_population_is_unchanged(self):
+        """Test que con solo RandomAgent y SmartAgent el lote no cambia la ejecución"""
+        kwargs = dict(num_random=60, num_trend=0, num_anti_trend=0, total_iterations=100, seed=4)
+        batched = Simulation(batch_decisions=True, **kwargs)
+        individual = Simulation(**kwargs)
+        batched.run(verbose=False)
+        individual.run(verbose=False)
+        
+        self.assertEqual(list(batched.agent_records()), list(individual.agent_records()))
+    
+    def test_random_agents_batch_by_default(self):
+        """Test que RandomAgent decide en lote sin batch_decisions y los tendenciales no"""
+        sim = Simulation(total_iterations=1, seed=4)
+        batched = sim._batch_decisions(0)
+        
+        self.assertEqual(set(batched), {RandomAgent})
+        self.assertEqual(len(list(batched[RandomAgent])), sim.num_random)
+        
+        sim = Simulation(total_iterations=1, seed=4, batch_decisions=True)
+        self.assertEqual(set(sim._batch_decisions(0)), {RandomAgent, TrendAgent, AntiTrendAgent})
+    
+
+        """Test que ambos motores producen la misma ejecución con decisiones en lote"""
+        objects = Simulation(total_iterations=150, seed=12, batch_decisions=True)
+        vectorized = VectorizedSimulation(total_iterations=150, seed=12, batch_decisions=True)
+        objects.run(verbose=False)
+        vectorized.run(verbose=False)
+        
+        self.assertEqual(list(objects.market.price_history), list(vectorized.market.price_history))
+        self.assertEqual(list(objects.agent_records()), list(vectorized.agent_records()))
+
+
+class TestOrderBookEngine(unittest.TestCase):
+    """Tests para el motor de libro de órdenes"""
+    
+    def setUp(self):
+        self.market = Market()
+        self.engine = OrderBookEngine(aggression=0.01, dealer_levels=0)
+        self.engine.bind(self.market)
+    
+    def test_orders_wait_for_auction(self):
+        """Test que las órdenes no se ejecutan hasta la subasta"""
+        self.assertIsNone(self.engine.submit(BUY, 'a'))
+        self.assertEqual(len(self.engine), 1)
+        self.assertEqual(self.market.price, 200.0)
+    
+    def test_uniform_price_with_price_time_priority(self):
+        """Test de la subasta: precio único y prioridad precio-tiempo"""
+        engine = self.engine
+        engine.submit(BUY, 'first', budget=201.0)   # límite 201
+        engine.submit(BUY, 'second')                # límite 202
+        engine.submit(BUY, 'third', budget=201.0)   # límite 201, llega después
+        engine.submit(SELL, 'seller_a')             # límite 198
+        engine.submit(SELL, 'seller_b')             # límite 198
+        
+        fills = engine.clear(0)
+        
+        self.assertEqual(sorted(f.owner for f in fills if f.side == BUY), ['first', 'second'])
+        self.assertEqual(len({f.price for f in fills}), 1)
+        self.assertAlmostEqual(fills[0].price, (201.0 + 198.0) / 2)
+        self.assertAlmostEqual(self.market.price, fills[0].price)
+        self.assertEqual(self.market.traded_volume, 2)
+        self.assertEqual(self.market.stock, Config.INITIAL_STOCK)
+        self.assertEqual(len(engine), 0)
+    
+    def test_dealer_provides_liquidity_from_stock(self):
+        """Test que el creador de mercado vende de su stock"""
+        engine = OrderBookEngine(dealer_levels=2, dealer_size=3)
+        engine.bind(self.market)
+        for i in range(10):
+            engine.submit(BUY, i)
+        
+        fills = engine.clear(0)
+        
+        self.assertEqual(len(fills), 6)  # Dos niveles de 3 unidades dentro del límite
+        self.assertEqual(self.market.stock, Config.INITIAL_STOCK - 6)
+        self.assertGreater(self.market.price, 200.0)
+    
+    def test_simulation_with_order_book(self):
+        """Test de una simulación completa con el libro de órdenes"""
+        sim = Simulation(total_iterations=200, seed=3, engine=OrderBookEngine())
+        sim.run(verbose=False)
+        
+        self.assertEqual(len(sim.ledger), sum(sim.market.volume_history))
+        self.assertEqual(sim.smart_agent.cards, 0)
+        for agent in sim.agents:
+            self.assertGreaterEqual(agent.balance, 0)
+            self.assertGreaterEqual(agent.cards, 0)
+        with self.assertRaises(ValueError):
+            VectorizedSimulation(engine=OrderBookEngine())
+
+
+_advance = sharding._advance
+
+
+def _dying_advance(specs, block, total_iterations, coupling, wait):
+    """Shard cuyo proceso muere sin excepción (como al matarlo el sistema)"""
+    if 0 in specs:
+        os._exit(3)
+    return _advance(specs, block, total_iterations, coupling, wait)
+
+
+class TestShardedSimulation(unittest.TestCase):
+    """Tests para la simulación de varios mercados por procesos"""
+    
+    def setUp(self):
+        self.specs = [
+            MarketSpec(seed=seed, num_random=40, num_trend=10, num_anti_trend=10, num_smart=1)
+            for seed in (1, 2, 3)
+        ]
+    
+    def test_independent_markets_match_single_simulations(self):
+        """Test que sin acoplamiento cada mercado reproduce su simulación"""
+        result = ShardedSimulation(self.specs, total_iterations=150, workers=2).run()
+        
+        self.assertEqual([m.market_id for m in result.markets], [0, 1, 2])
+        for spec, path in zip(self.specs, result.price_paths):
+            sim = spec.create(150)
+            sim.run(verbose=False)
+            self.assertEqual(list(path), list(sim.market.price_history))
+        self.assertEqual(len(result.index), 150)
+        relative = [path[-1] / Config.INITIAL_PRICE for path in result.price_paths]
+        self.assertAlmostEqual(result.index[-1], (relative[0] * relative[1] * relative[2]) ** (1 / 3))
+    
+    def test_processes_match_in_process_run(self):
+        """Test que el reparto entre procesos no cambia el resultado"""
+        single = ShardedSimulation(self.specs, total_iterations=100, workers=1, coupling=0.2).run()
+        sharded = ShardedSimulation(self.specs, total_iterations=100, workers=3, coupling=0.2).run()
+        
+        self.assertEqual([list(p) for p in single.price_paths], [list(p) for p in sharded.price_paths])
+        self.assertEqual(list(single.index), list(sharded.index))
+    
+    @unittest.skipUnless(multiprocessing.get_start_method() == 'fork', "requiere procesos por fork")
+    def test_dead_shard_does_not_hang(self):
+        """Test que un shard que muere sin enviar resultado produce error en lugar de bloquear"""
+        simulation = ShardedSimulation(self.specs, total_iterations=100, workers=3)
+        with mock.patch.object(sharding, '_advance', _dying_advance):
+            with self.assertRaises(RuntimeError) as raised:
+                simulation.run()
+        self.assertIn('3', str(raised.exception))
+    
+    def test_coupling_pulls_prices_together(self):
+        """Test que el acoplamiento reduce la dispersión entre mercados"""
+        def spread(coupling):
+            result = ShardedSimulation(self.specs, total_iterations=150, workers=1, coupling=coupling).run()
+            finals = [path[-1] for path in result.price_paths]
+            return max(finals) - min(finals)
+        
+        self.assertLess(spread(0.5), spread(0.0))
+    
+    def test_coupled_price_is_recorded(self):
+        """Test que el precio acoplado es el cierre registrado en el historial"""
+        result = ShardedSimulation(self.specs, total_iterations=80, workers=2, coupling=0.5).run()
+        
+        for summary, path in zip(result.markets, result.price_paths):
+            self.assertEqual(len(path), 81)
+            self.assertEqual(path[-1], summary.statistics['final_price'])
+            self.assertAlmostEqual(summary.statistics['avg_price'], sum(path) / len(path))
+    
+    def test_invalid_parameters(self):
+        """Test de validación de parámetros"""
+        with self.assertRaises(ValueError):
+            ShardedSimulation([])
+        with self.assertRaises(ValueError):
+            ShardedSimulation(self.specs, coupling=1.5)
+        with self.assertRaises(ValueError):
+            ShardedSimulation(self.specs, workers=0)
+
+
+class TestSharedRunResults(unittest.TestCase):
+    """Tests para la agregación de resultados en memoria compartida"""
+    
+    def test_pool_workers_write_full_results(self):
+        """Test que los procesos escriben historiales y agentes en el bloque"""
+        runner = MonteCarloRunner(num_runs=6, workers=2, seed=11, total_iterations=120)
+        results, shared = runner.run_shared()
+        with shared:
+            self.assertEqual(results, runner.run())
+            smart_index = shared.num_agents - Config.NUM_SMART
+            self.assertEqual(shared.ranks(smart_index), [r.rank for r in results])
+            self.assertEqual(sum(shared.rank_distribution(smart_index).values()), 6)
+            
+            sim = Simulation(total_iterations=120, seed=runner.seeds()[2])
+            sim.run(verbose=False)
+            self.assertEqual(list(shared.price_path(2)), list(sim.market.price_history))
+    
+    def test_shared_run_uses_smart_params(self):
+        """Test que el bloque compartido evalúa los parámetros del SmartAgent indicados"""
+        params = SmartAgentParams(low_threshold=1.2, trading_profit=1.01)
+        runner = MonteCarloRunner(num_runs=3, workers=1, seed=5, total_iterations=200, smart_params=params)
+        results, shared = runner.run_shared()
+        with shared:
+            self.assertEqual(results, runner.run())
+        
+        default = MonteCarloRunner(num_runs=3, workers=1, seed=5, total_iterations=200).run()
+        self.assertNotEqual([r.return_pct for r in results], [r.return_pct for r in default])
+    
+    def test_mean_path_and_quantile_bands(self):
+        """Test de la media y los cuantiles entre simulaciones"""
+        with SharedRunResults(num_runs=3, num_agents=1, total_iterations=1) as shared:
+            shared.prices[:] = array('d', [1.0, 10.0, 2.0, 20.0, 3.0, 60.0])
+            
+            self.assertEqual(list(shared.mean_path()), [2.0, 30.0])
+            bands = shared.quantile_bands((0.0, 0.5, 0.75, 1.0))
+            self.assertEqual(list(bands[0.5]), [2.0, 20.0])
+            self.assertEqual(list(bands[0.75]), [2.5, 40.0])
+            self.assertEqual(list(bands[1.0]), [3.0, 60.0])
+            with self.assertRaises(ValueError):
+                shared.quantile_bands((1.5,))
+
+
+class TestRunArchive(unittest.TestCase):
+    """Tests para el archivo binario de simulaciones"""
+    
+    def test_archive_roundtrip(self):
+        """Test que el archivo conserva historiales, agentes y resúmenes"""
+        runner = MonteCarloRunner(num_runs=4, workers=2, seed=5, total_iterations=80)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'runs.bin')
+            results = archive_runs(runner, path)
+            self.assertEqual(results, runner.run())
+            
+            sim = Simulation(total_iterations=80, seed=runner.seeds()[1])
+            sim.run(verbose=False)
+            with RunArchive(path) as archive:
+                self.assertEqual(len(archive), 4)
+                self.assertEqual(list(archive.results()), results)
+                self.assertEqual(archive.result(1), results[1])
+                self.assertEqual(list(archive.price_path(1)), list(sim.market.price_history))
+                self.assertEqual(list(archive.volumes(1)), list(sim.market.volume_history))
+                records = list(sim.agent_records())
+                self.assertEqual(list(archive.balances(1)), [r[2] for r in records])
+                self.assertEqual(list(archive.cards(1)), [r[3] for r in records])
+                self.assertEqual(list(archive.prices_at(80)), [r.final_price for r in results])
+    
+    def test_append_and_lookup(self):
+        """Test que los lotes se anexan y se localizan por run_id y semilla"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'runs.bin')
+            first = archive_runs(MonteCarloRunner(num_runs=2, workers=1, seed=1, total_iterations=30), path)
+            second = archive_runs(MonteCarloRunner(num_runs=2, workers=1, seed=2, total_iterations=30), path)
+            
+            with RunArchive(path) as archive:
+                self.assertEqual(len(archive), 4)
+                self.assertEqual(archive.find(run_id=2), [1, 3])
+                self.assertEqual(archive.find(seed=second[1].seed), [3])
+                self.assertEqual(archive.find(run_id=1, seed=first[0].seed), [0])
+                self.assertEqual(archive.find(seed=-1), [])
+                with self.assertRaises(IndexError):
+                    archive.price_path(4)
+            
+            # Otro número de iteraciones no encaja en el archivo
+            with self.assertRaises(ValueError):
+                ArchiveWriter(path, total_iterations=31, num_agents=1)
+    
+    def test_interrupted_append_is_discarded(self):
+        """Test que una simulación a medio escribir se ignora y se descarta"""
+        sim = Simulation(num_random=3, num_trend=0, num_anti_trend=0, total_iterations=20, seed=4)
+        sim.run(verbose=False)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'runs.bin')
+            with ArchiveWriter(path, total_iterations=20, num_agents=sim.num_agents) as writer:
+                summary = RunResult.from_simulation(1, 4, sim)
+                writer.append(summary, sim)
+                writer.append(summary, sim)
+            # Bloque final truncado, como tras una escritura interrumpida
+            os.truncate(path, os.path.getsize(path) - 8)
+            
+            with RunArchive(path) as archive:
+                self.assertEqual(len(archive), 1)
+            with ArchiveWriter(path, total_iterations=20, num_agents=sim.num_agents) as writer:
+                self.assertEqual(writer.count, 1)
+                writer.append(summary, sim)
+                with self.assertRaises(ValueError):
+                    writer.append_packed(summary, b'\x00' * 8)
+            with RunArchive(path) as archive:
+                self.assertEqual(len(archive), 2)
+                self.assertEqual(list(archive.price_path(1)), list(sim.market.price_history))
+                self.assertEqual(list(archive.mean_path()), list(sim.market.price_history))
+    
+    def test_rejects_other_files(self):
+        """Test que un fichero ajeno no se abre como archivo"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'other.bin')
+            with open(path, 'wb') as f:
+                f.write(b'x' * 128)
+            with self.assertRaises(ValueError):
+                RunArchive(path)
+
+
+class TestStrategyOptimizer(unittest.TestCase):
+    """Tests para el optimizador de la estrategia del SmartAgent"""
+    
+    def test_params_file_roundtrip(self):
+        """Test que los parámetros se guardan y cargan desde JSON"""
+        params = SmartAgentParams(low_threshold=0.95, liquidation_iterations=80)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'params.json')
+            params.save(path)
+            self.assertEqual(SmartAgentParams.load(path), params)
+        with self.assertRaises(ValueError):
+            SmartAgentParams.from_dict({'unknown': 1})
+    
+    def test_encode_decode(self):
+        """Test de la codificación normalizada de los parámetros"""
+        optimizer = StrategyOptimizer(seed=1)
+        params = optimizer.decode(optimizer.encode(SmartAgentParams()))
+        
+        self.assertEqual(params.liquidation_iterations, 50)
+        self.assertAlmostEqual(params.reduction_start, 0.7)
+        self.assertEqual(optimizer.decode([1.0] * len(optimizer.names)).liquidation_iterations, 200)
+    
+    def test_optimizer_is_reproducible_and_cuts_losers(self):
+        """Test de una optimización corta: reproducible y con descarte temprano"""
+        def optimize():
+            optimizer = StrategyOptimizer(
+                population=6, generations=1, evaluations=6, stage_size=2, workers=1, seed=5,
+                total_iterations=150
+            )
+            return optimizer.run(), optimizer.history
+        
+        params, history = optimize()
+        
+        self.assertEqual((params, history), optimize())
+        self.assertEqual(len(history), 2)
+        self.assertEqual(asdict(params), {**asdict(SmartAgentParams()), **history[-1].best_params})
+        # Sin descartes se ejecutarían 6 candidatos x 6 semillas por generación
+        self.assertLess(sum(g.evaluations for g in history), 2 * 36)
+        self.assertGreater(sum(g.eliminated for g in history), 0)
+        
+        # Las iteraciones viajan en cada tarea: la Config del proceso que
+        # ejecuta la simulación no influye (como en un pool con spawn)
+        with Config.override(TOTAL_ITERATIONS=20):
+            self.assertEqual((params, history), optimize())
+    
+    def test_invalid_space(self):
+        """Test de validación del espacio de búsqueda"""
+        with self.assertRaises(ValueError):
+            StrategyOptimizer(space={'NUM_TREND': (0, 10)})
+        with self.assertRaises(ValueError):
+            StrategyOptimizer(population=2, elite=2)
+        with self.assertRaises(ValueError):
+            StrategyOptimizer(config={'reduction_start': 0.5})
+        with self.assertRaises(ValueError):
+            StrategyOptimizer(total_iterations=0)
+
+
+class TestBenchmarks(unittest.TestCase):
+    """Tests para la suite de benchmarks"""
+    
+    def test_suite_reports_throughput_and_memory(self):
+        """Test que la suite produce throughput y memoria pico en JSON"""
+        from benchmarks.run_benchmarks import run_suite, to_json
+        results = run_suite([100], [5], calls=200, repeat=1)
+        document = to_json(results)
+        
+        names = {r['name'] for r in document['results']}
+        self.assertIn('simulation.run_iteration', names)
+        self.assertIn('simulation.run', names)
+        self.assertIn('agent.decide', names)
+        self.assertIn('market.apply_buy', names)
+        self.assertIn('engine.order_book', names)
+        for entry in document['results']:
+            self.assertGreater(entry['peak_memory_kb'], 0)
+            self.assertTrue(all(rate > 0 for rate in entry['rates'].values()))
+    
+    def test_compare_flags_regressions(self):
+        """Test que la comparación detecta caídas de throughput"""
+        from benchmarks.run_benchmarks import compare
+        baseline = {'results': [{'key': 'a', 'skipped': None, 'rates': {'ops_per_s': 100.0}}]}
+        slower = {'results': [{'key': 'a', 'skipped': None, 'rates': {'ops_per_s': 80.0}}]}
+        
+        self.assertEqual(len(compare(slower, baseline, tolerance=0.10)), 1)
+        self.assertEqual(compare(slower, baseline, tolerance=0.25), [])
 
 
 # TESTS EJECUTIONS
@@ -370,6 +1799,27 @@ def run_tests():
     suite.addTests(loader.loadTestsFromTestCase(TestAgentDecisions))
     suite.addTests(loader.loadTestsFromTestCase(TestSimulation))
     suite.addTests(loader.loadTestsFromTestCase(TestSmartAgentIntegration))
+    suite.addTests(loader.loadTestsFromTestCase(TestVectorizedSimulation))
+    suite.addTests(loader.loadTestsFromTestCase(TestMonteCarloRunner))
+    suite.addTests(loader.loadTestsFromTestCase(TestSequentialStopping))
+    suite.addTests(loader.loadTestsFromTestCase(TestReplay))
+    suite.addTests(loader.loadTestsFromTestCase(TestRandomStreams))
+    suite.addTests(loader.loadTestsFromTestCase(TestStrategyComparison))
+    suite.addTests(loader.loadTestsFromTestCase(TestRollingWindow))
+    suite.addTests(loader.loadTestsFromTestCase(TestTransactionLedger))
+    suite.addTests(loader.loadTestsFromTestCase(TestIterationSinks))
+    suite.addTests(loader.loadTestsFromTestCase(TestCheckpoint))
+    suite.addTests(loader.loadTestsFromTestCase(TestParameterSweep))
+    suite.addTests(loader.loadTestsFromTestCase(TestResultCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestProfiler))
+    suite.addTests(loader.loadTestsFromTestCase(TestDecideBatch))
+    suite.addTests(loader.loadTestsFromTestCase(TestOrderBookEngine))
+    suite.addTests(loader.loadTestsFromTestCase(TestShardedSimulation))
+    suite.addTests(loader.loadTestsFromTestCase(TestSharedRunResults))
+    suite.addTests(loader.loadTestsFromTestCase(TestRunArchive))
+    suite.addTests(loader.loadTestsFromTestCase(TestStrategyOptimizer))
+    suite.addTests(loader.loadTestsFromTestCase(TestPool))
+    suite.addTests(loader.loadTestsFromTestCase(TestBenchmarks))
     
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)